@@ -4,6 +4,10 @@ Note on how to load fixtures saved with django-admin dumpdata:
 export PYTHONPATH=/home/asartori/orpheus
 export DJANGO_SETTINGS_MODULE=orpheus.settings
 django-admin loaddata /home/asartori/Dropbox/OSC/orpheus-backups/romeo.json
+
+For large fixtures, the fastload command is much faster (load into an empty database, e.g. after reset_content):
+
+django-admin fastload /home/asartori/Dropbox/OSC/orpheus-backups/romeo.json
 '''
 
 import cup_parser
@@ -403,8 +403,8 @@ def delete_oastatus(policy_id):
     return(orpheus_delete(url))
 # endregion
 
-# # Function below replaced by orpheus.policies.management.commands.nuke_content_tables, which is much faster. To run it:
-# # $ python manage.py nuke_content_tables
+# # Function below replaced by orpheus.policies.management.commands.reset_content, which is much faster. To run it:
+# # $ python manage.py reset_content
 # def nuke_content_tables():
 #     if input('Are you sure you want to delete all Orpheus content tables (Nodes, Open Access stata, Gold policies'
 #           'and Green Policies? (y/n)') in ['y', 'Y']:
@@ -142,6 +142,17 @@ STATICFILES_DIRS = [
     os.path.join(BASE_DIR, "static"),
 ]
 
+# Cache of API responses (see policies/cache.py): alias of a cache in CACHES (locmem by default; a shared
+# backend such as memcached or redis should be configured in production) and timeout in seconds
+ORPHEUS_API_CACHE = 'default'
+ORPHEUS_API_CACHE_TIMEOUT = 60 * 60
+
+# Maximum age in seconds of the cached counts of the home page (see policies/stats.py)
+ORPHEUS_STATS_TIMEOUT = 5 * 60
+
+# Maximum age in seconds of cached autocomplete results (see policies/autocomplete.py)
+ORPHEUS_AUTOCOMPLETE_TIMEOUT = 10 * 60
+
 try:
     from .settings_local import *
 except ImportError as e:
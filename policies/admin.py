@@ -4,9 +4,10 @@ from django.contrib import admin, messages
 from django.contrib.auth.models import Group, User
 from django.contrib.auth.admin import GroupAdmin, UserAdmin
 from django.contrib.admin.helpers import ActionForm
+from django.db import transaction
 
 from .models import Node, Source, OaStatus, GoldPolicy, GreenPolicy, RetrospectiveOaPolicy, Contact, Version, Licence, \
-    Outlet, Responsibility, Note, Deal#, Output
+    Outlet, Responsibility, Note, Deal, NodeAncestor#, Output
 
 class UpdateNodeActionForm(ActionForm):
     parent_id = forms.IntegerField(required=False)
@@ -66,7 +67,10 @@ class NodeAdmin(admin.ModelAdmin):
         else:
             parent_id = int(parent_id)
             qc = jqueryset.count()
-            jqueryset.update(parent=parent_id)
+            with transaction.atomic():
+                node_ids = list(jqueryset.values_list('id', flat=True))
+                jqueryset.update(parent=parent_id)
+                NodeAncestor.objects.refresh(node_ids)
             self.message_user(request, "Successfully updated parent of {} rows".format(qc))
     update_parent.short_description = 'Update parent of selected rows'
 
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class PoliciesConfig(AppConfig):
     name = 'policies'
+
+    def ready(self):
+        from . import signals  # connects signal handlers
@@ -0,0 +1,109 @@
+'''
+Archive of superseded policies.
+
+Policies replaced by newer ones (e.g. on re-import) are marked as superseded rather than deleted, so that their
+history can be displayed, but they are never used by the API (see policies.cascades). The
+archive_superseded_policies command (e.g. run by cron) moves them out of the policy tables into ArchivedPolicy,
+keeping policy tables and their indexes limited to current rows. Each archived policy is a snapshot of the
+policy, its many-to-many relations and its notes, made by the JSON serializer of Django.
+
+policy_history reads live and archived policies together, for the page listing all policies of a node
+(see policies.detail). Archived policies are returned as unsaved model instances with an archived attribute,
+so that templates can display them like live ones.
+'''
+from collections import defaultdict
+
+from django.core import serializers
+from django.db import transaction
+
+from . import models
+
+ARCHIVED_MODELS = [models.OaStatus, models.GoldPolicy, models.GreenPolicy, models.Epmc, models.Deal,
+                   models.RetrospectiveOaPolicy]
+
+def note_relation(model):
+    '''
+    :return: name of the reverse relation from model to its notes, or None
+    '''
+    for relation in model._meta.related_objects:
+        if relation.related_model is models.Note:
+            return relation.get_accessor_name()
+    return None
+
+def archive_policies(model, batch_size=500):
+    '''
+    Moves the superseded policies of model to ArchivedPolicy, a transaction per batch. Deleting them from their
+    table sends the usual signals (e.g. recording tombstones for the changes feed).
+    :return: number of archived policies
+    '''
+    relation = note_relation(model)
+    count = 0
+    while True:
+        with transaction.atomic():
+            queryset = model.objects.filter(superseded=True).order_by('pk')
+            if relation:
+                queryset = queryset.prefetch_related(relation)
+            policies = list(queryset[:batch_size])
+            if not policies:
+                return count
+            archived = []
+            for policy in policies:
+                notes = list(getattr(policy, relation).all()) if relation else []
+                archived.append(models.ArchivedPolicy(
+                    model=model._meta.model_name, policy_id=policy.pk, node_id=policy.node_id,
+                    superseded_date=policy.superseded_date, data=serializers.serialize('json', [policy] + notes)))
+            model.objects.filter(pk__in=[p.pk for p in policies]).delete()
+            models.ArchivedPolicy.objects.bulk_create(archived)
+        count += len(policies)
+
+def superseded_count(model):
+    return model.objects.filter(superseded=True).count()
+
+def archived_policies(model, node_ids, select_related=()):
+    '''
+    :param select_related: foreign keys of model to load (a query per field for all policies)
+    :return: list of the archived policies of model linked to node_ids, most recently superseded first, as
+        unsaved instances whose many-to-many relations and notes are set as if prefetched
+    '''
+    snapshots = models.ArchivedPolicy.objects.filter(model=model._meta.model_name, node_id__in=node_ids)\
+        .order_by('-superseded_date', '-policy_id').values_list('data', flat=True)
+    relation = note_relation(model)
+    policies = []
+    related_ids = defaultdict(set)
+    for data in snapshots:
+        objects = list(serializers.deserialize('json', data, ignorenonexistent=True))
+        policy = objects[0].object
+        policy.archived = True
+        # Related managers read prefetched objects from this cache, by field name or related name
+        policy._prefetched_objects_cache = {}
+        if relation:
+            policy._prefetched_objects_cache[relation] = [o.object for o in objects[1:]]
+        for field_name, pks in objects[0].m2m_data.items():
+            related_ids[field_name].update(pks)
+        policies.append((policy, objects[0].m2m_data))
+        for field_name in select_related:
+            related_id = getattr(policy, model._meta.get_field(field_name).attname)
+            if related_id is not None:
+                related_ids[field_name].add(related_id)
+
+    related = dict((f, model._meta.get_field(f).related_model.objects.in_bulk(ids)) for f, ids in related_ids.items())
+    for policy, m2m_data in policies:
+        for field_name, pks in m2m_data.items():
+            policy._prefetched_objects_cache[field_name] = [related[field_name][pk] for pk in pks
+                                                            if pk in related[field_name]]
+        for field_name in select_related:
+            obj = related.get(field_name, {}).get(getattr(policy, model._meta.get_field(field_name).attname))
+            if obj is not None:
+                setattr(policy, field_name, obj)
+    return [policy for policy, m2m_data in policies]
+
+def policy_history(queryset, node_ids, select_related=()):
+    '''
+    Unified read API for live and archived policies
+    :param queryset: policies of node_ids, superseded or not (e.g. with related objects loaded for display)
+    :return: list of the policies of queryset, followed by the archived policies of the same model
+    '''
+    policies = list(queryset)
+    if queryset.model in ARCHIVED_MODELS:
+        policies += archived_policies(queryset.model, node_ids, select_related)
+    return policies
@@ -0,0 +1,102 @@
+'''
+Autocompletes of the curator forms (django-autocomplete-light Select2 widgets).
+
+Suggestions are the objects whose normalised name (see models.normalize_name) starts with the query, read with
+values() from an indexed column, sorted by that column and cut at AUTOCOMPLETE_LIMIT, so that the cost of a
+request does not depend on the size of the table. Node queries looking like an ISSN are looked up in
+NodeIdentifier; when no name starts with the query, the search backend is used to tolerate typos.
+
+Results are cached by query (successive keystrokes often repeat prefixes, and many curators type the same
+names) until nodes or sources are added, renamed or deleted, and browsers may reuse them for a minute.
+'''
+import hashlib
+
+from django.conf import settings
+from django.http import JsonResponse
+from django.utils.cache import patch_cache_control
+from django.views.generic import View
+from dal.views import ViewMixin
+
+from . import cache
+from . import models
+from . import search
+
+AUTOCOMPLETE_LIMIT = 20
+KEY_PREFIX = 'orpheus:autocomplete:'
+
+class AutocompleteView(ViewMixin, View):
+    '''
+    Select2 autocomplete returning the id and label of at most AUTOCOMPLETE_LIMIT objects, without
+    instantiating models. Subclasses implement get_results.
+    '''
+    model = None
+    max_age = 60
+
+    def get_results(self, text):
+        '''
+        :param text: query entered by the user, not blank
+        :return: list of (id, label) pairs
+        '''
+        raise NotImplementedError
+
+    def cache_key(self, text):
+        key = '{}|{}|{}'.format(self.__class__.__name__, sorted(self.forwarded.items()), text)
+        return KEY_PREFIX + hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+    def get_cached_results(self, text):
+        key = self.cache_key(text)
+        results = cache.get_tagged(key)
+        if results is None:
+            results = [{'id': str(pk), 'text': label} for pk, label in self.get_results(text)]
+            cache.set_tagged(key, results, [cache.collection_tag(self.model)],
+                             getattr(settings, 'ORPHEUS_AUTOCOMPLETE_TIMEOUT', 10 * 60))
+        return results
+
+    def get(self, request, *args, **kwargs):
+        results = []
+        text = ' '.join(self.q.split())
+        if request.user.is_authenticated and text:
+            results = self.get_cached_results(text)
+        response = JsonResponse({'results': results, 'pagination': {'more': False}})
+        patch_cache_control(response, private=True, max_age=self.max_age)
+        return response
+
+class NodeAutocompleteView(AutocompleteView):
+    '''
+    Nodes, optionally of the type forwarded by the form
+    '''
+    model = models.Node
+    node_type = None
+
+    def get_queryset(self):
+        queryset = models.Node.objects.all()
+        node_type = self.node_type or self.forwarded.get('type')
+        if node_type:
+            queryset = queryset.filter(type=node_type)
+        return queryset
+
+    def get_results(self, text):
+        queryset = self.get_queryset()
+        if search.ISSN_PATTERN.match(text):
+            return list(queryset.filter(models.issn_lookup(text)).order_by('name')
+                        .values_list('id', 'name')[:AUTOCOMPLETE_LIMIT])
+        query = models.normalize_name(text)
+        results = list(queryset.filter(normalized_name__startswith=query).order_by('normalized_name', 'id')
+                       .values_list('id', 'name')[:AUTOCOMPLETE_LIMIT])
+        if not results:
+            results = list(search.search_nodes(queryset, text).values_list('id', 'name')[:AUTOCOMPLETE_LIMIT])
+        return results
+
+class SourceAutocompleteView(AutocompleteView):
+    '''
+    Sources whose description starts with the query, or whose URL is the query
+    '''
+    model = models.Source
+
+    def get_results(self, text):
+        queryset = models.Source.objects.all()
+        results = list(queryset.filter(normalized_description__startswith=models.normalize_name(text))
+                       .order_by('normalized_description', 'id').values_list('id', 'description')[:AUTOCOMPLETE_LIMIT])
+        if not results:
+            results = list(queryset.filter(url=text).values_list('id', 'description'))
+        return results
@@ -0,0 +1,151 @@
+'''
+Shared cache of API responses (see CachedResponseMixin), usable with any Django cache backend.
+
+Entries are keyed by host, path, sorted query parameters and whether the client is authenticated, and store the response data along with the
+versions of the tags it depends on:
+    - node:<id> for each node serialized in the response (or the node of each serialized policy)
+    - collection:<model_name> for the list of objects a view selects from, which changes when objects are
+      created or deleted, or when nodes are renamed, re-parented, etc. (see policies.signals)
+    - all, for changes to sources, licences and other tags embedded in responses
+Invalidating a tag gives it a new random version, which makes every entry recorded with the previous one
+stale; entries are checked against the current versions of their tags when read, so a single cache lookup
+of all tags is needed per hit. Tags missing from the cache (e.g. evicted) invalidate entries too.
+
+Other data, such as autocomplete results, can be cached with the same tags (see get_tagged and set_tagged).
+
+The cache alias and timeout are set by the ORPHEUS_API_CACHE and ORPHEUS_API_CACHE_TIMEOUT settings.
+'''
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Model
+from django.utils.http import urlencode
+from rest_framework.response import Response
+
+from . import models
+
+KEY_PREFIX = 'orpheus:api:'
+TAG_PREFIX = 'orpheus:tag:'
+STATS_KEYS = {'hits': 'orpheus:stats:hits', 'misses': 'orpheus:stats:misses'}
+
+def get_cache():
+    return caches[getattr(settings, 'ORPHEUS_API_CACHE', 'default')]
+
+def get_timeout():
+    return getattr(settings, 'ORPHEUS_API_CACHE_TIMEOUT', 60 * 60)
+
+def request_key(request):
+    query = urlencode(sorted((k, sorted(v)) for k, v in request.query_params.lists()), doseq=True)
+    # Responses may depend on whether the client is authenticated (e.g. page size limits of KeysetPagination)
+    authenticated = bool(request.user and request.user.is_authenticated)
+    key = '{}{}?{}#{}'.format(request.get_host(), request.path, query, 'user' if authenticated else 'anonymous')
+    return KEY_PREFIX + hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+def node_tags(node_ids):
+    return ['node:{}'.format(i) for i in node_ids]
+
+def collection_tag(model):
+    return 'collection:{}'.format(model._meta.model_name)
+
+def tag_versions(tags):
+    '''
+    :return: current versions of tags, creating them if necessary
+    '''
+    cache = get_cache()
+    keys = dict((TAG_PREFIX + t, t) for t in tags)
+    versions = cache.get_many(list(keys))
+    missing = dict((k, uuid.uuid4().hex) for k in keys if k not in versions)
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    return dict((keys[k], v) for k, v in versions.items())
+
+def get_tagged(key):
+    '''
+    :return: data cached under key by set_tagged, or None if missing or stale
+    '''
+    cache = get_cache()
+    entry = cache.get(key)
+    if entry is not None:
+        data, versions = entry
+        current = cache.get_many([TAG_PREFIX + t for t in versions])
+        if all(current.get(TAG_PREFIX + t) == v for t, v in versions.items()):
+            return data
+    return None
+
+def set_tagged(key, data, tags, timeout=None):
+    '''
+    Caches data under key until any of tags (or 'all') is invalidated, or timeout
+    '''
+    versions = tag_versions(set(tags) | set(['all']))
+    get_cache().set(key, (data, versions), get_timeout() if timeout is None else timeout)
+
+def get_response_data(request):
+    '''
+    :return: cached data of the response to request, or None if missing or stale
+    '''
+    data = get_tagged(request_key(request))
+    count('misses' if data is None else 'hits')
+    return data
+
+def set_response_data(request, data, tags):
+    set_tagged(request_key(request), data, tags)
+
+def invalidate(*tags):
+    '''
+    Makes entries depending on any of tags stale, now and once the current transaction is committed (so that
+    entries cached from data read before the commit are discarded as well)
+    '''
+    def set_new_versions():
+        get_cache().set_many(dict((TAG_PREFIX + t, uuid.uuid4().hex) for t in tags), None)
+    if tags:
+        set_new_versions()
+        transaction.on_commit(set_new_versions)
+
+def count(stat):
+    cache = get_cache()
+    try:
+        cache.incr(STATS_KEYS[stat])
+    except ValueError:  # missing key
+        cache.set(STATS_KEYS[stat], 1, None)
+
+def stats():
+    values = get_cache().get_many(list(STATS_KEYS.values()))
+    return dict((stat, values.get(key, 0)) for stat, key in STATS_KEYS.items())
+
+class CachedResponseMixin(object):
+    '''
+    Serves GET requests to DRF generic views from the shared API cache. Responses are tagged with the nodes
+    they contain, found in the objects passed to get_serializer: the objects themselves for node views, or
+    the node attribute given by cache_node_attribute. Must precede the DRF generic view in the bases of a view,
+    and follow ConditionalGetMixin if both are used.
+    '''
+    cache_node_attribute = 'id'
+
+    def get_serializer(self, *args, **kwargs):
+        instance = args[0] if args else kwargs.get('instance')
+        if instance is not None:
+            # A list, queryset or single object; querysets are evaluated (once) by the serializer
+            self.serialized_objects = [instance] if isinstance(instance, Model) else instance
+        return super(CachedResponseMixin, self).get_serializer(*args, **kwargs)
+
+    def get_cache_tags(self):
+        node_ids = set(getattr(o, self.cache_node_attribute) for o in getattr(self, 'serialized_objects', []))
+        return node_tags(node_ids - set([None])) + [collection_tag(self.get_queryset().model)]
+
+    def get(self, request, *args, **kwargs):
+        data = get_response_data(request)
+        if data is not None:
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+            return response
+        change = models.ChangeCounter.current().value
+        response = super(CachedResponseMixin, self).get(request, *args, **kwargs)
+        # Data changed while the response was calculated may be older than the tag versions read now
+        if (response.status_code == 200) and (models.ChangeCounter.current().value == change):
+            set_response_data(request, response.data, self.get_cache_tags())
+        response['X-Cache'] = 'MISS'
+        return response
@@ -0,0 +1,162 @@
+'''
+Cascades used to pick the most reliable policy of each type for a node (see the most_reliable_* properties
+of Node and policies.resolvers.PolicyResolver).
+
+Policies linked to the preferred name of a node are preferred to those linked to its synonyms, which are in
+turn preferred to those linked to its parent (publisher); at each of these tiers, vetted policies are
+preferred to unvetted ones. This gives the following stages:
+    1/2: preferred name (vetted/any)
+    3/4: synonyms of the preferred name, in alphabetical order (vetted/any)
+    5/6: parent (vetted/any)
+    7/8: parents of the preferred name and of its synonyms, in alphabetical order (vetted/any)
+'''
+from itertools import groupby
+
+from django.db.models import Case, F, IntegerField, Q, Value, When
+
+PROVENANCE = {
+    1: 'preferred name',
+    2: 'preferred name',
+    3: 'synonym',
+    4: 'synonym',
+    5: 'parent (publisher)',
+    6: 'parent (publisher)',
+    7: 'synonym parent (publisher)',
+    8: 'synonym parent (publisher)',
+}
+
+PREFERRED_NAME = 1
+SYNONYM = 2
+PARENT = 3
+SYNONYM_PARENT = 4
+
+def preferred_name_id(node):
+    if (node.name_status != 'PRIMARY') and node.synonym_of_id:
+        return node.synonym_of_id
+    return node.id
+
+def stage_number(tier, vetted):
+    return tier * 2 - 1 if vetted else tier * 2
+
+class PolicyCascade(object):
+    '''
+    Most reliable policy of a given type: the first eligible policy in stage order. Ties within a stage are
+    broken by synonym name, then by the default ordering of the policy model.
+
+    All stages are evaluated by a single query, which ranks candidate policies by stage and returns
+    the first one.
+    '''
+    # Fields used to order candidates; see also sort_key
+    ranking = ['stage', 'node__name']
+    limit = 1
+
+    def __init__(self, model, eligible=Q(superseded=False), select_related=('source',), prefetch_related=()):
+        '''
+        :param model: policy model
+        :param eligible: Q object selecting policies that may be used by the API at all
+        :param select_related, prefetch_related: relations needed by the to_api_dict method of model
+        '''
+        self.model = model
+        self.eligible = eligible
+        self.select_related = select_related
+        self.prefetch_related = prefetch_related
+
+    def policies(self):
+        '''
+        :return: queryset of eligible policies, in the default ordering of the model
+        '''
+        ordering = list(self.model._meta.ordering) + ['pk']
+        return self.model.objects.filter(self.eligible).select_related(*self.select_related)\
+            .prefetch_related(*self.prefetch_related).order_by(*ordering)
+
+    def candidates(self, node):
+        '''
+        :return: queryset of the policies available to node, annotated with their tier and stage and ranked
+        '''
+        preferred_id = preferred_name_id(node)
+        # Linked nodes are selected by id, so that candidates are found with the node_id indexes of the
+        # policy table (see policies.indexes) rather than by joining every policy to its node
+        group = type(node).objects.filter(Q(id=preferred_id) | Q(synonym_of=preferred_id))
+        synonym_parents = group.filter(parent__isnull=False).values('parent')
+        linked = Q(node__in=group.values('id')) | Q(node__in=synonym_parents)
+        tiers = [
+            When(node=preferred_id, then=Value(PREFERRED_NAME)),
+            When(node__synonym_of=preferred_id, then=Value(SYNONYM)),
+        ]
+        if node.parent_id:
+            linked |= Q(node=node.parent_id)
+            tiers.append(When(node=node.parent_id, then=Value(PARENT)))
+        tier = Case(*tiers, default=Value(SYNONYM_PARENT), output_field=IntegerField())
+        queryset = self.policies().filter(linked).annotate(tier=tier).annotate(stage=Case(
+            When(vetted=True, then=F('tier') * 2 - 1),
+            default=F('tier') * 2,
+            output_field=IntegerField()
+        ))
+        return queryset.order_by(*(self.ranking + list(queryset.query.order_by)))
+
+    def sort_key(self, candidate):
+        '''
+        Equivalent of ranking for candidates ranked in memory
+        :param candidate: a (tier, position, stage, policy) tuple, position being the rank of the node the
+            policy is linked to among the synonyms (or synonym parents) in alphabetical order
+        '''
+        tier, position, stage, policy = candidate
+        return stage, position
+
+    def pick(self, ranked):
+        '''
+        :param ranked: iterable of (stage, policy) tuples, in rank order
+        :return: API representation of the most reliable policy, or None
+        '''
+        for stage, policy in ranked:
+            return policy.to_api_dict(PROVENANCE[stage])
+        return None
+
+    def resolve(self, node):
+        candidates = self.candidates(node)
+        if self.limit:
+            candidates = candidates[:self.limit]
+        return self.pick((p.stage, p) for p in candidates)
+
+class GreenPolicyCascade(PolicyCascade):
+    '''
+    Most reliable green policies for self-archiving each version in non-commercial institutional
+    repositories. Stages are tried in turn, each filling the versions left empty by previous ones, until
+    policies for both AMs and VoRs have been found. Unlike other cascades, the vetted and unvetted stages
+    of each synonym (or synonym parent) are tried before moving to the next one, and the vetted stage of every
+    synonym is tried once synonyms are reached, even if AMs and VoRs are covered (so it may still fill the
+    Preprint).
+    '''
+    ranking = ['tier', 'node__name', 'stage']
+    limit = None
+    outlet = 'Non-commercial institutional repository'
+    versions = ['Preprint', 'AM', 'VoR']
+
+    def policies(self):
+        '''
+        :return: queryset of eligible policies covering the AM or VoR in the outlet of this cascade
+        '''
+        covered = self.model.objects.filter(outlet__name=self.outlet).values('id')
+        deposited = self.model.objects.filter(version__short_name__in=['AM', 'VoR']).values('id')
+        return super(GreenPolicyCascade, self).policies().filter(id__in=covered).filter(id__in=deposited)
+
+    def sort_key(self, candidate):
+        tier, position, stage, policy = candidate
+        return tier, position, stage
+
+    def pick(self, ranked):
+        embargos = dict((v, None) for v in self.versions)
+        synonym_stages = [stage_number(SYNONYM, True), stage_number(SYNONYM, False)]
+        synonyms_reached = False
+        for (_, stage), policies in groupby(ranked, key=lambda r: (r[1].node_id, r[0])):
+            complete = (embargos['AM'] != None) and (embargos['VoR'] != None)
+            # Each stage is only tried if AMs or VoRs are missing, except the vetted stage of synonyms
+            if complete and not (synonyms_reached and stage == synonym_stages[0]):
+                continue
+            synonyms_reached = synonyms_reached or (stage in synonym_stages)
+            for stage, g in policies:
+                versions = g.get_versions()
+                for v in self.versions:
+                    if (v in versions) and (embargos[v] == None):  # Avoid overwriting more reliable embargos
+                        embargos[v] = g.to_api_dict(PROVENANCE[stage])
+        return embargos
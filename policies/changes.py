@@ -0,0 +1,80 @@
+'''
+Feed of changes to nodes, policies and sources since a given time, for clients keeping a copy of the data in
+sync (see ChangesAPIView).
+
+Each change is reported as a compact event (model, id, op, updated), op being one of:
+    - create: the object was created since the requested time
+    - update: the object was modified since the requested time. Nodes are also reported as updated when their
+      Cambridge API fields changed because of a change to a synonym, a parent or one of their policies
+      (i.e. when their ResolvedPolicy row was rewritten)
+    - delete: the object was deleted (see Tombstone)
+An object may be reported more than once; clients should only keep its latest state.
+
+Events are sorted by (updated, source, id), source being the table an event was read from, and paginated by
+keyset: each table is queried for the rows following the last event of the previous page, using the
+index on its updated field, and the results are merged.
+'''
+import heapq
+from collections import namedtuple
+
+from django.db.models import Q
+
+from . import models
+
+TRACKED_MODELS = [models.Node, models.OaStatus, models.GoldPolicy, models.GreenPolicy, models.Deal, models.Epmc,
+                  models.Source]
+
+Event = namedtuple('Event', ['updated', 'source', 'key', 'model', 'id', 'op'])
+
+def after(time_field, key_field, source, position):
+    '''
+    Q object selecting rows of source following position, an (updated, source, key) tuple
+    '''
+    updated, position_source, key = position
+    if source > position_source:
+        return Q(**{'{}__gte'.format(time_field): updated})
+    if source == position_source:
+        return Q(**{'{}__gt'.format(time_field): updated}) | Q(**{time_field: updated, '{}__gt'.format(key_field): key})
+    return Q(**{'{}__gt'.format(time_field): updated})
+
+def model_events(model, since, position, limit):
+    source = model._meta.model_name
+    queryset = model.objects.filter(updated__gte=since)
+    if position:
+        queryset = queryset.filter(after('updated', 'id', source, position))
+    rows = queryset.order_by('updated', 'id').values_list('id', 'created', 'updated')[:limit]
+    return [Event(updated, source, pk, source, pk, 'create' if created >= since else 'update')
+            for pk, created, updated in rows]
+
+def resolved_policy_events(since, position, limit):
+    source = 'resolvedpolicy'
+    queryset = models.ResolvedPolicy.objects.filter(updated__gte=since)
+    if position:
+        queryset = queryset.filter(after('updated', 'node', source, position))
+    rows = queryset.order_by('updated', 'node').values_list('node', 'updated')[:limit]
+    return [Event(updated, source, node_id, 'node', node_id, 'update') for node_id, updated in rows]
+
+def tombstone_events(since, position, limit):
+    source = 'tombstone'
+    queryset = models.Tombstone.objects.filter(deleted__gte=since)
+    if position:
+        queryset = queryset.filter(after('deleted', 'id', source, position))
+    rows = queryset.order_by('deleted', 'id').values_list('id', 'model', 'object_id', 'deleted')[:limit]
+    return [Event(deleted, source, pk, model, object_id, 'delete') for pk, model, object_id, deleted in rows]
+
+def changes(since, position=None, limit=100):
+    '''
+    :param since: datetime; only changes at or after it are returned
+    :param position: (updated, source, key) of the last event of the previous page, if any
+    :param limit: maximum number of events
+    :return: a list of Event tuples in feed order, and whether more events are available
+    '''
+    streams = [model_events(m, since, position, limit + 1) for m in TRACKED_MODELS]
+    streams.append(resolved_policy_events(since, position, limit + 1))
+    streams.append(tombstone_events(since, position, limit + 1))
+    events = []
+    for event in heapq.merge(*streams):
+        events.append(event)
+        if len(events) > limit:
+            break
+    return events[:limit], len(events) > limit
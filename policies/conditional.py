@@ -0,0 +1,46 @@
+'''
+Conditional GET support (ETag / Last-Modified) for read-only API views.
+
+Validators are derived from the global ChangeCounter, which signal handlers increment whenever a node,
+policy or any other object of this app is saved or deleted, so checking whether a client's copy is still
+current takes a single query, whatever the view.
+'''
+import hashlib
+from calendar import timegm
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from . import models
+
+class ConditionalGetMixin(object):
+    '''
+    Answers GET and HEAD requests whose If-None-Match or If-Modified-Since headers match the current
+    validators with 304 Not Modified, without querying or serializing the requested objects.
+    Must precede the DRF (or Django) generic view in the bases of a view.
+    '''
+
+    def get_etag_variant(self, request):
+        '''
+        What representations of a URL differ by, besides data: the media type of API responses
+        '''
+        return request.accepted_media_type
+
+    def get_etag(self, request, counter):
+        '''
+        Weak ETag of the response: representations differ by URL (filters, pagination) and variant
+        '''
+        key = '{}|{}|{}'.format(counter.value, request.get_full_path(), self.get_etag_variant(request))
+        return 'W/"{}"'.format(hashlib.md5(key.encode('utf-8')).hexdigest())
+
+    def get(self, request, *args, **kwargs):
+        counter = models.ChangeCounter.current()
+        etag = self.get_etag(request, counter)
+        last_modified = timegm(counter.updated.utctimetuple())
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = super(ConditionalGetMixin, self).get(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+        return response
@@ -0,0 +1,101 @@
+'''
+Curatorial reports: sets of nodes with data-quality problems, listed by the curatorial views.
+
+Finding these nodes takes self-joins and aggregations over the node and policy tables, too slow to run on every
+page load, so reports are computed in the background by the refresh_curatorial_reports command (e.g. run by
+cron) and stored in CuratorialReportEntry, one row per node with its position in the report. Views page
+through the (report, rank) index instead.
+
+Each report is a function returning the ids of the nodes of the report, in order; ids are selected with
+values_list so that no model object is instantiated.
+'''
+from collections import OrderedDict
+
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from . import models
+
+def grandchildren():
+    '''
+    Nodes whose parent has a parent
+    '''
+    return models.Node.objects.filter(ancestor_links__relation=models.NodeAncestor.PARENT, ancestor_links__depth=2)\
+        .order_by('name').values_list('id', flat=True)
+
+def journal_children():
+    '''
+    Nodes whose parent is not a publisher
+    '''
+    return models.Node.objects.filter(parent__isnull=False).exclude(parent__type='PUBLISHER')\
+        .order_by('name').values_list('id', flat=True)
+
+def synonym_children():
+    '''
+    Nodes whose parent is not a preferred name
+    '''
+    return models.Node.objects.filter(parent__isnull=False).exclude(parent__name_status='PRIMARY')\
+        .order_by('name').values_list('id', flat=True)
+
+def synonyms_of_synonyms():
+    '''
+    Nodes that are synonyms of other synonyms
+    '''
+    return models.Node.objects.filter(ancestor_links__relation=models.NodeAncestor.SYNONYM, ancestor_links__depth=2)\
+        .order_by('name').values_list('id', flat=True)
+
+def problematic_policies():
+    '''
+    Nodes with green policies marked as problematic, by descending number of children
+    '''
+    node_ids = set(models.GreenPolicy.objects.filter(problematic=True).values_list('node_id', flat=True))
+    children = dict(models.Node.objects.filter(parent_id__in=node_ids).values_list('parent_id')
+                    .annotate(n=Count('id')).order_by())
+    names = dict(models.Node.objects.filter(id__in=node_ids).values_list('id', 'name'))
+    return sorted(node_ids, key=lambda i: (-children.get(i, 0), names[i]))
+
+def synonyms_with_policies():
+    '''
+    Synonyms with OA stata, gold or green policies, which should be attached to preferred names
+    '''
+    has_policies = Q()
+    for model in [models.OaStatus, models.GoldPolicy, models.GreenPolicy]:
+        has_policies |= Q(id__in=model.objects.values('node_id'))
+    return models.Node.objects.filter(synonym_of__isnull=False).filter(has_policies)\
+        .order_by('name').values_list('id', flat=True)
+
+REPORTS = OrderedDict([
+    ('grandchildren', grandchildren),
+    ('journal_children', journal_children),
+    ('synonym_children', synonym_children),
+    ('synonyms_of_synonyms', synonyms_of_synonyms),
+    ('problematic_policies', problematic_policies),
+    ('synonyms_with_policies', synonyms_with_policies),
+])
+
+def refresh_report(name, batch_size=1000):
+    '''
+    Recomputes report name, replacing its entries in a single transaction
+    :return: the CuratorialReport
+    '''
+    started = timezone.now()
+    with transaction.atomic():
+        report = models.CuratorialReport.objects.select_for_update().get_or_create(name=name)[0]
+        report.entries.all().delete()  # a single DELETE, as entries have no dependent objects or signals
+        entries = [models.CuratorialReportEntry(report=report, node_id=node_id, rank=rank)
+                   for rank, node_id in enumerate(REPORTS[name]())]
+        for i in range(0, len(entries), batch_size):
+            models.CuratorialReportEntry.objects.bulk_create(entries[i:i + batch_size])
+        report.count = len(entries)
+        report.started = started
+        report.completed = timezone.now()
+        report.save()
+    return report
+
+def report_nodes(name):
+    '''
+    :return: queryset of the nodes of report name, in order (empty until the report is computed)
+    '''
+    return models.Node.objects.filter(curatorial_report_entries__report__name=name)\
+        .order_by('curatorial_report_entries__rank')
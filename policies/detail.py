@@ -0,0 +1,81 @@
+'''
+Context of the node detail pages (detail and NodeAllDetail views).
+
+For each type of policy, a node displays its own policies or, if it has none, those of its parent. Policies of
+both nodes are fetched together by a single query per type, along with the objects displayed with them
+(select_related and prefetch_related), and then split between the two nodes in Python.
+'''
+from collections import namedtuple
+
+from django.db.models import Prefetch
+
+from . import archive
+from . import models
+
+PolicyList = namedtuple('PolicyList', ['name', 'model', 'current', 'select_related', 'prefetch_related'])
+
+# Name of each list in the template context (<name>_list and <name>_prov), model, field marking the current
+# rows (superseded rows are only shown on the page of all policies) and related objects shown by the template
+POLICY_LISTS = [
+    PolicyList('oastatus', models.OaStatus, ('superseded', False), ['source'], ['oa_status_notes']),
+    PolicyList('goldpolicy', models.GoldPolicy, ('superseded', False), ['source', 'default_licence'],
+               ['licence_options', 'gold_policy_notes']),
+    PolicyList('greenpolicy', models.GreenPolicy, ('superseded', False), ['source', 'version_green_licence'],
+               ['version', 'outlet', 'green_policy_notes']),
+    PolicyList('epmc', models.Epmc, ('superseded', False), ['source'], []),
+    PolicyList('deal', models.Deal, ('superseded', False), ['source'], []),
+    PolicyList('contact', models.Contact, ('active', True), [], ['responsibilities']),
+]
+
+def detail_queryset():
+    '''
+    :return: queryset of nodes with the related objects shown on their detail page
+    '''
+    return models.Node.objects.select_related('parent', 'synonym_of', 'source', 'resolved_policy')\
+        .prefetch_related('note_set', 'synonyms',
+                          Prefetch('children', queryset=models.Node.objects.select_related('synonym_of')))
+
+def policy_rows(policy_list, nodes):
+    queryset = policy_list.model.objects.filter(node_id__in=[n.id for n in nodes])
+    if policy_list.select_related:
+        queryset = queryset.select_related(*policy_list.select_related)
+    return queryset.prefetch_related(*policy_list.prefetch_related)
+
+def resolved_value(node, field_name):
+    '''
+    Value of a computed field of node, read from its ResolvedPolicy row if it has one
+    '''
+    resolved = getattr(node, 'resolved_policy', None)
+    if resolved is not None:
+        return resolved.get_field_value(field_name)
+    return getattr(node, field_name)
+
+def inherited_from(parent):
+    return '[inherited from %s: %s]' % (parent.get_type_display().lower(), parent)
+
+def policy_context(node, include_superseded=False):
+    '''
+    :param node: node fetched with detail_queryset
+    :param include_superseded: also list superseded (including archived) policies and inactive contacts
+    :return: lists of policies displayed on the detail page of node, with their provenance, and Apollo embargoes
+    '''
+    context = dict((f, resolved_value(node, f)) for f in ['apollo_am_embargo_months', 'apollo_vor_embargo_months'])
+    nodes = dict((n.id, n) for n in [node, node.parent] if n is not None)
+    for policy_list in POLICY_LISTS:
+        rows = policy_rows(policy_list, nodes.values())
+        if include_superseded:
+            rows = archive.policy_history(rows, list(nodes), policy_list.select_related)
+        rows = list(rows)
+        for row in rows:
+            row.node = nodes[row.node_id]  # avoids a query per row, for templates comparing it to the node
+        policies = [r for r in rows if r.node_id == node.id]
+        provenance = ''
+        if not policies and node.parent is not None:
+            policies = [r for r in rows if r.node_id == node.parent_id]
+            provenance = inherited_from(node.parent)
+        if not include_superseded:
+            field, value = policy_list.current
+            policies = [p for p in policies if getattr(p, field) == value]
+        context['{}_list'.format(policy_list.name)] = policies
+        context['{}_prov'.format(policy_list.name)] = provenance
+    return context
@@ -0,0 +1,85 @@
+'''
+Streaming export of all journals and conferences with the fields of the Cambridge API, as NDJSON or CSV.
+Used by CambridgeExportView and the export_cambridge management command.
+
+Nodes are read through a server-side cursor (QuerySet.iterator) and serialized in batches, so that
+memory use does not grow with the size of the catalogue; policies of nodes without a ResolvedPolicy row
+are resolved once per batch (see CambridgeListSerializer).
+'''
+import csv
+import json
+from itertools import islice
+
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework.negotiation import BaseContentNegotiation
+
+from . import models
+from .serializers import CambridgeSerializer
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+class ExportContentNegotiation(BaseContentNegotiation):
+    '''
+    Ignores the Accept header and format parameter of export requests, whose format is set by the URL
+    '''
+    def select_parser(self, request, parsers):
+        return parsers[0]
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return renderers[0], renderers[0].media_type
+
+def export_queryset():
+    return models.Node.objects.filter(type__in=['JOURNAL', 'CONFERENCE'])\
+        .select_related('parent', 'synonym_of__parent', 'resolved_policy').order_by('id')
+
+def export_records(queryset=None, batch_size=500, context=None):
+    '''
+    :param context: serializer context, as passed by API views (e.g. the request)
+    :return: iterator over the Cambridge API representation of each node in queryset
+    '''
+    nodes = (export_queryset() if queryset is None else queryset).iterator()
+    while True:
+        batch = list(islice(nodes, batch_size))
+        if not batch:
+            return
+        for record in CambridgeSerializer(batch, many=True, context=context or {}).data:
+            yield record
+
+def ndjson_lines(records):
+    for record in records:
+        yield json.dumps(record, cls=DjangoJSONEncoder) + '\n'
+
+class Echo(object):
+    '''
+    File-like object returning what is written to it, so that csv.writer can produce lines one at a time
+    '''
+    def write(self, value):
+        return value
+
+def csv_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, (list, tuple)):
+        return ','.join(value)
+    return value
+
+def csv_lines(records):
+    fields = CambridgeSerializer.Meta.fields
+    writer = csv.writer(Echo())
+    yield writer.writerow(fields)
+    for record in records:
+        # Fields skipped by the serializer (e.g. zd_publisher of nodes without a parent) are left empty
+        yield writer.writerow([csv_value(record.get(f)) for f in fields])
+
+def export_lines(export_format, queryset=None, batch_size=500, context=None):
+    '''
+    :param export_format: a key of EXPORT_FORMATS
+    :return: iterator over the lines of the export
+    '''
+    records = export_records(queryset, batch_size, context)
+    if export_format == 'csv':
+        return csv_lines(records)
+    return ndjson_lines(records)
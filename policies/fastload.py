@@ -0,0 +1,215 @@
+'''
+Fast loading of fixtures made by dumpdata (e.g. the RoMEO import or a full database snapshot), used by the
+fastload command.
+
+loaddata saves objects one at a time and runs signal handlers for each of them. Here the snapshot, a JSON array
+or NDJSON (one object per line), optionally gzipped, is streamed through the Python deserializer of Django and
+inserted in batches: by multi-row INSERT statements, or by COPY on PostgreSQL. Constraints are checked once at
+the end, as loaddata does, so objects may reference objects further down the snapshot. Rows derived from other
+tables are not loaded but rebuilt once all objects are in: fields normalised by save methods, NodeIdentifier,
+NodeAncestor, ResolvedPolicy rows, curatorial reports and the search index. Finally the change counter is
+incremented and the API cache invalidated.
+
+Objects must have a primary key and must not exist in the database yet (see the reset_content command).
+'''
+import gzip
+import io
+import json
+from collections import OrderedDict
+
+from django.core.management.color import no_style
+from django.core.serializers.python import Deserializer
+from django.db import connection, transaction
+
+from . import cache
+from . import models
+from .curation import REPORTS, refresh_report
+from .purge import raw_delete
+from .resolvers import refresh_resolved_policies
+from .search import get_search_backend
+
+# Models rebuilt from other tables, or bookkeeping of the database they were dumped from
+SKIPPED_MODELS = [models.NodeIdentifier, models.NodeAncestor, models.ResolvedPolicy, models.CuratorialReport,
+                  models.CuratorialReportEntry, models.ChangeCounter, models.Tombstone]
+
+def open_snapshot(path):
+    if path.endswith('.gz'):
+        return io.TextIOWrapper(gzip.open(path), encoding='utf-8')
+    return open(path, encoding='utf-8')
+
+def read_json(stream, chunk_size=1 << 16):
+    '''
+    :return: iterator over the objects of a JSON array, read chunk_size characters at a time
+    '''
+    decoder = json.JSONDecoder()
+    buffer = stream.read(chunk_size).lstrip()
+    if not buffer.startswith('['):
+        raise ValueError('Snapshot is not a JSON array')
+    buffer = buffer[1:]
+    while True:
+        buffer = buffer.lstrip().lstrip(',').lstrip()
+        if buffer.startswith(']'):
+            return
+        try:
+            obj, end = decoder.raw_decode(buffer)
+        except ValueError:  # incomplete object
+            chunk = stream.read(chunk_size)
+            if not chunk:
+                raise
+            buffer += chunk
+            continue
+        yield obj
+        buffer = buffer[end:]
+
+def read_ndjson(stream):
+    for line in stream:
+        if line.strip():
+            yield json.loads(line)
+
+READERS = OrderedDict([
+    ('json', read_json),
+    ('ndjson', read_ndjson),
+])
+
+def prepare(obj):
+    '''
+    Sets the fields that save methods would have set
+    '''
+    if isinstance(obj, models.Node):
+        obj.normalized_name = models.normalize_name(obj.name)
+    elif isinstance(obj, models.Source):
+        obj.normalized_description = models.normalize_name(obj.description)[:300]
+
+def copy_value(value):
+    if value is None:
+        return ''
+    return '"{}"'.format(str(value).replace('"', '""'))
+
+def insert_rows(model, objs):
+    '''
+    Inserts objs in batches accepted by the database (e.g. within the parameter limit of SQLite). Unlike
+    bulk_create, values are inserted as they are, without updating auto_now fields (as loaddata does).
+    '''
+    fields = model._meta.concrete_fields
+    batch_size = max(connection.ops.bulk_batch_size(fields, objs), 1)
+    for i in range(0, len(objs), batch_size):
+        model._base_manager._insert(objs[i:i + batch_size], fields=fields, using=connection.alias, raw=True)
+
+def copy_rows(model, objs):
+    '''
+    Inserts objs with COPY (PostgreSQL only), values being converted as by insert_rows
+    '''
+    fields = model._meta.concrete_fields
+    lines = io.StringIO()
+    for obj in objs:
+        values = [f.get_db_prep_save(getattr(obj, f.attname), connection) for f in fields]
+        lines.write(','.join(copy_value(v) for v in values) + '\n')
+    lines.seek(0)
+    qn = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.copy_expert('COPY {} ({}) FROM STDIN WITH (FORMAT csv)'.format(
+            qn(model._meta.db_table), ', '.join(qn(f.column) for f in fields)), lines)
+
+class Loader(object):
+    '''
+    Inserts deserialized objects in batches of batch_size per model, followed by their many-to-many rows
+    '''
+    def __init__(self, batch_size=1000, use_copy=True):
+        self.batch_size = batch_size
+        self.use_copy = use_copy and (connection.vendor == 'postgresql')
+        self.pending = OrderedDict()  # objects to insert, by model
+        self.counts = OrderedDict()  # objects inserted, by model
+        self.skipped = 0
+
+    def add(self, deserialized):
+        obj = deserialized.object
+        model = type(obj)
+        if model in SKIPPED_MODELS:
+            self.skipped += 1
+            return
+        if obj.pk is None:
+            raise ValueError('{} object without primary key'.format(model._meta.label))
+        prepare(obj)
+        pending = self.pending.setdefault(model, [])
+        pending.append(obj)
+        for field_name, pks in (deserialized.m2m_data or {}).items():
+            field = model._meta.get_field(field_name)
+            through = field.remote_field.through
+            self.pending.setdefault(through, []).extend(through(**{
+                '{}_id'.format(field.m2m_field_name()): obj.pk,
+                '{}_id'.format(field.m2m_reverse_field_name()): pk}) for pk in pks)
+        if len(pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        for model, objs in self.pending.items():
+            if not objs:
+                continue
+            if self.use_copy:
+                copy_rows(model, objs)
+            else:
+                insert_rows(model, objs)
+            self.counts[model] = self.counts.get(model, 0) + len(objs)
+        self.pending = OrderedDict()
+
+    def reset_sequences(self):
+        '''
+        Moves sequences past the primary keys loaded, as loaddata does
+        '''
+        statements = connection.ops.sequence_reset_sql(no_style(), list(self.counts))
+        if statements:
+            with connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
+
+def rebuild_identifiers(batch_size=1000):
+    '''
+    Recreates all NodeIdentifier rows (see Node.sync_identifiers)
+    '''
+    fields = [f for t, f in models.NodeIdentifier.NODE_FIELDS]
+    raw_delete(models.NodeIdentifier.objects.all())
+    identifiers = []
+    for row in models.Node.objects.values_list('id', *fields).iterator():
+        for (identifier_type, field), value in zip(models.NodeIdentifier.NODE_FIELDS, row[1:]):
+            value = models.normalize_issn(value)
+            if value:
+                identifiers.append(models.NodeIdentifier(node_id=row[0], type=identifier_type, value=value))
+        if len(identifiers) >= batch_size:
+            models.NodeIdentifier.objects.bulk_create(identifiers)
+            identifiers = []
+    models.NodeIdentifier.objects.bulk_create(identifiers)
+
+def rebuild_derived(log=lambda message: None):
+    '''
+    Rebuilds the rows derived from nodes and policies, after they were loaded without save methods and signals
+    '''
+    rebuild_identifiers()
+    log('Rebuilt node identifiers')
+    models.NodeAncestor.objects.rebuild()
+    log('Rebuilt node hierarchy')
+    refresh_resolved_policies()
+    log('Rebuilt resolved policies')
+    for name in REPORTS:
+        refresh_report(name)
+    log('Rebuilt curatorial reports')
+    get_search_backend().rebuild()
+    log('Rebuilt search index')
+
+def fastload(stream, snapshot_format='json', batch_size=1000, use_copy=True, log=lambda message: None):
+    '''
+    Loads a snapshot in a transaction
+    :return: the Loader, with the number of objects loaded by model
+    '''
+    loader = Loader(batch_size, use_copy)
+    with transaction.atomic():
+        with connection.constraint_checks_disabled():
+            for deserialized in Deserializer(READERS[snapshot_format](stream), ignorenonexistent=True):
+                loader.add(deserialized)
+            loader.flush()
+        connection.check_constraints(table_names=[m._meta.db_table for m in loader.counts])
+        loader.reset_sequences()
+        log('Loaded {} objects'.format(sum(loader.counts.values())))
+        rebuild_derived(log)
+        models.ChangeCounter.increment()
+    cache.invalidate('all')
+    return loader
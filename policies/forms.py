@@ -43,7 +43,7 @@ class PublisherNodeForm(NodeForm):
     name = forms.CharField(label='Publisher name')
 
     class Meta(NodeForm.Meta):
-        exclude = ['issn', 'eissn', 'type', 'parent', 'epmc_url']
+        exclude = ['issn', 'eissn', 'issnl', 'type', 'parent', 'epmc_url']
 
 class JournalNodeForm(NodeForm):
     '''
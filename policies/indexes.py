@@ -0,0 +1,43 @@
+'''
+Indexes of policy tables matching the access path of policy cascades (see policies.cascades and
+policies.resolvers): policies of a few nodes, restricted to the eligible ones (not superseded and, where
+applicable, not problematic), vetted policies first.
+
+On PostgreSQL these are partial indexes on (node_id, vetted DESC), which only contain eligible rows, so that
+superseded policies accumulating over re-imports do not make them grow. Other databases may not use partial
+indexes (SQLite only does when the query repeats the predicate as a literal, whereas Django passes booleans as
+parameters), so they get composite indexes on (node_id, <flags>, vetted) instead. Since the definition depends
+on the database, the indexes are not declared by Meta.indexes (Index(condition=...) would create the partial
+index everywhere) but created by SQL.
+
+Created by migration 0051, which keeps its own copy of these definitions, and recreated by the
+benchmark_policy_indexes command.
+'''
+from . import models
+
+# Model and the boolean fields that must be false for its policies to be eligible
+ELIGIBILITY_FLAGS = [
+    (models.OaStatus, ['superseded', 'problematic']),
+    (models.GoldPolicy, ['superseded', 'problematic']),
+    (models.GreenPolicy, ['superseded', 'problematic']),
+    (models.Deal, ['superseded']),
+    (models.Epmc, ['superseded']),
+]
+
+def index_name(model):
+    return '{}_eligible_idx'.format(model._meta.db_table)
+
+def create_index_sql(connection, model, flags):
+    qn = connection.ops.quote_name
+    table = qn(model._meta.db_table)
+    if connection.vendor == 'postgresql':
+        return 'CREATE INDEX {} ON {} ({}, {} DESC) WHERE {}'.format(
+            qn(index_name(model)), table, qn('node_id'), qn('vetted'),
+            ' AND '.join('{} = false'.format(qn(f)) for f in flags))
+    columns = ['node_id'] + flags + ['vetted']
+    return 'CREATE INDEX {} ON {} ({})'.format(qn(index_name(model)), table, ', '.join(qn(c) for c in columns))
+
+def drop_index_sql(connection, model):
+    qn = connection.ops.quote_name
+    return connection.SchemaEditorClass.sql_delete_index % {
+        'name': qn(index_name(model)), 'table': qn(model._meta.db_table)}
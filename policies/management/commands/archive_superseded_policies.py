@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+from policies.archive import ARCHIVED_MODELS, archive_policies, superseded_count
+
+class Command(BaseCommand):
+    help = 'Moves superseded policies out of the policy tables into the archive (see policies.archive)'
+
+    def add_arguments(self, parser):
+        names = [m._meta.model_name for m in ARCHIVED_MODELS]
+        parser.add_argument('models', nargs='*', help='Policy models to archive (default: all): {}'
+                            .format(', '.join(names)))
+        parser.add_argument('--batch-size', type=int, default=500, help='Policies archived per transaction')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the policies to archive')
+
+    def handle(self, *args, **options):
+        models = dict((m._meta.model_name, m) for m in ARCHIVED_MODELS)
+        unknown = set(options['models']) - set(models)
+        if unknown:
+            raise CommandError('Unknown models: {}'.format(', '.join(sorted(unknown))))
+        for name in options['models'] or models:
+            if options['dry_run']:
+                self.stdout.write('{}: {} superseded policies'.format(name, superseded_count(models[name])))
+            else:
+                count = archive_policies(models[name], options['batch_size'])
+                self.stdout.write('{}: archived {} policies'.format(name, count))
@@ -0,0 +1,106 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from policies import indexes
+from policies.models import POLICY_CASCADES, GoldPolicy, Node, OaStatus, Source
+
+PREFIX = 'orpheus-benchmark'
+
+class Command(BaseCommand):
+    help = 'Compares the query plans and timings of policy cascades without and with the indexes of ' \
+           'policies.indexes, on a synthetic dataset created in a transaction that is rolled back at the end'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--nodes', type=int, default=100000, help='Number of synthetic nodes')
+        parser.add_argument('--policies', type=int, default=1000000,
+                            help='Number of synthetic policies (half OA stata, half gold policies)')
+        parser.add_argument('--superseded', type=float, default=0.8,
+                            help='Fraction of superseded policies (e.g. left by re-imports)')
+        parser.add_argument('--samples', type=int, default=50, help='Number of nodes resolved per measure')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        random.seed(options['seed'])
+        with transaction.atomic():
+            node_ids = self.populate(options)
+            sample = random.sample(node_ids, min(options['samples'], len(node_ids)))
+            nodes = list(Node.objects.filter(id__in=sample))
+            self.run_sql([indexes.drop_index_sql(connection, m) for m, flags in indexes.ELIGIBILITY_FLAGS])
+            self.measure('Without eligibility indexes', nodes)
+            self.run_sql([indexes.create_index_sql(connection, m, flags) for m, flags in indexes.ELIGIBILITY_FLAGS])
+            self.measure('With eligibility indexes', nodes)
+            transaction.set_rollback(True)
+
+    def run_sql(self, statements):
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+            if connection.vendor in ('postgresql', 'sqlite'):
+                cursor.execute('ANALYZE')
+
+    def populate(self, options):
+        '''
+        Creates publishers, journals (with synonyms) and policies; signals are bypassed by bulk_create
+        :return: ids of the journals
+        '''
+        source = Source(description='{} source'.format(PREFIX), type='DATASET')
+        Source.objects.bulk_create([source])
+        source = Source.objects.filter(description=source.description).latest('id')
+
+        def create_nodes(kind, n, fields):
+            Node.objects.bulk_create([Node(name='{} {} {}'.format(PREFIX, kind, i), **fields(i)) for i in range(n)])
+            return list(Node.objects.filter(name__startswith='{} {} '.format(PREFIX, kind))
+                        .values_list('id', flat=True))
+
+        n = options['nodes']
+        publishers = create_nodes('publisher', max(1, n // 50),
+                                  lambda i: {'type': 'PUBLISHER', 'name_status': 'PRIMARY'})
+        journals = create_nodes('journal', n - n // 10 - len(publishers),
+                                lambda i: {'type': 'JOURNAL', 'name_status': 'PRIMARY',
+                                           'parent_id': random.choice(publishers)})
+        create_nodes('synonym', n // 10, lambda i: {'type': 'JOURNAL', 'name_status': 'SYNONYM',
+                                                    'synonym_of_id': random.choice(journals)})
+        self.stdout.write('Created {} nodes'.format(n))
+
+        node_ids = publishers + journals
+        for model, extra in [(OaStatus, {'oa_status': 'HYBRID'}), (GoldPolicy, {})]:
+            remaining = options['policies'] // 2
+            while remaining > 0:
+                batch = min(remaining, 10000)
+                model.objects.bulk_create([model(
+                    node_id=random.choice(node_ids), source=source, vetted=random.random() < 0.5,
+                    superseded=random.random() < options['superseded'], problematic=random.random() < 0.02,
+                    **extra) for i in range(batch)])
+                remaining -= batch
+        self.stdout.write('Created {} policies'.format(options['policies']))
+        return journals
+
+    def explain(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        if connection.vendor == 'postgresql':
+            sql = 'EXPLAIN ANALYZE ' + sql
+        elif connection.vendor == 'sqlite':
+            sql = 'EXPLAIN QUERY PLAN ' + sql
+        else:
+            sql = 'EXPLAIN ' + sql
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return '\n'.join('    ' + ' '.join(str(c) for c in row) for row in cursor.fetchall())
+
+    def measure(self, title, nodes):
+        self.stdout.write('\n== {}'.format(title))
+        cascade = POLICY_CASCADES['most_reliable_oa_status']
+        queries = [
+            ('cascade of one node', lambda: cascade.candidates(nodes[0])[:1]),
+            ('policies of {} nodes (PolicyResolver)'.format(len(nodes)),
+             lambda: cascade.policies().filter(node__in=[n.id for n in nodes])),
+        ]
+        for name, queryset in queries:
+            self.stdout.write('{}:\n{}'.format(name, self.explain(queryset())))
+        start = time.time()
+        for node in nodes:
+            cascade.resolve(node)
+        self.stdout.write('Resolved {} nodes one by one in {:.1f} ms per node'.format(
+            len(nodes), (time.time() - start) * 1000 / len(nodes)))
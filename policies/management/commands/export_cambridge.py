@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from policies.export import EXPORT_FORMATS, export_lines
+
+class Command(BaseCommand):
+    help = 'Exports all journals and conferences with the fields of the Cambridge API, as NDJSON or CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=sorted(EXPORT_FORMATS), default='ndjson', help='Output format')
+        parser.add_argument('--output', help='Output file (default: standard output)')
+        parser.add_argument('--batch-size', type=int, default=500, help='Number of nodes serialized at once')
+
+    def handle(self, *args, **options):
+        lines = export_lines(options['format'], batch_size=options['batch_size'])
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8', newline='') as f:
+                f.writelines(lines)
+        else:
+            for line in lines:
+                self.stdout.write(line, ending='')
@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from policies.fastload import READERS, fastload, open_snapshot
+
+class Command(BaseCommand):
+    help = 'Loads a snapshot made by dumpdata (JSON or NDJSON, optionally gzipped) much faster than loaddata, ' \
+           'into tables that do not contain its objects yet (see policies.fastload)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('snapshot', help='Path of the snapshot')
+        parser.add_argument('--format', choices=list(READERS), dest='snapshot_format',
+                            help='Format of the snapshot (default: ndjson for .ndjson and .jsonl files, else json)')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Objects inserted at once per model')
+        parser.add_argument('--no-copy', action='store_false', dest='use_copy',
+                            help='Use INSERT statements rather than COPY on PostgreSQL')
+
+    def handle(self, *args, **options):
+        path = options['snapshot']
+        snapshot_format = options['snapshot_format']
+        if snapshot_format is None:
+            name = path[:-3] if path.endswith('.gz') else path
+            snapshot_format = 'ndjson' if name.endswith(('.ndjson', '.jsonl')) else 'json'
+        start = time.time()
+        try:
+            with open_snapshot(path) as stream:
+                loader = fastload(stream, snapshot_format, options['batch_size'], options['use_copy'],
+                                  log=self.stdout.write)
+        except (IOError, ValueError) as e:
+            raise CommandError('Could not load {}: {}'.format(path, e))
+        for model, count in loader.counts.items():
+            self.stdout.write('    {}: {}'.format(model._meta.label, count))
+        if loader.skipped:
+            self.stdout.write('Skipped {} derived objects, rebuilt instead'.format(loader.skipped))
+        self.stdout.write('Loaded {} in {:.1f}s'.format(path, time.time() - start))
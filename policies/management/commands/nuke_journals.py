@@ -1,7 +1,8 @@
+from django.core.management import call_command
 from django.core.management.base import BaseCommand
-from policies.models import Node, GreenPolicy, GoldPolicy, OaStatus
 
 class Command(BaseCommand):
+    help = 'Deprecated alias of purge_content --node-type JOURNAL'
+
     def handle(self, *args, **options):
-        if input('Are you sure you want to delete all Orpheus journal nodes? (y/n)') in ['y', 'Y']:
-            Node.objects.all().filter(type__exact='JOURNAL').delete()
\ No newline at end of file
+        call_command('purge_content', node_types=['JOURNAL'], stdout=self.stdout)
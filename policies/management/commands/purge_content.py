@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+from policies.models import Node
+from policies.purge import PurgeScope, purge
+
+class Command(BaseCommand):
+    help = 'Deletes nodes and policies (all of them, or those of some sources or node types) with set-based SQL, ' \
+           'e.g. before re-running a connector (see policies.purge)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--source', type=int, action='append', default=[], dest='sources',
+                            help='Id of a source whose nodes and policies are deleted (may be repeated)')
+        parser.add_argument('--node-type', action='append', default=[], dest='node_types',
+                            choices=[t for t, label in Node.NODE_TYPE_CHOICES],
+                            help='Type of the nodes deleted, with their descendants (may be repeated)')
+        parser.add_argument('--policies-only', action='store_true', help='Keep nodes, only delete policies')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the rows to delete')
+        parser.add_argument('--noinput', '--no-input', action='store_false', dest='interactive',
+                            help='Do not ask for confirmation')
+
+    def handle(self, *args, **options):
+        scope = PurgeScope(options['sources'], options['node_types'], options['policies_only'])
+        if options['dry_run']:
+            self.write_counts('Rows to delete', scope.count())
+            return
+        if options['interactive'] and input('Are you sure you want to delete these nodes and policies? (y/n) ') \
+                not in ['y', 'Y']:
+            raise CommandError('Purge cancelled')
+        self.write_counts('Deleted rows', purge(scope))
+
+    def write_counts(self, title, counts):
+        self.stdout.write('{}:'.format(title))
+        for model, count in counts:
+            self.stdout.write('    {}: {}'.format(model._meta.db_table, count))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from policies.models import NodeAncestor
+
+class Command(BaseCommand):
+    help = 'Rebuilds the closure table of the node hierarchy (see policies.models.NodeAncestor), e.g. after ' \
+           'nodes were loaded or updated without Node.save'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        count = NodeAncestor.objects.rebuild(options['batch_size'])
+        self.stdout.write('Rebuilt node hierarchy ({} rows)'.format(count))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from policies.models import ResolvedPolicy
+from policies.resolvers import refresh_resolved_policies
+
+class Command(BaseCommand):
+    help = 'Rebuilds the table of precomputed Cambridge API fields (ResolvedPolicy) from scratch'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Number of nodes resolved at once')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            ResolvedPolicy.objects.all().delete()
+            n = refresh_resolved_policies(batch_size=options['batch_size'])
+        self.stdout.write('Rebuilt {} resolved policy rows'.format(n))
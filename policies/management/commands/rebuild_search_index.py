@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from policies.search import get_search_backend, postgres_has_trigrams
+
+class Command(BaseCommand):
+    help = 'Rebuilds the index used to search nodes by name (see policies.search)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--install', action='store_true',
+                            help='Create the index first (e.g. after switching database or search backend)')
+
+    def handle(self, *args, **options):
+        backend = get_search_backend(install=options['install'])
+        with transaction.atomic():
+            if options['install']:
+                backend.install()
+                postgres_has_trigrams.cache_clear()
+            else:
+                backend.rebuild()
+        self.stdout.write('Rebuilt search index ({})'.format(type(backend).__name__))
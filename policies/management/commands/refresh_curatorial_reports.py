@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand, CommandError
+from policies.curation import REPORTS, refresh_report
+
+class Command(BaseCommand):
+    help = 'Recomputes the curatorial reports listed by curatorial views (see policies.curation)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('reports', nargs='*', help='Names of the reports to refresh (default: all): {}'
+                            .format(', '.join(REPORTS)))
+
+    def handle(self, *args, **options):
+        unknown = set(options['reports']) - set(REPORTS)
+        if unknown:
+            raise CommandError('Unknown reports: {}'.format(', '.join(sorted(unknown))))
+        for name in options['reports'] or REPORTS:
+            report = refresh_report(name)
+            self.stdout.write('{}: {} nodes in {:.1f}s'.format(
+                name, report.count, (report.completed - report.started).total_seconds()))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+from policies.purge import reset, reset_count
+
+class Command(BaseCommand):
+    help = 'Deletes all nodes, policies, notes and contacts, keeping sources and tags (see policies.purge). ' \
+           'Clients of the changes feed must download everything again afterwards.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only count the rows to delete')
+        parser.add_argument('--noinput', '--no-input', action='store_false', dest='interactive',
+                            help='Do not ask for confirmation')
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            self.write_counts('Rows to delete', reset_count())
+            return
+        if options['interactive'] and input('Are you sure you want to delete all Orpheus content tables? (y/n) ') \
+                not in ['y', 'Y']:
+            raise CommandError('Reset cancelled')
+        self.write_counts('Deleted rows', reset())
+
+    def write_counts(self, title, counts):
+        self.stdout.write('{}:'.format(title))
+        for model, count in counts:
+            self.stdout.write('    {}: {}'.format(model._meta.db_table, count))
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 02:15
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('policies', '0040_auto_20190312_2315'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResolvedPolicy',
+            fields=[
+                ('node', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='resolved_policy', serialize=False, to='policies.Node')),
+                ('apollo_am_embargo_months', models.CharField(blank=True, max_length=20, null=True)),
+                ('apollo_vor_embargo_months', models.CharField(blank=True, max_length=20, null=True)),
+                ('zd_publisher', models.CharField(blank=True, max_length=300, null=True)),
+                ('zd_green_allowed_version', models.CharField(blank=True, max_length=50, null=True)),
+                ('zd_embargo_duration', models.CharField(blank=True, max_length=20, null=True)),
+                ('zd_green_licence', models.CharField(blank=True, max_length=50, null=True)),
+                ('zd_journal_oa_status', models.CharField(blank=True, max_length=50, null=True)),
+                ('zd_apc_range', models.CharField(blank=True, max_length=50, null=True)),
+                ('zd_gold_licence_options', models.TextField(blank=True, null=True)),
+                ('zd_commitment_guidance', models.CharField(blank=True, max_length=50, null=True)),
+                ('zd_deal', models.CharField(blank=True, max_length=50, null=True)),
+                ('zd_epmc_participation', models.CharField(blank=True, max_length=20, null=True)),
+                ('zd_epmc_embargo_months', models.IntegerField(blank=True, null=True)),
+                ('zd_epmc_open_licence', models.CharField(blank=True, max_length=20, null=True)),
+                ('zd_epmc_deposit_status', models.CharField(blank=True, max_length=20, null=True)),
+                ('oa_status_id', models.IntegerField(blank=True, null=True)),
+                ('oa_status_provenance', models.CharField(blank=True, max_length=30, null=True)),
+                ('gold_policy_id', models.IntegerField(blank=True, null=True)),
+                ('gold_policy_provenance', models.CharField(blank=True, max_length=30, null=True)),
+                ('green_preprint_id', models.IntegerField(blank=True, null=True)),
+                ('green_preprint_provenance', models.CharField(blank=True, max_length=30, null=True)),
+                ('green_am_id', models.IntegerField(blank=True, null=True)),
+                ('green_am_provenance', models.CharField(blank=True, max_length=30, null=True)),
+                ('green_vor_id', models.IntegerField(blank=True, null=True)),
+                ('green_vor_provenance', models.CharField(blank=True, max_length=30, null=True)),
+                ('deal_id', models.IntegerField(blank=True, null=True)),
+                ('deal_provenance', models.CharField(blank=True, max_length=30, null=True)),
+                ('epmc_id', models.IntegerField(blank=True, null=True)),
+                ('epmc_provenance', models.CharField(blank=True, max_length=30, null=True)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('updated', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
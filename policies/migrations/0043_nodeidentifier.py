@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 02:26
+from __future__ import unicode_literals
+
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+import re
+
+
+def populate_identifiers(apps, schema_editor):
+    '''
+    Creates NodeIdentifier rows for existing nodes (see policies.models.normalize_issn), skipping malformed ISSNs
+    '''
+    Node = apps.get_model('policies', 'Node')
+    NodeIdentifier = apps.get_model('policies', 'NodeIdentifier')
+    identifiers = []
+    for node_id, issn, eissn in Node.objects.values_list('id', 'issn', 'eissn').iterator():
+        for identifier_type, value in [('ISSN', issn), ('EISSN', eissn)]:
+            value = re.sub(r'[\s\-]', '', value or '').upper()
+            if len(value) == 8:  # malformed values do not fit in the column
+                identifiers.append(NodeIdentifier(node_id=node_id, type=identifier_type, value=value))
+        if len(identifiers) >= 1000:
+            NodeIdentifier.objects.bulk_create(identifiers)
+            identifiers = []
+    NodeIdentifier.objects.bulk_create(identifiers)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('policies', '0041_resolvedpolicy'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NodeIdentifier',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type', models.CharField(choices=[('ISSN', 'ISSN'), ('EISSN', 'e-ISSN'), ('ISSNL', 'ISSN-L')], max_length=10)),
+                ('value', models.CharField(db_index=True, max_length=8)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='node',
+            name='issnl',
+            field=models.CharField(blank=True, help_text='Linking ISSN. Please use the format: <em>0000-0000</em>.', max_length=10, null=True, validators=[django.core.validators.RegexValidator('[0-9]{4,4}-[0-9]{3,3}[0-9X]', 'Please enter a issn in the format 0000-0000')], verbose_name='ISSN-L'),
+        ),
+        migrations.AddField(
+            model_name='nodeidentifier',
+            name='node',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='identifiers', to='policies.Node'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='nodeidentifier',
+            unique_together=set([('node', 'type')]),
+        ),
+        migrations.RunPython(populate_identifiers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 02:27
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+from django.db.models import Case, Value, When
+import re
+import unicodedata
+
+
+def normalize_name(name):
+    '''
+    Copy of policies.models.normalize_name at the time of this migration
+    '''
+    name = unicodedata.normalize('NFKD', name or '')
+    name = ''.join(c for c in name if not unicodedata.combining(c))
+    name = ' '.join(name.lower().split())
+    return re.sub(r'( ?\([^()]*\))+$', '', name).strip()
+
+
+def populate_normalized_names(apps, schema_editor):
+    '''
+    Sets normalized_name of existing nodes, with one UPDATE per batch of nodes
+    '''
+    Node = apps.get_model('policies', 'Node')
+    rows = list(Node.objects.values_list('id', 'name'))
+    for i in range(0, len(rows), 300):
+        batch = rows[i:i + 300]
+        Node.objects.filter(id__in=[node_id for node_id, name in batch]).update(normalized_name=Case(
+            *[When(id=node_id, then=Value(normalize_name(name))) for node_id, name in batch],
+            output_field=models.CharField()))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('policies', '0043_nodeidentifier'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='node',
+            name='normalized_name',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=300),
+        ),
+        migrations.RunPython(populate_normalized_names, migrations.RunPython.noop),
+    ]
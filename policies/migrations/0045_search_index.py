@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 03:05
+from __future__ import unicode_literals
+
+import logging
+
+from django.db import migrations, transaction, DatabaseError
+
+logger = logging.getLogger(__name__)
+
+
+def install_search_index(apps, schema_editor):
+    '''
+    Creates the indexes of the search backend of the database (see policies.search, as of this migration).
+    Other backends (ORPHEUS_SEARCH_BACKEND setting) are installed by the rebuild_search_index command.
+    '''
+    connection = schema_editor.connection
+    if connection.vendor == 'postgresql':
+        try:
+            with transaction.atomic(using=connection.alias):
+                with connection.cursor() as cursor:
+                    cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        except DatabaseError as e:
+            logger.warning('Could not install the pg_trgm extension (%s). Run "CREATE EXTENSION pg_trgm" as a '
+                           'superuser, then "manage.py rebuild_search_index --install" to create the search '
+                           'index.', e)
+            return
+        with connection.cursor() as cursor:
+            cursor.execute('CREATE INDEX IF NOT EXISTS policies_node_normalized_name_trgm ON "policies_node" '
+                           'USING gin ("policies_node"."normalized_name" gin_trgm_ops)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS policies_node_normalized_name_tsv ON "policies_node" '
+                           'USING gin ((to_tsvector(\'simple\', "policies_node"."normalized_name")))')
+    elif connection.vendor == 'sqlite' and connection.Database.sqlite_version_info >= (3, 34, 0):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA compile_options')
+            if 'ENABLE_FTS5' not in [row[0] for row in cursor.fetchall()]:
+                return
+            cursor.execute("CREATE VIRTUAL TABLE IF NOT EXISTS policies_node_search "
+                           "USING fts5(normalized_name, tokenize='trigram')")
+            cursor.execute('DELETE FROM policies_node_search')
+            cursor.execute('INSERT INTO policies_node_search (rowid, normalized_name) '
+                           'SELECT id, normalized_name FROM "policies_node"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('policies', '0044_node_normalized_name'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_search_index, migrations.RunPython.noop),
+    ]
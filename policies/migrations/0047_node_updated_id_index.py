@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 02:34
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('policies', '0046_changecounter'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='node',
+            index=models.Index(fields=['updated', 'id'], name='policies_node_updated_id_idx'),
+        ),
+    ]
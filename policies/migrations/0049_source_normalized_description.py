@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 02:47
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import re
+import unicodedata
+
+
+def normalize_name(name):
+    '''
+    Copy of policies.models.normalize_name at the time of this migration
+    '''
+    name = unicodedata.normalize('NFKD', name or '')
+    name = ''.join(c for c in name if not unicodedata.combining(c))
+    name = ' '.join(name.lower().split())
+    return re.sub(r'( ?\([^()]*\))+$', '', name).strip()
+
+
+def populate_normalized_descriptions(apps, schema_editor):
+    Source = apps.get_model('policies', 'Source')
+    for source_id, description in Source.objects.values_list('id', 'description').iterator():
+        Source.objects.filter(id=source_id).update(normalized_description=normalize_name(description)[:300])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('policies', '0048_tombstone'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='source',
+            name='normalized_description',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=300),
+        ),
+        migrations.RunPython(populate_normalized_descriptions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 02:49
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('policies', '0049_source_normalized_description'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CuratorialReport',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('count', models.IntegerField(default=0)),
+                ('started', models.DateTimeField(blank=True, null=True)),
+                ('completed', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CuratorialReportEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.IntegerField()),
+                ('node', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='curatorial_report_entries', to='policies.Node')),
+                ('report', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='entries', to='policies.CuratorialReport')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='curatorialreportentry',
+            index=models.Index(fields=['report', 'rank'], name='policies_report_entry_rank_idx'),
+        ),
+    ]
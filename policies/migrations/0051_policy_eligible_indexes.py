@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 03:40
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+# Policy tables and the boolean columns that must be false for their policies to be eligible (see policies.indexes,
+# as of this migration)
+ELIGIBILITY_FLAGS = [
+    ('policies_oastatus', ['superseded', 'problematic']),
+    ('policies_goldpolicy', ['superseded', 'problematic']),
+    ('policies_greenpolicy', ['superseded', 'problematic']),
+    ('policies_deal', ['superseded']),
+    ('policies_epmc', ['superseded']),
+]
+
+
+def install_policy_indexes(apps, schema_editor):
+    '''
+    Partial indexes on PostgreSQL, composite indexes elsewhere
+    '''
+    qn = schema_editor.connection.ops.quote_name
+    for table, flags in ELIGIBILITY_FLAGS:
+        name = qn('{}_eligible_idx'.format(table))
+        if schema_editor.connection.vendor == 'postgresql':
+            schema_editor.execute('CREATE INDEX {} ON {} ({}, {} DESC) WHERE {}'.format(
+                name, qn(table), qn('node_id'), qn('vetted'), ' AND '.join('{} = false'.format(qn(f)) for f in flags)))
+        else:
+            schema_editor.execute('CREATE INDEX {} ON {} ({})'.format(
+                name, qn(table), ', '.join(qn(c) for c in ['node_id'] + flags + ['vetted'])))
+
+
+def uninstall_policy_indexes(apps, schema_editor):
+    qn = schema_editor.connection.ops.quote_name
+    for table, flags in ELIGIBILITY_FLAGS:
+        schema_editor.execute(schema_editor.sql_delete_index % {
+            'name': qn('{}_eligible_idx'.format(table)), 'table': qn(table)})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('policies', '0050_curatorialreport'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_policy_indexes, uninstall_policy_indexes),
+    ]
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 02:56
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+import policies.models
+
+
+def populate_node_ancestors(apps, schema_editor):
+    apps.get_model('policies', 'NodeAncestor').objects.rebuild()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('policies', '0051_policy_eligible_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NodeAncestor',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('relation', models.CharField(choices=[('PARENT', 'Parent'), ('SYNONYM', 'Synonym of'), ('ANY', 'Parent or synonym of')], max_length=10)),
+                ('depth', models.PositiveSmallIntegerField()),
+                ('ancestor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='descendant_links', to='policies.Node')),
+                ('descendant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ancestor_links', to='policies.Node')),
+            ],
+            managers=[
+                ('objects', policies.models.NodeAncestorManager()),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='nodeancestor',
+            index=models.Index(fields=['ancestor', 'relation', 'depth'], name='policies_node_descendants_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='nodeancestor',
+            unique_together=set([('descendant', 'relation', 'ancestor')]),
+        ),
+        migrations.RunPython(populate_node_ancestors, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 02:59
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('policies', '0052_nodeancestor'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedPolicy',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=50)),
+                ('policy_id', models.IntegerField()),
+                ('superseded_date', models.DateField(blank=True, null=True)),
+                ('archived', models.DateTimeField(default=django.utils.timezone.now)),
+                ('data', models.TextField()),
+                ('node', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_policies', to='policies.Node')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='archivedpolicy',
+            index=models.Index(fields=['node', 'model'], name='policies_archived_node_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='archivedpolicy',
+            unique_together=set([('model', 'policy_id')]),
+        ),
+    ]
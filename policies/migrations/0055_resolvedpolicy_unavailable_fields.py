@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 03:32
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+def mark_unavailable_publishers(apps, schema_editor):
+    '''
+    zd_publisher is never null when available, so existing null values were stored for nodes without a parent
+    '''
+    ResolvedPolicy = apps.get_model('policies', 'ResolvedPolicy')
+    ResolvedPolicy.objects.filter(zd_publisher__isnull=True).update(unavailable_fields='zd_publisher')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('policies', '0054_archivedpolicy_protect_node'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resolvedpolicy',
+            name='unavailable_fields',
+            field=models.CharField(blank=True, default='', max_length=300),
+        ),
+        migrations.RunPython(mark_unavailable_publishers, migrations.RunPython.noop),
+    ]
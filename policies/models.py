@@ -1,16 +1,22 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F, Q
 from django.core.exceptions import ValidationError
 from django.core.validators import RegexValidator, EmailValidator
 from django.utils.translation import ugettext_lazy
 from django.urls import reverse  # Used to generate URLs by reversing the URL patterns
+from django.utils.functional import cached_property
+from django.utils import timezone
 from django.core import serializers
 import pytz
 import re
 import sys
+import unicodedata
 from datetime import date, datetime
 from dateutil.relativedelta import relativedelta
 from itertools import chain
 
+from .cascades import PolicyCascade, GreenPolicyCascade
+
 EXPIRY_DATE = date.today() + relativedelta(months=-6)
 EXPIRY_TIME = pytz.UTC.localize(datetime.now() + relativedelta(months=-6))
 
@@ -305,11 +311,42 @@ def node_name_validator(value):
         )
 # endregion
 
+def normalize_issn(value):
+    '''
+    Normalised form of an ISSN stored in NodeIdentifier: upper case, without hyphens or spaces
+    :return: normalised ISSN, or None if value is blank or not 8 characters long once normalised (issn and eissn
+        of nodes are free text; see NodeIdentifier.value)
+    '''
+    if not value:
+        return None
+    value = re.sub(r'[\s\-]', '', value).upper()
+    return value if len(value) == 8 else None
+
+def normalize_name(name):
+    '''
+    Normalised form of a node name used by name searches: trailing parenthetical qualifiers (e.g. the
+    publisher names distinguishing homonyms) and diacritics removed, in lower case and with single spaces
+    '''
+    name = unicodedata.normalize('NFKD', name or '')
+    name = ''.join(c for c in name if not unicodedata.combining(c))
+    name = ' '.join(name.lower().split())
+    return re.sub(r'( ?\([^()]*\))+$', '', name).strip()
+
+def issn_lookup(*issns):
+    '''
+    Q object matching nodes with any of the given ISSNs as issn, eissn or issnl, using the index of NodeIdentifier
+    '''
+    values = [v for v in (normalize_issn(i) for i in issns) if v]
+    return Q(id__in=NodeIdentifier.objects.filter(value__in=values).values('node'))
+
 class Node(models.Model):
     '''
     A node can be a Publisher, Conference or Journal depending on the value of node_type
     '''
     name = models.CharField(max_length=300, unique=True, validators=[node_name_validator])
+    # Set by save(); see normalize_name. Indexed for both exact and prefix lookups (on PostgreSQL,
+    # Django adds a varchar_pattern_ops index for the latter)
+    normalized_name = models.CharField(max_length=300, db_index=True, editable=False, default='')
     # Case-insensitive uniqueness of the name field was enforced in the database backend,
     # via a unique index; the index was created by migration 0003, using migrations.RunSQL, as
     # shown below (see https://stackoverflow.com/questions/7773341/case-insensitive-unique-model-fields-in-django and
@@ -350,6 +387,11 @@ class Node(models.Model):
                             verbose_name='e-issn',
                             validators=[
                                 RegexValidator('[0-9]{4,4}-[0-9]{3,3}[0-9X]', 'Please enter a issn in the format 0000-0000')])
+    issnl = models.CharField(max_length=10, blank=True, null=True,
+                            help_text="Linking ISSN. Please use the format: <em>0000-0000</em>.",
+                            verbose_name='ISSN-L',
+                            validators=[
+                                RegexValidator('[0-9]{4,4}-[0-9]{3,3}[0-9X]', 'Please enter a issn in the format 0000-0000')])
 
     epmc_url = models.URLField(blank=True, null=True)
     romeo_id = models.IntegerField(blank=True, null=True)
@@ -371,6 +413,41 @@ class Node(models.Model):
     created = models.DateTimeField(auto_now_add=True)
     updated = models.DateTimeField(auto_now=True)
 
+    # Calculated fields memoized per instance (see set_resolved_policies and invalidate_policy_cache)
+    RESOLVED_POLICY_FIELDS = ['most_reliable_oa_status', 'most_reliable_gold_policy',
+                              'most_reliable_green_policies_for_ir', 'most_reliable_deal', 'most_reliable_epmc_policy']
+
+    # Calculated fields used by the API and the most reliable policies they depend on
+    COMPUTED_FIELD_DEPENDENCIES = dict(
+        [(f, [f]) for f in RESOLVED_POLICY_FIELDS],
+        apollo_am_embargo_months=['most_reliable_oa_status', 'most_reliable_green_policies_for_ir'],
+        apollo_vor_embargo_months=['most_reliable_oa_status', 'most_reliable_green_policies_for_ir'],
+        zd_publisher=[],
+        zd_green_allowed_version=['most_reliable_oa_status', 'most_reliable_green_policies_for_ir'],
+        zd_embargo_duration=['most_reliable_oa_status', 'most_reliable_green_policies_for_ir'],
+        zd_green_licence=['most_reliable_oa_status', 'most_reliable_green_policies_for_ir'],
+        zd_journal_oa_status=['most_reliable_oa_status'],
+        zd_apc_range=['most_reliable_gold_policy'],
+        zd_gold_licence_options=['most_reliable_gold_policy'],
+        zd_commitment_guidance=['most_reliable_gold_policy'],
+        zd_deal=['most_reliable_deal'],
+        zd_epmc_participation=['most_reliable_epmc_policy'],
+        zd_epmc_embargo_months=['most_reliable_epmc_policy'],
+        zd_epmc_open_licence=['most_reliable_epmc_policy'],
+        zd_epmc_deposit_status=['most_reliable_epmc_policy'],
+    )
+
+    @classmethod
+    def policy_dependencies(cls, field_names):
+        '''
+        :param field_names: names of fields and properties of Node
+        :return: the RESOLVED_POLICY_FIELDS needed to calculate them, in that order
+        '''
+        needed = set()
+        for f in field_names:
+            needed.update(cls.COMPUTED_FIELD_DEPENDENCIES.get(f, []))
+        return [f for f in cls.RESOLVED_POLICY_FIELDS if f in needed]
+
     def __str__(self):
         return (self.name)
 
@@ -412,7 +489,69 @@ class Node(models.Model):
         elif (self.name_status == 'PRIMARY') and self.synonym_of:
             raise ValidationError('"Synonym of" field must be blank for preferred names')
         else:
-            super(Node, self).save(*args, **kwargs)  # Call the "real" save() method.
+            self.normalized_name = normalize_name(self.name)
+            if kwargs.get('update_fields') and ('name' in kwargs['update_fields']):
+                kwargs['update_fields'] = list(kwargs['update_fields']) + ['normalized_name']
+            self.invalidate_policy_cache()
+            with transaction.atomic():
+                super(Node, self).save(*args, **kwargs)  # Call the "real" save() method.
+                self.sync_identifiers()
+                # Values before saving are loaded by the pre_save handler in policies/signals.py
+                previous = getattr(self, '_previous_values', None)
+                if (previous is None) or (previous['parent_id'] != self.parent_id) or \
+                        (previous['synonym_of_id'] != self.synonym_of_id):
+                    NodeAncestor.objects.refresh([self.id])
+
+    def sync_identifiers(self):
+        '''
+        Updates the NodeIdentifier rows of this node to match its issn, eissn and issnl fields
+        '''
+        wanted = set()
+        for identifier_type, field in NodeIdentifier.NODE_FIELDS:
+            value = normalize_issn(getattr(self, field))
+            if value:
+                wanted.add((identifier_type, value))
+        if wanted != set(self.identifiers.values_list('type', 'value')):
+            self.identifiers.all().delete()
+            NodeIdentifier.objects.bulk_create(NodeIdentifier(node=self, type=t, value=v) for t, v in wanted)
+
+    def get_ancestors(self, relation='ANY'):
+        '''
+        :param relation: NodeAncestor.PARENT, NodeAncestor.SYNONYM or NodeAncestor.ANY (either link)
+        :return: queryset of the nodes above this one in the hierarchy, nearest first
+        '''
+        return Node.objects.filter(descendant_links__descendant=self, descendant_links__relation=relation)\
+            .order_by('descendant_links__depth', 'name')
+
+    def get_descendants(self, relation='ANY'):
+        '''
+        All nodes below this one, e.g. the journals of a publisher, of its imprints and their synonyms
+        :return: queryset
+        '''
+        return Node.objects.filter(ancestor_links__ancestor=self, ancestor_links__relation=relation)
+
+    def get_preferred_ancestor(self):
+        '''
+        :return: the nearest preferred name this node is a (possibly indirect) synonym of, or None
+        '''
+        return self.get_ancestors(NodeAncestor.SYNONYM).filter(name_status='PRIMARY').first()
+
+    def set_resolved_policies(self, policies):
+        '''
+        Stores most reliable policies calculated elsewhere (e.g. by policies.resolvers.PolicyResolver),
+        so that the most_reliable_* properties do not query the database
+        :param policies: a dictionary keyed by the names of (some of) the properties in RESOLVED_POLICY_FIELDS
+        '''
+        for f in self.RESOLVED_POLICY_FIELDS:
+            if f in policies:
+                self.__dict__[f] = policies[f]
+
+    def invalidate_policy_cache(self):
+        '''
+        Discards memoized most_reliable_* values, so that they are recalculated on next access
+        '''
+        for f in self.RESOLVED_POLICY_FIELDS:
+            self.__dict__.pop(f, None)
 
     def get_absolute_url(self):
         """
@@ -422,19 +561,20 @@ class Node(models.Model):
 
     def get_deletion_requests(self):
         '''
-        Fetch related deletion requests
+        Fetch related deletion requests (from prefetched notes, if any)
         '''
-        return Note.objects.filter(node=self.id).filter(deletion_request=True)
+        return [n for n in self.note_set.all() if n.deletion_request]
 
     def get_invalid_policies(self):
         '''
-        Fetches superseded policies related to this node and concatenates them into a list
+        Fetches superseded policies related to this node, followed by its archived policies, and concatenates
+        them into a list
         '''
         oastata = OaStatus.objects.filter(node=self.id).filter(superseded=True)
         gold = GoldPolicy.objects.filter(node=self.id).filter(superseded=True)
         green = GreenPolicy.objects.filter(node=self.id).filter(superseded=True)
         retro = RetrospectiveOaPolicy.objects.filter(node=self.id).filter(superseded=True)
-        return list(chain(oastata, gold, green, retro))
+        return list(chain(oastata, gold, green, retro, self.archived_policies.all()))
 
     def get_romeo_url(self):
         """
@@ -535,30 +675,24 @@ class Node(models.Model):
 
     def get_synonyms_parents_oa_stata(self):
         '''
-        Fetches OA stata associated with the parents of all synonyms.
+        Fetches OA stata associated with the parents of all synonyms (synonyms without a parent are skipped).
+        :return: queryset
         '''
-        oa_stata = []
-        for s in self.get_synonyms():
-            oa_stata.append(OaStatus.objects.filter(node=s.parent.id))
-        return oa_stata
+        return OaStatus.objects.filter(node__in=self.get_synonyms().filter(parent__isnull=False).values('parent'))
 
     def get_synonyms_parents_green_policies(self):
         '''
-        Fetches green policies associated with the parents of all synonyms.
+        Fetches green policies associated with the parents of all synonyms (synonyms without a parent are skipped).
+        :return: queryset
         '''
-        policies = []
-        for s in self.get_synonyms():
-            policies.append(GreenPolicy.objects.filter(node=s.parent.id))
-        return policies
+        return GreenPolicy.objects.filter(node__in=self.get_synonyms().filter(parent__isnull=False).values('parent'))
 
     def get_synonyms_parents_gold_policy(self):
         '''
-        Fetches gold policies associated with the parents of all synonyms.
+        Fetches gold policies associated with the parents of all synonyms (synonyms without a parent are skipped).
+        :return: queryset
         '''
-        policies = []
-        for s in self.get_synonyms():
-            policies.append(GoldPolicy.objects.filter(node=s.parent.id))
-        return policies
+        return GoldPolicy.objects.filter(node__in=self.get_synonyms().filter(parent__isnull=False).values('parent'))
 
     def get_synonyms_oa_stata(self):
         '''
@@ -984,386 +1118,41 @@ class Node(models.Model):
         return None
     # endregion
 
-    @property
+    @cached_property
     def most_reliable_deal(self):
         '''
         Used by the API. Calculated field containing the primary deal associated to a journal
         '''
+        return POLICY_CASCADES['most_reliable_deal'].resolve(self)
 
-        def process_policy_queryset(queryset, output_dict, pass_counter, restrict_to_vetted=False):
-            def pass_counter_str(int):
-                if int in [1, 2]:
-                    return 'preferred name'
-                elif int in [3, 4]:
-                    return 'synonym'
-                elif int in [5, 6]:
-                    return 'parent (publisher)'
-                elif int in [7, 8]:
-                    return 'synonym parent (publisher)'
-
-            for q in queryset:
-                if q.superseded == False:
-                    if (q.vetted == True) or (restrict_to_vetted == False):
-                        if output_dict == None:  # Avoid overwriting a more reliable policy
-                            output_dict = {
-                                "id": q.id,
-                                "source": q.source.description,
-                                "name": q.name,
-                                "applies_to": q.applies_to,
-                                "type": q.type,
-                                "vetted": q.vetted,
-                                "vetted_date": q.vetted_date,
-                                "last_checked": q.last_checked,
-                                "superseded": q.superseded,
-                                "superseded_date": q.superseded_date,
-                                "created": q.created,
-                                "updated": q.updated,
-                                "node": q.node.id,
-                                "provenance": pass_counter_str(pass_counter)
-                            }
-
-            return output_dict
-
-        output_policy = None
-
-        pol = self.get_preferred_name_deal()
-        if pol:  # try first to obtain data from vetted policies directly linked to preferred name of node
-            output_policy = process_policy_queryset(pol, output_policy, 1, restrict_to_vetted=True)
-        if output_policy == None:  # if output_policy still null, try unvetted
-            output_policy = process_policy_queryset(pol, output_policy, 2)
-        if output_policy == None:  # if output_policy still null, try synonyms (vetted, then any)
-            synonym_pol = self.get_synonyms_deal()
-            if synonym_pol:
-                for queryset in synonym_pol:  # vetted
-                    output_policy = process_policy_queryset(queryset, output_policy, 3, restrict_to_vetted=True)
-                if output_policy == None:
-                    for queryset in synonym_pol:  # any
-                        output_policy = process_policy_queryset(queryset, output_policy, 4)
-        if output_policy == None:  # if output_policy still null, try direct parent (vetted, then any)
-            parent_pol = self.get_parent_deal_policies()
-            if parent_pol:  # vetted
-                output_policy = process_policy_queryset(parent_pol, output_policy, 5, restrict_to_vetted=True)
-                if output_policy == None:  # any
-                    output_policy = process_policy_queryset(parent_pol, output_policy, 6)
-        ### PARENTS OF SYNONYMS BLOCK BELOW NOT WORKING; NOT SURE WHY; COMMENTING IT OUT FOR NOW
-        # if output_policy == None:  # if output_policy still null, try parents of synonyms (vetted, then any)
-        #     synonym_parent_pol = self.get_synonyms_parents_oa_stata()
-        #     if synonym_parent_pol: #vetted
-        #         output_policy = process_policy_queryset(synonym_parent_pol, output_policy, 7, restrict_to_vetted=True)
-        #         print('Returning:', output_policy)
-        #         if output_policy == None: # any
-        #             output_policy = process_policy_queryset(synonym_parent_pol, output_policy, 8)
-
-        return output_policy
-
-    @property
+    @cached_property
     def most_reliable_epmc_policy(self):
         '''
         Used by the API. Calculated field containing the primary EPMC policy associated to a journal
         '''
+        return POLICY_CASCADES['most_reliable_epmc_policy'].resolve(self)
 
-        def process_policy_queryset(queryset, output_dict, pass_counter, restrict_to_vetted=False):
-            def pass_counter_str(int):
-                if int in [1, 2]:
-                    return 'preferred name'
-                elif int in [3, 4]:
-                    return 'synonym'
-                elif int in [5, 6]:
-                    return 'parent (publisher)'
-                elif int in [7, 8]:
-                    return 'synonym parent (publisher)'
-
-            for q in queryset:
-                if q.superseded == False:
-                    if (q.vetted == True) or (restrict_to_vetted == False):
-                        if output_dict == None:  # Avoid overwriting a more reliable policy
-                            output_dict = {
-                                "id": q.id,
-                                "source": q.source.description,
-                                "participation_level": q.participation_level,
-                                "embargo_months": q.embargo_months,
-                                "open_licence": q.open_licence,
-                                "deposit_status": q.deposit_status,
-                                "vetted": q.vetted,
-                                "vetted_date": q.vetted_date,
-                                "last_checked": q.last_checked,
-                                "superseded": q.superseded,
-                                "superseded_date": q.superseded_date,
-                                "created": q.created,
-                                "updated": q.updated,
-                                "node": q.node.id,
-                                "provenance": pass_counter_str(pass_counter)
-                            }
-
-            return output_dict
-
-        output_policy = None
-
-        pol = self.get_preferred_name_epmc_policy()
-        if pol:  # try first to obtain data from vetted policies directly linked to preferred name of node
-            output_policy = process_policy_queryset(pol, output_policy, 1, restrict_to_vetted=True)
-        if output_policy == None:  # if output_policy still null, try unvetted
-            output_policy = process_policy_queryset(pol, output_policy, 2)
-        if output_policy == None:  # if output_policy still null, try synonyms (vetted, then any)
-            synonym_pol = self.get_synonyms_epmc_policy()
-            if synonym_pol:
-                for queryset in synonym_pol:  # vetted
-                    output_policy = process_policy_queryset(queryset, output_policy, 3, restrict_to_vetted=True)
-                if output_policy == None:
-                    for queryset in synonym_pol:  # any
-                        output_policy = process_policy_queryset(queryset, output_policy, 4)
-        if output_policy == None:  # if output_policy still null, try direct parent (vetted, then any)
-            parent_pol = self.get_parent_epmc_policies()
-            if parent_pol:  # vetted
-                output_policy = process_policy_queryset(parent_pol, output_policy, 5, restrict_to_vetted=True)
-                if output_policy == None:  # any
-                    output_policy = process_policy_queryset(parent_pol, output_policy, 6)
-        ### PARENTS OF SYNONYMS BLOCK BELOW NOT WORKING; NOT SURE WHY; COMMENTING IT OUT FOR NOW
-        # if output_policy == None:  # if output_policy still null, try parents of synonyms (vetted, then any)
-        #     synonym_parent_pol = self.get_synonyms_parents_oa_stata()
-        #     if synonym_parent_pol: #vetted
-        #         output_policy = process_policy_queryset(synonym_parent_pol, output_policy, 7, restrict_to_vetted=True)
-        #         print('Returning:', output_policy)
-        #         if output_policy == None: # any
-        #             output_policy = process_policy_queryset(synonym_parent_pol, output_policy, 8)
-
-        return output_policy
-
-    @property
+    @cached_property
     def most_reliable_oa_status(self):
         '''
         Used by the API. Calculated field containing the most reliable OA status of a journal
         '''
+        return POLICY_CASCADES['most_reliable_oa_status'].resolve(self)
 
-        def process_policy_queryset(queryset, output_dict, pass_counter, restrict_to_vetted=False):
-            def pass_counter_str(int):
-                if int in [1, 2]:
-                    return 'preferred name'
-                elif int in [3, 4]:
-                    return 'synonym'
-                elif int in [5, 6]:
-                    return 'parent (publisher)'
-                elif int in [7, 8]:
-                    return 'synonym parent (publisher)'
-
-            for q in queryset:
-                if (q.problematic == False) and (q.superseded == False):
-                    if (q.vetted == True) or (restrict_to_vetted == False):
-                        if output_dict == None: # Avoid overwriting a more reliable policy
-                            output_dict = {
-                                    "id": q.id,
-                                    "source": q.source.description,
-                                    "oa_status": q.oa_status,
-                                    "verbatim": q.verbatim,
-                                    "problematic": q.problematic,
-                                    "vetted": q.vetted,
-                                    "vetted_date": q.vetted_date,
-                                    "last_checked": q.last_checked,
-                                    "superseded": q.superseded,
-                                    "superseded_date": q.superseded_date,
-                                    "created": q.created,
-                                    "updated": q.updated,
-                                    "node": q.node.id,
-                                    "provenance": pass_counter_str(pass_counter)
-                                    }
-
-            return output_dict
-
-        output_policy = None
-
-        pol = self.get_preferred_name_oa_status()
-        if pol:  # try first to obtain data from vetted policies directly linked to preferred name of node
-            output_policy = process_policy_queryset(pol, output_policy, 1, restrict_to_vetted=True)
-        if output_policy == None:  # if output_policy still null, try unvetted
-            output_policy = process_policy_queryset(pol, output_policy, 2)
-        if output_policy == None:  # if output_policy still null, try synonyms (vetted, then any)
-            synonym_pol = self.get_synonyms_oa_stata()
-            if synonym_pol:
-                for queryset in synonym_pol: # vetted
-                    output_policy = process_policy_queryset(queryset, output_policy, 3, restrict_to_vetted=True)
-                if output_policy == None:
-                    for queryset in synonym_pol: # any
-                        output_policy = process_policy_queryset(queryset, output_policy, 4)
-        if output_policy == None:  # if output_policy still null, try direct parent (vetted, then any)
-            parent_pol = self.get_parent_oa_stata()
-            if parent_pol: #vetted
-                output_policy = process_policy_queryset(parent_pol, output_policy, 5, restrict_to_vetted=True)
-                if output_policy == None: # any
-                    output_policy = process_policy_queryset(parent_pol, output_policy, 6)
-        ### PARENTS OF SYNONYMS BLOCK BELOW NOT WORKING; NOT SURE WHY; COMMENTING IT OUT FOR NOW
-        # if output_policy == None:  # if output_policy still null, try parents of synonyms (vetted, then any)
-        #     synonym_parent_pol = self.get_synonyms_parents_oa_stata()
-        #     if synonym_parent_pol: #vetted
-        #         output_policy = process_policy_queryset(synonym_parent_pol, output_policy, 7, restrict_to_vetted=True)
-        #         print('Returning:', output_policy)
-        #         if output_policy == None: # any
-        #             output_policy = process_policy_queryset(synonym_parent_pol, output_policy, 8)
-
-        return output_policy
-
-    @property
+    @cached_property
     def most_reliable_gold_policy(self):
         '''
         Used by the API. Calculated field containing the most reliable gold policy of a journal
         '''
+        return POLICY_CASCADES['most_reliable_gold_policy'].resolve(self)
 
-        def process_policy_queryset(queryset, output_dict, pass_counter, restrict_to_vetted=False):
-            def pass_counter_str(int):
-                if int in [1, 2]:
-                    return 'preferred name'
-                elif int in [3, 4]:
-                    return 'synonym'
-                elif int in [5, 6]:
-                    return 'parent (publisher)'
-                elif int in [7, 8]:
-                    return 'synonym parent (publisher)'
-
-            for q in queryset:
-                if (q.problematic == False) and (q.superseded == False):
-                    if (q.vetted == True) or (restrict_to_vetted == False):
-                        if output_dict == None:  # Avoid overwriting a more reliable policy
-                            default_licence_str = ''
-                            if q.default_licence:
-                                default_licence_str = q.default_licence.short_name
-                            output_dict = {
-                                "id": q.id,
-                                "source": q.source.description,
-                                "apc_currency": q.apc_currency,
-                                "apc_value_min": q.apc_value_min,
-                                "apc_value_max": q.apc_value_max,
-                                "apc_note": q.apc_note,
-                                "licence_options": [str(l) for l in q.licence_options.all()], # https://stackoverflow.com/a/34475243
-                                "default_licence": default_licence_str,
-                                "verbatim": q.verbatim,
-                                "problematic": q.problematic,
-                                "vetted": q.vetted,
-                                "vetted_date": q.vetted_date,
-                                "last_checked": q.last_checked,
-                                "superseded": q.superseded,
-                                "superseded_date": q.superseded_date,
-                                "created": q.created,
-                                "updated": q.updated,
-                                "node": q.node.id,
-                                "provenance": pass_counter_str(pass_counter)
-                            }
-
-            return output_dict
-
-        output_policy = None
-
-        pol = self.get_preferred_name_gold_policy()
-        if pol:  # try first to obtain data from vetted policies directly linked to preferred name of node
-            output_policy = process_policy_queryset(pol, output_policy, 1, restrict_to_vetted=True)
-        if output_policy == None:  # if output_policy still null, try unvetted
-            output_policy = process_policy_queryset(pol, output_policy, 2)
-        if output_policy == None:  # if output_policy still null, try synonyms (vetted, then any)
-            synonym_pol = self.get_synonyms_gold_policy()
-            if synonym_pol:
-                for queryset in synonym_pol:  # vetted
-                    output_policy = process_policy_queryset(queryset, output_policy, 3, restrict_to_vetted=True)
-                if output_policy == None:
-                    for queryset in synonym_pol:  # any
-                        output_policy = process_policy_queryset(queryset, output_policy, 4)
-        if output_policy == None:  # if output_policy still null, try direct parent (vetted, then any)
-            parent_pol = self.get_parent_gold_policies()
-            if parent_pol:  # vetted
-                output_policy = process_policy_queryset(parent_pol, output_policy, 5, restrict_to_vetted=True)
-                if output_policy == None:  # any
-                    output_policy = process_policy_queryset(parent_pol, output_policy, 6)
-        ### PARENTS OF SYNONYMS BLOCK BELOW NOT WORKING; NOT SURE WHY; COMMENTING IT OUT FOR NOW
-        # if output_policy == None:  # if output_policy still null, try parents of synonyms (vetted, then any)
-        #     synonym_parent_pol = self.get_synonyms_parents_gold_policy()
-        #     if synonym_parent_pol: #vetted
-        #         output_policy = process_policy_queryset(synonym_parent_pol, output_policy, 7, restrict_to_vetted=True)
-        #         print('Returning:', output_policy)
-        #         if output_policy == None: # any
-        #             output_policy = process_policy_queryset(synonym_parent_pol, output_policy, 8)
-
-        return output_policy
-
-    @property
+    @cached_property
     def most_reliable_green_policies_for_ir(self):
         '''
         Used by the API. Calculated field containing the most reliable embargo period for AAMs and VoRs
         self-archiving in non-commercial institutional repositories
         '''
-
-        def process_policy_queryset(queryset, output_dict, pass_counter, restrict_to_vetted=False):
-            def pass_counter_str(int):
-                if int in [1, 2]:
-                    return 'preferred name'
-                elif int in [3, 4]:
-                    return 'synonym'
-                elif int in [5, 6]:
-                    return 'parent (publisher)'
-                elif int in [7, 8]:
-                    return 'synonym parent (publisher)'
-
-            for g in queryset:
-                versions = g.get_versions()
-                if 'Non-commercial institutional repository' in g.get_outlets():
-                    if ('AM' in versions) or ('VoR' in versions):
-                        if (g.problematic == False) and (g.superseded == False):
-                            if (g.vetted == True) or (restrict_to_vetted == False):
-                                for v in ['Preprint', 'AM', 'VoR']:
-                                    if v in versions:
-                                        if output_dict[v] == None: # Avoid overwriting more reliable embargos
-                                            output_dict[v] = {
-                                                "id": g.id,
-                                                # "outlet": g.outlet,
-                                                # "version": g.version,
-                                                "version_green_licence": str(g.version_green_licence),
-                                                "source": g.source.description,
-                                                "deposit_allowed": g.deposit_allowed,
-                                                "version_embargo_months": g.version_embargo_months,
-                                                "version_note": g.version_note,
-                                                "verbatim": g.verbatim,
-                                                "problematic": g.problematic,
-                                                "vetted": g.vetted,
-                                                "vetted_date": g.vetted_date,
-                                                "last_checked": g.last_checked,
-                                                "superseded": g.superseded,
-                                                "superseded_date": g.superseded_date,
-                                                "created": g.created,
-                                                "updated": g.updated,
-                                                "node": g.node.id,
-                                                "provenance": pass_counter_str(pass_counter)
-                                                }
-
-            return output_dict
-
-        embargos = {
-            'Preprint' : None,
-            'AM' : None,
-            'VoR' : None
-        }
-
-        green = self.get_preferred_name_green_policies()
-        if green: # try first to obtain data from vetted policies directly linked to preferred name of node
-            embargos = process_policy_queryset(green, embargos, 1, restrict_to_vetted=True)
-        if (embargos['AM'] == None) or (embargos['VoR'] == None): # if AAM or VoR embargos still null, try unvetted
-            embargos = process_policy_queryset(green, embargos, 2)
-        if (embargos['AM'] == None) or (embargos['VoR'] == None): # if AAM or VoR embargos still null, try synonyms
-            synonym_green = self.get_synonyms_green_policies()
-            for queryset in synonym_green:
-                embargos = process_policy_queryset(queryset, embargos, 3, restrict_to_vetted=True)
-                if (embargos['AM'] == None) or (embargos['VoR'] == None):
-                    embargos = process_policy_queryset(queryset, embargos, 4)
-        if (embargos['AM'] == None) or (embargos['VoR'] == None): # if AAM or VoR embargos still null, try parent
-            parent_green = self.get_parent_green_policies()
-            if parent_green:
-                embargos = process_policy_queryset(parent_green, embargos, 5, restrict_to_vetted=True)
-            if (embargos['AM'] == None) or (embargos['VoR'] == None):
-                embargos = process_policy_queryset(parent_green, embargos, 6)
-        ### PARENTS OF SYNONYMS BLOCK BELOW NOT WORKING; NOT SURE WHY; COMMENTING IT OUT FOR NOW
-        # if (embargos['AAM'] == None) or (embargos['VoR'] == None):  # if output_policy still null, try parents of synonyms (vetted, then any)
-        #     synonym_parent_pol = self.get_synonyms_parents_green_policies()
-        #     if synonym_parent_pol: #vetted
-        #         embargos = process_policy_queryset(synonym_parent_pol, embargos, 7, restrict_to_vetted=True)
-        #         if (embargos['AAM'] == None) or (embargos['VoR'] == None): # any
-        #             embargos = process_policy_queryset(synonym_parent_pol, embargos, 8)
-
-        return embargos
+        return POLICY_CASCADES['most_reliable_green_policies_for_ir'].resolve(self)
 
     @property
     def romeo_url(self):
@@ -1371,7 +1160,137 @@ class Node(models.Model):
 
     class Meta:
         ordering = ('name',)
+        # Keyset pagination by (updated, id); (name, id) is served by the unique index on name
+        indexes = [models.Index(fields=['updated', 'id'], name='policies_node_updated_id_idx')]
+
+
+class NodeIdentifier(models.Model):
+    '''
+    Normalised ISSNs of a node (see normalize_issn), kept in sync with its issn, eissn and issnl fields by
+    Node.save. ISSN lookups use this table (see issn_lookup) rather than scanning issn and eissn.
+    '''
+    ISSN = 'ISSN'
+    EISSN = 'EISSN'
+    ISSNL = 'ISSNL'
+    IDENTIFIER_TYPE_CHOICES = (
+        (ISSN, 'ISSN'),
+        (EISSN, 'e-ISSN'),
+        (ISSNL, 'ISSN-L'),
+    )
+    # Node field each identifier type is taken from
+    NODE_FIELDS = [(ISSN, 'issn'), (EISSN, 'eissn'), (ISSNL, 'issnl')]
+
+    node = models.ForeignKey(Node, on_delete=models.CASCADE, related_name='identifiers')
+    type = models.CharField(max_length=10, choices=IDENTIFIER_TYPE_CHOICES)
+    value = models.CharField(max_length=8, db_index=True)
+
+    def __str__(self):
+        return '{} {}'.format(self.get_type_display(), self.value)
+
+    class Meta:
+        unique_together = ('node', 'type')
+
+class NodeAncestorManager(models.Manager):
+    # Used by migration 0052, with a historical model lacking the relation constants of NodeAncestor
+    use_in_migrations = True
+
+    def closure(self, node_ids, edges=None):
+        '''
+        :param edges: dictionary of (parent_id, synonym_of_id) by node id, completed from the database as needed
+        :return: list of (unsaved) NodeAncestor rows of node_ids
+        '''
+        node_model = self.model._meta.get_field('descendant').related_model
+        edges = {} if edges is None else edges
+        missing = set(node_ids) - set(edges)
+        while missing:
+            for node_id in missing:
+                edges[node_id] = (None, None)  # until loaded, in case the node does not exist
+            missing = list(missing)
+            for i in range(0, len(missing), 500):
+                for node_id, parent_id, synonym_of_id in node_model.objects.filter(id__in=missing[i:i + 500])\
+                        .values_list('id', 'parent_id', 'synonym_of_id'):
+                    edges[node_id] = (parent_id, synonym_of_id)
+            missing = set(t for node_id in missing for t in edges[node_id] if t and (t not in edges))
+
+        paths = {}
+        def walk(node_id, visiting):
+            # {(ancestor_id, relation): depth} of the shortest path of each relation
+            if node_id not in paths:
+                visiting = visiting | {node_id}
+                result = {}
+                for target, relation in zip(edges[node_id], (NodeAncestor.PARENT, NodeAncestor.SYNONYM)):
+                    if (target is None) or (target in visiting):  # cycles are reported by curatorial views
+                        continue
+                    candidates = [((target, relation), 1), ((target, NodeAncestor.ANY), 1)]
+                    candidates += [((a, r), depth + 1) for (a, r), depth in walk(target, visiting).items()
+                                   if r in (relation, NodeAncestor.ANY)]
+                    for key, depth in candidates:
+                        if (key[0] != node_id) and (depth < result.get(key, depth + 1)):
+                            result[key] = depth
+                paths[node_id] = result
+            return paths[node_id]
+
+        return [self.model(descendant_id=node_id, ancestor_id=ancestor_id, relation=relation, depth=depth)
+                for node_id in node_ids for (ancestor_id, relation), depth in walk(node_id, set()).items()]
+
+    def refresh(self, node_ids):
+        '''
+        Recomputes the rows of node_ids and of all their descendants, e.g. after their parent or synonym_of
+        changed. Called by Node.save; callers updating these fields in bulk must call it themselves.
+        '''
+        node_ids = set(node_ids)
+        with transaction.atomic():
+            node_ids.update(self.filter(ancestor__in=node_ids, relation=NodeAncestor.ANY)
+                            .values_list('descendant_id', flat=True))
+            self.filter(descendant__in=node_ids).delete()
+            self.bulk_create(self.closure(node_ids))
+
+    def rebuild(self, batch_size=1000):
+        '''
+        Recomputes all rows, e.g. after nodes were loaded without Node.save
+        :return: number of rows
+        '''
+        node_model = self.model._meta.get_field('descendant').related_model
+        edges = dict((node_id, (parent_id, synonym_of_id)) for node_id, parent_id, synonym_of_id in
+                     node_model.objects.values_list('id', 'parent_id', 'synonym_of_id').iterator())
+        node_ids = sorted(edges)
+        count = 0
+        with transaction.atomic():
+            self.all().delete()
+            for i in range(0, len(node_ids), batch_size):
+                rows = self.closure(node_ids[i:i + batch_size], edges)
+                self.bulk_create(rows)
+                count += len(rows)
+        return count
+
+class NodeAncestor(models.Model):
+    '''
+    Closure table of the node hierarchy: one row per node and each node above it through a chain of parent
+    links (PARENT), of synonym_of links (SYNONYM) or of both (ANY), at the depth of the shortest such chain.
+    Kept in sync by Node.save, so that descendants and ancestors are found by a single indexed query.
+    '''
+    PARENT = 'PARENT'
+    SYNONYM = 'SYNONYM'
+    ANY = 'ANY'
+    RELATION_CHOICES = (
+        (PARENT, 'Parent'),
+        (SYNONYM, 'Synonym of'),
+        (ANY, 'Parent or synonym of'),
+    )
+
+    descendant = models.ForeignKey(Node, on_delete=models.CASCADE, related_name='ancestor_links')
+    ancestor = models.ForeignKey(Node, on_delete=models.CASCADE, related_name='descendant_links')
+    relation = models.CharField(max_length=10, choices=RELATION_CHOICES)
+    depth = models.PositiveSmallIntegerField()
 
+    objects = NodeAncestorManager()
+
+    def __str__(self):
+        return '{} -> {} ({}, {})'.format(self.descendant_id, self.ancestor_id, self.relation, self.depth)
+
+    class Meta:
+        unique_together = ('descendant', 'relation', 'ancestor')
+        indexes = [models.Index(fields=['ancestor', 'relation', 'depth'], name='policies_node_descendants_idx')]
 
 # region Tag classes
 class Version(models.Model):
@@ -1473,6 +1392,8 @@ class Source(models.Model):
     Sources of information entered in other tables
     '''
     description = models.TextField()
+    # Start of the description, normalised as node names, used by autocompletes
+    normalized_description = models.CharField(max_length=300, db_index=True, editable=False, default='')
     url = models.URLField(max_length=600, blank=True, null=True, unique=True)
 
     PUBLICATION = 'PUBLICATION'
@@ -1487,7 +1408,7 @@ class Source(models.Model):
 
     file = models.FileField(upload_to='sources', blank=True, null=True)
     created = models.DateTimeField(auto_now_add=True)
-    updated = models.DateTimeField(auto_now=True)
+    updated = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return (self.description)
@@ -1497,6 +1418,9 @@ class Source(models.Model):
             self.url = self.url.strip()  # Hopefully reduces junk to ""
         if self.url == "":
             self.url = None
+        self.normalized_description = normalize_name(self.description)[:300]
+        if kwargs.get('update_fields') and ('description' in kwargs['update_fields']):
+            kwargs['update_fields'] = list(kwargs['update_fields']) + ['normalized_description']
         super(Source, self).save(*args, **kwargs)  # Call the "real" save() method.
 
     def get_absolute_url(self):
@@ -1536,7 +1460,7 @@ class OaStatus(models.Model):
     superseded = models.BooleanField(default=False)
     superseded_date = models.DateField(blank=True, null=True)
     created = models.DateTimeField(auto_now_add=True)
-    updated = models.DateTimeField(auto_now=True)
+    updated = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         #return '%s (%s)' % (self.node, self.node.get_type_display())
@@ -1550,9 +1474,31 @@ class OaStatus(models.Model):
 
     def get_deletion_requests(self):
         '''
-        Fetch related deletion requests
-        '''
-        return Note.objects.filter(oastatus=self.id).filter(deletion_request=True)
+        Fetch related deletion requests (from prefetched notes, if any)
+        '''
+        return [n for n in self.oa_status_notes.all() if n.deletion_request]
+
+    def to_api_dict(self, provenance):
+        '''
+        Representation of this OA status used by the most_reliable_oa_status field of the API
+        :param provenance: human-friendly description of how the policy was reached from the queried node
+        '''
+        return {
+            "id": self.id,
+            "source": self.source.description,
+            "oa_status": self.oa_status,
+            "verbatim": self.verbatim,
+            "problematic": self.problematic,
+            "vetted": self.vetted,
+            "vetted_date": self.vetted_date,
+            "last_checked": self.last_checked,
+            "superseded": self.superseded,
+            "superseded_date": self.superseded_date,
+            "created": self.created,
+            "updated": self.updated,
+            "node": self.node_id,
+            "provenance": provenance
+        }
 
     def checked_recently(self):
         return self.last_checked > EXPIRY_DATE
@@ -1596,7 +1542,7 @@ class GoldPolicy(models.Model):
     superseded = models.BooleanField(default=False)
     superseded_date = models.DateField(blank=True, null=True)
     created = models.DateTimeField(auto_now_add=True)
-    updated = models.DateTimeField(auto_now=True)
+    updated = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         if self.apc_value_min != self.apc_value_max:
@@ -1622,9 +1568,39 @@ class GoldPolicy(models.Model):
 
     def get_deletion_requests(self):
         '''
-        Fetch related deletion requests
-        '''
-        return Note.objects.filter(goldpolicy=self.id).filter(deletion_request=True)
+        Fetch related deletion requests (from prefetched notes, if any)
+        '''
+        return [n for n in self.gold_policy_notes.all() if n.deletion_request]
+
+    def to_api_dict(self, provenance):
+        '''
+        Representation of this gold policy used by the most_reliable_gold_policy field of the API
+        :param provenance: human-friendly description of how the policy was reached from the queried node
+        '''
+        default_licence_str = ''
+        if self.default_licence:
+            default_licence_str = self.default_licence.short_name
+        return {
+            "id": self.id,
+            "source": self.source.description,
+            "apc_currency": self.apc_currency,
+            "apc_value_min": self.apc_value_min,
+            "apc_value_max": self.apc_value_max,
+            "apc_note": self.apc_note,
+            "licence_options": [str(l) for l in self.licence_options.all()], # https://stackoverflow.com/a/34475243
+            "default_licence": default_licence_str,
+            "verbatim": self.verbatim,
+            "problematic": self.problematic,
+            "vetted": self.vetted,
+            "vetted_date": self.vetted_date,
+            "last_checked": self.last_checked,
+            "superseded": self.superseded,
+            "superseded_date": self.superseded_date,
+            "created": self.created,
+            "updated": self.updated,
+            "node": self.node_id,
+            "provenance": provenance
+        }
 
     def checked_recently(self):
         return self.last_checked > EXPIRY_DATE
@@ -1673,7 +1649,7 @@ class GreenPolicy(models.Model):
     superseded = models.BooleanField(default=False)
     superseded_date = models.DateField(blank=True, null=True)
     created = models.DateTimeField(auto_now_add=True)
-    updated = models.DateTimeField(auto_now=True)
+    updated = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return '%s: %s (%s)' % (self.node, ', '.join(version.__str__() for version in self.version.all()), self.source) # for loop for version required because it is a ManyToManyField
@@ -1710,6 +1686,33 @@ class GreenPolicy(models.Model):
             versions.append(str(v))
         return versions
 
+    def to_api_dict(self, provenance):
+        '''
+        Representation of this green policy used by the most_reliable_green_policies_for_ir field of the API
+        :param provenance: human-friendly description of how the policy was reached from the queried node
+        '''
+        return {
+            "id": self.id,
+            # "outlet": self.outlet,
+            # "version": self.version,
+            "version_green_licence": str(self.version_green_licence),
+            "source": self.source.description,
+            "deposit_allowed": self.deposit_allowed,
+            "version_embargo_months": self.version_embargo_months,
+            "version_note": self.version_note,
+            "verbatim": self.verbatim,
+            "problematic": self.problematic,
+            "vetted": self.vetted,
+            "vetted_date": self.vetted_date,
+            "last_checked": self.last_checked,
+            "superseded": self.superseded,
+            "superseded_date": self.superseded_date,
+            "created": self.created,
+            "updated": self.updated,
+            "node": self.node_id,
+            "provenance": provenance
+        }
+
     def checked_recently(self):
         return self.last_checked > EXPIRY_DATE
 
@@ -1774,11 +1777,34 @@ class Epmc(models.Model):
     superseded = models.BooleanField(default=False)
     superseded_date = models.DateField(blank=True, null=True)
     created = models.DateTimeField(auto_now_add=True)
-    updated = models.DateTimeField(auto_now=True)
+    updated = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return self.get_participation_level_display()
 
+    def to_api_dict(self, provenance):
+        '''
+        Representation of this EPMC policy used by the most_reliable_epmc_policy field of the API
+        :param provenance: human-friendly description of how the policy was reached from the queried node
+        '''
+        return {
+            "id": self.id,
+            "source": self.source.description,
+            "participation_level": self.participation_level,
+            "embargo_months": self.embargo_months,
+            "open_licence": self.open_licence,
+            "deposit_status": self.deposit_status,
+            "vetted": self.vetted,
+            "vetted_date": self.vetted_date,
+            "last_checked": self.last_checked,
+            "superseded": self.superseded,
+            "superseded_date": self.superseded_date,
+            "created": self.created,
+            "updated": self.updated,
+            "node": self.node_id,
+            "provenance": provenance
+        }
+
     def checked_recently(self):
         return self.last_checked > EXPIRY_DATE
 
@@ -1907,7 +1933,7 @@ class Deal(models.Model):
     superseded = models.BooleanField(default=False)
     superseded_date = models.DateField(blank=True, null=True)
     created = models.DateTimeField(auto_now_add=True)
-    updated = models.DateTimeField(auto_now=True)
+    updated = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         if self.name:
@@ -1915,6 +1941,28 @@ class Deal(models.Model):
         else:
             return self.get_type_display()
 
+    def to_api_dict(self, provenance):
+        '''
+        Representation of this deal used by the most_reliable_deal field of the API
+        :param provenance: human-friendly description of how the policy was reached from the queried node
+        '''
+        return {
+            "id": self.id,
+            "source": self.source.description,
+            "name": self.name,
+            "applies_to": self.applies_to,
+            "type": self.type,
+            "vetted": self.vetted,
+            "vetted_date": self.vetted_date,
+            "last_checked": self.last_checked,
+            "superseded": self.superseded,
+            "superseded_date": self.superseded_date,
+            "created": self.created,
+            "updated": self.updated,
+            "node": self.node_id,
+            "provenance": provenance
+        }
+
     def checked_recently(self):
         return self.last_checked > EXPIRY_DATE
 
@@ -1928,4 +1976,201 @@ class Deal(models.Model):
         return self.vetted_date > EXPIRY_DATE
 
     class Meta:
-        ordering = ('name',)
\ No newline at end of file
+        ordering = ('name',)
+
+# Cascades used by the most_reliable_* properties of Node, keyed by property name
+POLICY_CASCADES = {
+    'most_reliable_oa_status': PolicyCascade(OaStatus, eligible=Q(superseded=False, problematic=False)),
+    'most_reliable_gold_policy': PolicyCascade(
+        GoldPolicy, eligible=Q(superseded=False, problematic=False),
+        select_related=('source', 'default_licence'), prefetch_related=('licence_options',)
+    ),
+    'most_reliable_green_policies_for_ir': GreenPolicyCascade(
+        GreenPolicy, eligible=Q(superseded=False, problematic=False),
+        select_related=('source', 'version_green_licence'), prefetch_related=('outlet', 'version')
+    ),
+    'most_reliable_deal': PolicyCascade(Deal),
+    'most_reliable_epmc_policy': PolicyCascade(Epmc),
+}
+
+class ResolvedPolicy(models.Model):
+    '''
+    Precomputed values of the computed fields served by the Cambridge API (Apollo/Zendesk integration),
+    one row per node. Rows are refreshed by the signal handlers in policies/signals.py whenever a node
+    or a policy it depends on changes, and can be rebuilt with the rebuild_resolved_policies command.
+    '''
+    node = models.OneToOneField(Node, on_delete=models.CASCADE, primary_key=True, related_name='resolved_policy')
+
+    apollo_am_embargo_months = models.CharField(max_length=20, blank=True, null=True)
+    apollo_vor_embargo_months = models.CharField(max_length=20, blank=True, null=True)
+    zd_publisher = models.CharField(max_length=300, blank=True, null=True)
+    zd_green_allowed_version = models.CharField(max_length=50, blank=True, null=True)
+    zd_embargo_duration = models.CharField(max_length=20, blank=True, null=True)
+    zd_green_licence = models.CharField(max_length=50, blank=True, null=True)
+    zd_journal_oa_status = models.CharField(max_length=50, blank=True, null=True)
+    zd_apc_range = models.CharField(max_length=50, blank=True, null=True)
+    zd_gold_licence_options = models.TextField(blank=True, null=True) # comma-separated list of ZD tags
+    zd_commitment_guidance = models.CharField(max_length=50, blank=True, null=True)
+    zd_deal = models.CharField(max_length=50, blank=True, null=True)
+    zd_epmc_participation = models.CharField(max_length=20, blank=True, null=True)
+    zd_epmc_embargo_months = models.IntegerField(blank=True, null=True)
+    zd_epmc_open_licence = models.CharField(max_length=20, blank=True, null=True)
+    zd_epmc_deposit_status = models.CharField(max_length=20, blank=True, null=True)
+
+    # Ids and provenance of the policies the values above were calculated from
+    oa_status_id = models.IntegerField(blank=True, null=True)
+    oa_status_provenance = models.CharField(max_length=30, blank=True, null=True)
+    gold_policy_id = models.IntegerField(blank=True, null=True)
+    gold_policy_provenance = models.CharField(max_length=30, blank=True, null=True)
+    green_preprint_id = models.IntegerField(blank=True, null=True)
+    green_preprint_provenance = models.CharField(max_length=30, blank=True, null=True)
+    green_am_id = models.IntegerField(blank=True, null=True)
+    green_am_provenance = models.CharField(max_length=30, blank=True, null=True)
+    green_vor_id = models.IntegerField(blank=True, null=True)
+    green_vor_provenance = models.CharField(max_length=30, blank=True, null=True)
+    deal_id = models.IntegerField(blank=True, null=True)
+    deal_provenance = models.CharField(max_length=30, blank=True, null=True)
+    epmc_id = models.IntegerField(blank=True, null=True)
+    epmc_provenance = models.CharField(max_length=30, blank=True, null=True)
+
+    # Comma-separated Cambridge fields whose property raised AttributeError (e.g. zd_publisher of nodes without
+    # a parent), which the API leaves out
+    unavailable_fields = models.CharField(max_length=300, blank=True, default='')
+
+    created = models.DateTimeField(auto_now_add=True)
+    updated = models.DateTimeField(auto_now=True, db_index=True)
+
+    # Computed fields of Node stored in this table
+    CAMBRIDGE_FIELDS = ['apollo_am_embargo_months', 'apollo_vor_embargo_months', 'zd_publisher',
+                        'zd_green_allowed_version', 'zd_embargo_duration', 'zd_green_licence', 'zd_journal_oa_status',
+                        'zd_apc_range', 'zd_gold_licence_options', 'zd_commitment_guidance', 'zd_deal',
+                        'zd_epmc_participation', 'zd_epmc_embargo_months', 'zd_epmc_open_licence',
+                        'zd_epmc_deposit_status']
+
+    def __str__(self):
+        return 'Resolved policies of {}'.format(self.node_id)
+
+    @staticmethod
+    def values_from_node(node):
+        '''
+        Calculates the values of all fields of this model for node
+        :return: a dictionary of field values
+        '''
+        values = {}
+        unavailable = []
+        for f in ResolvedPolicy.CAMBRIDGE_FIELDS:
+            try:
+                values[f] = getattr(node, f)
+            except AttributeError: # e.g. zd_publisher of nodes without a parent
+                values[f] = None
+                unavailable.append(f)
+        values['unavailable_fields'] = ','.join(unavailable)
+        if values['zd_gold_licence_options'] is not None:
+            values['zd_gold_licence_options'] = ','.join(values['zd_gold_licence_options'])
+
+        policies = [
+            ('oa_status', node.most_reliable_oa_status),
+            ('gold_policy', node.most_reliable_gold_policy),
+            ('green_preprint', node.most_reliable_green_policies_for_ir['Preprint']),
+            ('green_am', node.most_reliable_green_policies_for_ir['AM']),
+            ('green_vor', node.most_reliable_green_policies_for_ir['VoR']),
+            ('deal', node.most_reliable_deal),
+            ('epmc', node.most_reliable_epmc_policy),
+        ]
+        for prefix, policy in policies:
+            values['{}_id'.format(prefix)] = policy['id'] if policy else None
+            values['{}_provenance'.format(prefix)] = policy['provenance'] if policy else None
+        return values
+
+    def get_field_value(self, field_name):
+        '''
+        Value of a computed field of Node, as returned by the corresponding property
+        :raises AttributeError: if the property raised it
+        '''
+        if field_name in self.unavailable_fields.split(','):
+            raise AttributeError('{} is not available for node {}'.format(field_name, self.node_id))
+        value = getattr(self, field_name)
+        if (field_name == 'zd_gold_licence_options') and (value is not None):
+            return value.split(',')
+        return value
+
+class ChangeCounter(models.Model):
+    '''
+    Global counter incremented whenever data served by the API changes (see policies.signals); a single row.
+    Used to compute the validators of conditional API requests (see policies.conditional)
+    '''
+    value = models.BigIntegerField(default=0)
+    updated = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return 'Change {} ({})'.format(self.value, self.updated)
+
+    @classmethod
+    def current(cls):
+        return cls.objects.get_or_create(pk=1)[0]
+
+    @classmethod
+    def increment(cls):
+        if not cls.objects.filter(pk=1).update(value=F('value') + 1, updated=timezone.now()):
+            cls.objects.create(pk=1, value=1)
+
+class Tombstone(models.Model):
+    '''
+    Record of a deleted node, policy or source, so that the changes feed can report deletions
+    (see policies.changes). Created by signal handlers in policies/signals.py
+    '''
+    model = models.CharField(max_length=50)  # model_name of the deleted object, e.g. 'goldpolicy'
+    object_id = models.IntegerField()
+    deleted = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return '{} {} deleted on {}'.format(self.model, self.object_id, self.deleted)
+
+    class Meta:
+        indexes = [models.Index(fields=['deleted', 'id'], name='policies_tombstone_deleted_idx')]
+
+class CuratorialReport(models.Model):
+    '''
+    Status of a curatorial report: a set of nodes with data-quality problems (e.g. synonyms of synonyms),
+    computed by the refresh_curatorial_reports command (see policies.curation) and listed by curatorial views
+    '''
+    name = models.CharField(max_length=50, unique=True)
+    count = models.IntegerField(default=0)
+    started = models.DateTimeField(blank=True, null=True)
+    completed = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return '{} ({} nodes, {})'.format(self.name, self.count, self.completed)
+
+class CuratorialReportEntry(models.Model):
+    '''
+    Node listed by a curatorial report, at position rank
+    '''
+    report = models.ForeignKey(CuratorialReport, on_delete=models.CASCADE, related_name='entries')
+    node = models.ForeignKey(Node, on_delete=models.CASCADE, related_name='curatorial_report_entries')
+    rank = models.IntegerField()
+
+    def __str__(self):
+        return '{}: {}'.format(self.report_id, self.node_id)
+
+    class Meta:
+        indexes = [models.Index(fields=['report', 'rank'], name='policies_report_entry_rank_idx')]
+
+class ArchivedPolicy(models.Model):
+    '''
+    Superseded policy moved out of its table by the archive_superseded_policies command (see policies.archive):
+    a snapshot of the policy and its notes, serialized by django.core.serializers
+    '''
+    model = models.CharField(max_length=50)  # model_name of the policy, e.g. 'goldpolicy'
+    policy_id = models.IntegerField()
+    node = models.ForeignKey(Node, on_delete=models.PROTECT, related_name='archived_policies')
+    superseded_date = models.DateField(blank=True, null=True)
+    archived = models.DateTimeField(default=timezone.now)
+    data = models.TextField()
+
+    def __str__(self):
+        return '{} {} archived on {}'.format(self.model, self.policy_id, self.archived)
+
+    class Meta:
+        unique_together = ('model', 'policy_id')
+        indexes = [models.Index(fields=['node', 'model'], name='policies_archived_node_idx')]
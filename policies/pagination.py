@@ -0,0 +1,123 @@
+'''
+Pagination of API list views
+'''
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import LimitOffsetPagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+def encode_cursor(position):
+    '''
+    :param position: JSON-serializable list of values locating a row
+    :return: opaque, URL-safe cursor
+    '''
+    return urlsafe_b64encode(json.dumps(position).encode('utf-8')).decode('ascii')
+
+def decode_cursor(cursor):
+    '''
+    :return: position encoded by encode_cursor
+    :raise ValueError: if cursor is invalid
+    '''
+    try:
+        return json.loads(urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
+    except (TypeError, UnicodeError) as e:
+        raise ValueError(e)
+
+class KeysetPagination(LimitOffsetPagination):
+    '''
+    Limit/offset pagination, unless the request has a cursor parameter (?cursor= for the first page), in which
+    case pages are selected by keyset: rows are sorted by (ordering field, id) and each page starts after the
+    last row of the previous one, encoded in the cursor of the next link. Keyset pages cost the same
+    wherever they are in the table, as no OFFSET is used and rows are not counted.
+
+    The ordering parameter selects one of the keyset_orderings of the view (the first one by default); these
+    fields must be non-nullable and, for efficiency, indexed together with id.
+    Authenticated clients may request larger keyset pages than anonymous ones.
+    '''
+    cursor_query_param = 'cursor'
+    ordering_query_param = 'ordering'
+    keyset_max_limit = 500
+    keyset_max_authenticated_limit = 5000
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = self.cursor_query_param in request.query_params
+        if not self.keyset:
+            return super(KeysetPagination, self).paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.limit = self.get_keyset_limit(request)
+        self.ordering = self.get_keyset_ordering(request, view)
+        self.field = queryset.model._meta.get_field(self.ordering)
+        queryset = queryset.order_by(self.ordering, 'pk')
+        position = self.decode_cursor(request)
+        if position is not None:
+            value, pk = position
+            queryset = queryset.filter(Q(**{'{}__gt'.format(self.ordering): value}) |
+                                       Q(**{self.ordering: value, 'pk__gt': pk}))
+        page = list(queryset[:self.limit + 1])
+        self.has_next = len(page) > self.limit
+        page = page[:self.limit]
+        self.last = page[-1] if page else None
+        return page
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super(KeysetPagination, self).get_paginated_response(data)
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('results', data)
+        ]))
+
+    def get_keyset_limit(self, request):
+        if request.user and request.user.is_authenticated:
+            cutoff = self.keyset_max_authenticated_limit
+        else:
+            cutoff = self.keyset_max_limit
+        try:
+            return _positive_int(request.query_params[self.limit_query_param], strict=True, cutoff=cutoff)
+        except (KeyError, ValueError):
+            return min(self.default_limit, cutoff)
+
+    def get_keyset_ordering(self, request, view):
+        orderings = getattr(view, 'keyset_orderings', ['id'])
+        ordering = request.query_params.get(self.ordering_query_param, orderings[0])
+        if ordering not in orderings:
+            raise NotFound('Invalid ordering; use one of: {}'.format(', '.join(orderings)))
+        return ordering
+
+    def decode_cursor(self, request):
+        '''
+        :return: the (ordering field value, id) pair of the last row of the previous page, or None
+        '''
+        encoded = request.query_params[self.cursor_query_param]
+        if not encoded:
+            return None
+        try:
+            value, pk = decode_cursor(encoded)
+            return self.field.to_python(value), int(pk)
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, obj):
+        return encode_cursor([self.field.value_to_string(obj), obj.pk])
+
+    def get_next_link(self):
+        if not self.keyset:
+            return super(KeysetPagination, self).get_next_link()
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.limit_query_param, self.limit)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.last))
+
+    def get_previous_link(self):
+        if self.keyset:
+            return None
+        return super(KeysetPagination, self).get_previous_link()
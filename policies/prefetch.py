@@ -0,0 +1,71 @@
+'''
+Query plans derived from serializers: the select_related and prefetch_related calls needed to serialize a
+queryset with a constant number of queries, whatever the number of objects.
+
+Serializer fields are walked recursively: nested serializers and related fields following a forward foreign
+key (or a one-to-one relation) are joined with select_related, while those following a reverse foreign key or
+a many-to-many relation are fetched with a Prefetch whose queryset carries the plan of the nested serializer.
+Primary key related fields of foreign keys need no query, as they are read from the local column.
+'''
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+
+class Plan(object):
+    def __init__(self):
+        self.select_related = []
+        self.prefetch_related = []
+
+    def apply(self, queryset):
+        if self.select_related:
+            queryset = queryset.select_related(*self.select_related)
+        if self.prefetch_related:
+            queryset = queryset.prefetch_related(*self.prefetch_related)
+        return queryset
+
+def relation(model, field):
+    '''
+    :return: the model field a serializer field is read from, if it is a relation
+    '''
+    if len(field.source_attrs) != 1:
+        return None
+    try:
+        model_field = model._meta.get_field(field.source_attrs[0])
+    except FieldDoesNotExist:
+        return None
+    return model_field if model_field.is_relation else None
+
+def build_plan(serializer, prefix='', plan=None):
+    '''
+    :param serializer: a ModelSerializer instance
+    :param prefix: lookup path of the objects serialized by serializer, relative to the planned queryset
+    '''
+    plan = plan or Plan()
+    model = serializer.Meta.model
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+        model_field = relation(model, field)
+        if model_field is None:
+            continue
+        path = prefix + field.source_attrs[0]
+        single = not (model_field.many_to_many or model_field.one_to_many)
+        if isinstance(field, serializers.ListSerializer) and not single:
+            related = field.child.Meta.model
+            queryset = build_plan(field.child).apply(related._default_manager.all())
+            plan.prefetch_related.append(Prefetch(path, queryset=queryset))
+        elif isinstance(field, serializers.ManyRelatedField) and not single:
+            plan.prefetch_related.append(path)
+        elif single and isinstance(field, serializers.ModelSerializer):
+            plan.select_related.append(path)
+            build_plan(field, path + '__', plan)
+        elif single and isinstance(field, serializers.RelatedField) \
+                and not isinstance(field, serializers.PrimaryKeyRelatedField):
+            plan.select_related.append(path)
+    return plan
+
+def apply_plan(queryset, serializer):
+    '''
+    :return: queryset with the related objects needed by serializer fetched in bulk
+    '''
+    return build_plan(serializer).apply(queryset)
@@ -0,0 +1,192 @@
+'''
+Set-based deletion of content (nodes, policies and the rows depending on them), for re-running a connector or
+starting over (see the purge_content and reset_content commands).
+
+QuerySet.delete() makes the Django collector load every object and the objects depending on it (e.g. notes) to
+cascade deletions and send signals, which takes hours and gigabytes of memory on a full database. Here each
+table is cleared by a single DELETE (or, when resetting on PostgreSQL, a single TRUNCATE of all tables), dependent
+tables first, in one transaction. Work otherwise done by signal handlers is done once at the end: tombstones for
+the changes feed, search index, ResolvedPolicy rows of remaining nodes, API cache and change counter.
+'''
+from django.db import connection, transaction
+from django.db.models import Q
+
+from . import cache
+from . import models
+from .changes import TRACKED_MODELS
+from .resolvers import dependent_node_ids, refresh_resolved_policies
+from .search import get_search_backend
+
+# Policy models with a source, and models only depending on nodes
+SOURCED_POLICY_MODELS = [models.OaStatus, models.GoldPolicy, models.GreenPolicy, models.Epmc, models.Deal,
+                         models.RetrospectiveOaPolicy]
+NODE_MODELS = [models.Contact, models.NodeIdentifier, models.ResolvedPolicy, models.CuratorialReportEntry,
+               models.ArchivedPolicy]
+
+# Foreign key of Note to each policy model
+NOTE_FIELDS = [('oastatus', models.OaStatus), ('goldpolicy', models.GoldPolicy), ('greenpolicy', models.GreenPolicy),
+               ('retrospective_oa_policy', models.RetrospectiveOaPolicy)]
+
+# Tables emptied by reset, dependent tables first. Sources and tags (licences, outlets, etc.) are kept.
+RESET_MODELS = [f.remote_field.through for m in SOURCED_POLICY_MODELS + [models.Contact]
+                for f in m._meta.many_to_many] + [models.Note] + SOURCED_POLICY_MODELS + NODE_MODELS + \
+    [models.CuratorialReport, models.NodeAncestor, models.Tombstone, models.Node]
+
+def raw_delete(queryset):
+    '''
+    Deletes the rows of queryset with a single DELETE, without loading them, cascading or sending signals
+    :return: number of rows deleted
+    '''
+    return queryset._raw_delete(queryset.db)
+
+class PurgeScope(object):
+    '''
+    Nodes and policies deleted by purge. Nodes are deleted with their descendants (children, synonyms, etc.; see
+    NodeAncestor) and with everything attached to them, including policies from other sources.
+    '''
+    def __init__(self, sources=(), node_types=(), policies_only=False):
+        '''
+        :param sources: ids of sources whose nodes and policies are deleted
+        :param node_types: types of the nodes deleted, or whose policies are deleted
+        :param policies_only: keep nodes and delete policies only
+        If neither sources nor node_types are given, all nodes (unless policies_only) and policies are deleted.
+        '''
+        self.sources = list(sources)
+        self.node_types = list(node_types)
+        self.policies_only = policies_only
+
+    def selected_nodes(self):
+        queryset = models.Node.objects.all()
+        if self.sources:
+            queryset = queryset.filter(source__in=self.sources)
+        if self.node_types:
+            queryset = queryset.filter(type__in=self.node_types)
+        return queryset
+
+    def nodes(self):
+        '''
+        :return: queryset of the nodes to delete
+        '''
+        if self.policies_only:
+            return models.Node.objects.none()
+        if not (self.sources or self.node_types):
+            return models.Node.objects.all()
+        selected = self.selected_nodes().values('id')
+        descendants = models.NodeAncestor.objects.filter(ancestor__in=selected, relation=models.NodeAncestor.ANY)
+        return models.Node.objects.filter(Q(id__in=selected) | Q(id__in=descendants.values('descendant')))
+
+    def policies(self, model):
+        '''
+        :return: queryset of the policies of model to delete
+        '''
+        selected = Q()
+        if self.node_types:
+            selected &= Q(node__in=self.selected_nodes().values('id'))
+        if self.sources and model in SOURCED_POLICY_MODELS:
+            selected &= Q(source__in=self.sources)
+        if self.policies_only:
+            return model.objects.filter(selected) if model in SOURCED_POLICY_MODELS else model.objects.none()
+        linked = Q(node__in=self.nodes().values('id'))
+        if self.sources and model in SOURCED_POLICY_MODELS:
+            linked |= selected
+        return model.objects.filter(linked)
+
+    def steps(self):
+        '''
+        :return: list of (model, queryset) of the rows to delete, in deletion order. Querysets are subqueries,
+            which may only depend on rows deleted by later steps.
+        '''
+        policy_models = SOURCED_POLICY_MODELS + [models.Contact]
+        steps = []
+        for model in policy_models:
+            for field in model._meta.many_to_many:
+                through = field.remote_field.through
+                steps.append((through, through.objects.filter(
+                    **{'{}__in'.format(field.m2m_field_name()): self.policies(model).values('id')})))
+        notes = Q(node__in=self.nodes().values('id'))
+        for field, model in NOTE_FIELDS:
+            notes |= Q(**{'{}__in'.format(field): self.policies(model).values('id')})
+        steps.append((models.Note, models.Note.objects.filter(notes)))
+        steps += [(model, self.policies(model)) for model in policy_models]
+        steps += [(model, model.objects.filter(node__in=self.nodes().values('id'))) for model in NODE_MODELS
+                  if model is not models.Contact]
+        steps.append((models.NodeAncestor,
+                      models.NodeAncestor.objects.filter(descendant__in=self.nodes().values('id'))))
+        steps.append((models.Node, self.nodes()))
+        return steps
+
+    def count(self):
+        '''
+        :return: list of (model, number of rows to delete), in deletion order
+        '''
+        return [(model, queryset.count()) for model, queryset in self.steps()]
+
+def record_tombstones(model, queryset, batch_size=1000):
+    ids = queryset.values_list('id', flat=True).iterator()
+    batch = []
+    for object_id in ids:
+        batch.append(models.Tombstone(model=model._meta.model_name, object_id=object_id))
+        if len(batch) >= batch_size:
+            models.Tombstone.objects.bulk_create(batch)
+            batch = []
+    models.Tombstone.objects.bulk_create(batch)
+
+def purge(scope):
+    '''
+    Deletes the nodes and policies of scope in a transaction, then refreshes the ResolvedPolicy rows of the
+    remaining nodes depending on them
+    :return: list of (model, number of rows deleted), in deletion order
+    '''
+    deleted = []
+    with transaction.atomic():
+        # Nodes whose most reliable policies may change, and deleted nodes to remove from the search index
+        affected = set()
+        for model in SOURCED_POLICY_MODELS:
+            affected.update(scope.policies(model).values_list('node_id', flat=True).distinct())
+        for parent_id, synonym_of_id in scope.nodes().values_list('parent_id', 'synonym_of_id'):
+            affected.update([parent_id, synonym_of_id])
+        node_ids = list(scope.nodes().values_list('id', flat=True))
+
+        # Rows to delete are selected through other tables (e.g. descendants through NodeAncestor), so tombstones
+        # are recorded before any of them is emptied
+        for model, queryset in scope.steps():
+            if model in TRACKED_MODELS:
+                record_tombstones(model, queryset)
+        for model, queryset in scope.steps():
+            if (model in [models.Node, models.NodeAncestor]) and (scope.sources or scope.node_types):
+                # The nodes of a partial purge are selected through these tables, and SQLite evaluates subqueries
+                # on a table while deleting from it, so rows are deleted by id
+                field = 'descendant_id' if model is models.NodeAncestor else 'id'
+                deleted.append((model, sum(raw_delete(model.objects.filter(**{field + '__in': node_ids[i:i + 500]}))
+                                           for i in range(0, len(node_ids), 500))))
+            else:
+                deleted.append((model, raw_delete(queryset)))
+
+        get_search_backend().remove(node_ids)
+        refresh_resolved_policies(dependent_node_ids(affected))
+        models.ChangeCounter.increment()
+    cache.invalidate('all')
+    return deleted
+
+def reset_count():
+    return [(model, model.objects.count()) for model in RESET_MODELS]
+
+def reset():
+    '''
+    Deletes all nodes, policies, notes, contacts and the rows derived from them, including tombstones: clients
+    of the changes feed must download everything again
+    :return: list of (model, number of rows deleted), in deletion order
+    '''
+    counts = reset_count()
+    with transaction.atomic():
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('TRUNCATE {}'.format(', '.join(
+                    connection.ops.quote_name(m._meta.db_table) for m in RESET_MODELS)))
+        else:
+            for model in RESET_MODELS:
+                raw_delete(model.objects.all())
+        get_search_backend().rebuild()
+        models.ChangeCounter.increment()
+    cache.invalidate('all')
+    return counts
@@ -0,0 +1,159 @@
+from collections import defaultdict
+from itertools import chain
+
+from django.db.models import Q
+
+from . import models
+from .cascades import preferred_name_id, stage_number, PREFERRED_NAME, SYNONYM, PARENT, SYNONYM_PARENT
+
+class PolicyResolver(object):
+    '''
+    Calculates the most reliable OA status, gold policy, green policies, deal and EPMC policy
+    of many nodes at once.
+
+    Synonyms, parents and the eligible policies of all five types are loaded for the whole batch with a
+    constant number of queries; each policy cascade (see policies.cascades) is then run in memory.
+    Results are identical to those of the most_reliable_* properties of Node, including provenance.
+    '''
+
+    def __init__(self, nodes, fields=None):
+        '''
+        :param nodes: a queryset or list of Node instances
+        :param fields: names of the most_reliable_* properties to resolve (see Node.policy_dependencies);
+            by default, all of them
+        '''
+        self.nodes = list(nodes)
+        self.fields = list(models.POLICY_CASCADES) if fields is None else list(fields)
+        self.synonyms = defaultdict(list)
+        self.synonym_parents = defaultdict(set)
+        self.name_order = {}
+        self.policies = {}
+
+    def load(self):
+        '''
+        Fetches synonyms and policies of all nodes in the batch
+        '''
+        preferred_ids = set(preferred_name_id(n) for n in self.nodes)
+        members = models.Node.objects.filter(Q(id__in=preferred_ids) | Q(synonym_of__in=preferred_ids))\
+            .only('id', 'name', 'synonym_of', 'parent')
+        for m in members:
+            for preferred_id in set([m.id, m.synonym_of_id]) & preferred_ids:
+                if m.id != preferred_id:
+                    self.synonyms[preferred_id].append(m.id)
+                if m.parent_id:
+                    self.synonym_parents[preferred_id].add(m.parent_id)
+        # Rank parents of synonyms by name, as the database would
+        parent_ids = set(chain(*self.synonym_parents.values()))
+        if parent_ids:
+            ordered = models.Node.objects.filter(id__in=parent_ids).order_by('name').values_list('id', flat=True)
+            self.name_order = dict((node_id, i) for i, node_id in enumerate(ordered))
+
+        node_ids = set(preferred_ids)
+        node_ids.update(n.parent_id for n in self.nodes if n.parent_id)
+        for synonym_ids in self.synonyms.values():
+            node_ids.update(synonym_ids)
+        node_ids.update(parent_ids)
+
+        for field in self.fields:
+            by_node = defaultdict(list)
+            for p in models.POLICY_CASCADES[field].policies().filter(node__in=node_ids):
+                by_node[p.node_id].append(p)
+            self.policies[field] = by_node
+
+    def candidates(self, node, field):
+        '''
+        Policies available to node, ranked as by the candidates method of the corresponding cascade
+        :return: a list of (stage, policy) tuples
+        '''
+        by_node = self.policies[field]
+        preferred_id = preferred_name_id(node)
+        linked = [(PREFERRED_NAME, 0, preferred_id)]
+        linked += [(SYNONYM, i, s) for i, s in enumerate(self.synonyms[preferred_id])]
+        if node.parent_id:
+            linked.append((PARENT, 0, node.parent_id))
+        already_linked = set(node_id for tier, position, node_id in linked)
+        linked += [(SYNONYM_PARENT, self.name_order[i], i) for i in self.synonym_parents[preferred_id]
+                   if i not in already_linked]
+        candidates = [(tier, position, stage_number(tier, p.vetted), p)
+                      for tier, position, node_id in linked for p in by_node[node_id]]
+        candidates.sort(key=models.POLICY_CASCADES[field].sort_key)  # stable, keeps the default policy ordering
+        return [(stage, p) for tier, position, stage, p in candidates]
+
+    def resolve(self):
+        '''
+        :return: a dictionary mapping the id of each node to a dictionary of its most reliable policies,
+            keyed by the name of the corresponding Node property
+        '''
+        if not (self.nodes and self.fields):
+            return dict((n.id, {}) for n in self.nodes)
+        self.load()
+        resolved = {}
+        for n in self.nodes:
+            resolved[n.id] = dict((field, models.POLICY_CASCADES[field].pick(self.candidates(n, field)))
+                                  for field in self.fields)
+        return resolved
+
+    def attach(self):
+        '''
+        Resolves policies and stores them in each node, so that the most_reliable_* properties (and
+        all computed API fields depending on them) no longer query the database
+        :return: the list of nodes
+        '''
+        resolved = self.resolve()
+        for n in self.nodes:
+            n.set_resolved_policies(resolved[n.id])
+        return self.nodes
+
+def dependent_node_ids(node_ids):
+    '''
+    Ids of nodes whose most reliable policies or computed API fields may change when the given nodes
+    (or policies attached to them) change: the nodes themselves, their synonyms and children, the
+    synonyms of their children, every member of the synonym groups they belong to, and every member of
+    the synonym groups containing one of their children.
+    :param node_ids: an iterable of node ids
+    :return: a set of node ids
+    '''
+    node_ids = set(i for i in node_ids if i is not None)
+    if not node_ids:
+        return set()
+    preferred_ids = models.Node.objects.filter(id__in=node_ids, synonym_of__isnull=False).values('synonym_of')
+    child_preferred_ids = models.Node.objects.filter(parent__in=node_ids, synonym_of__isnull=False)\
+        .values('synonym_of')
+    dependents = models.Node.objects.filter(
+        Q(id__in=node_ids) | Q(synonym_of__in=node_ids) | Q(parent__in=node_ids) |
+        Q(synonym_of__parent__in=node_ids) | Q(id__in=preferred_ids) | Q(synonym_of__in=preferred_ids) |
+        Q(id__in=child_preferred_ids) | Q(synonym_of__in=child_preferred_ids)
+    )
+    return set(dependents.values_list('id', flat=True))
+
+def refresh_resolved_policies(node_ids=None, batch_size=500):
+    '''
+    Recomputes the ResolvedPolicy rows of the given nodes. Rows are only written when
+    their content changed.
+    :param node_ids: an iterable of node ids; if None, rows of all nodes are recomputed
+    :param batch_size: number of nodes resolved at once
+    :return: number of rows created or updated
+    '''
+    if node_ids is None:
+        node_ids = models.Node.objects.order_by('id').values_list('id', flat=True)
+    node_ids = list(node_ids)
+    written = 0
+    for i in range(0, len(node_ids), batch_size):
+        nodes = models.Node.objects.filter(id__in=node_ids[i:i + batch_size])\
+            .select_related('parent', 'synonym_of__parent')
+        nodes = PolicyResolver(nodes).attach()
+        existing = models.ResolvedPolicy.objects.in_bulk([n.id for n in nodes])
+        new_rows = []
+        for n in nodes:
+            values = models.ResolvedPolicy.values_from_node(n)
+            row = existing.get(n.id)
+            if row is None:
+                new_rows.append(models.ResolvedPolicy(node=n, **values))
+            elif any(getattr(row, k) != v for k, v in values.items()):
+                for k, v in values.items():
+                    setattr(row, k, v)
+                row.save()
+                written += 1
+        models.ResolvedPolicy.objects.bulk_create(new_rows)
+        written += len(new_rows)
+    return written
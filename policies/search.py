@@ -0,0 +1,284 @@
+'''
+Ranked, typo-tolerant search of node names, used by list views and autocompletes.
+
+Search backends (see get_search_backend) match queries against Node.normalized_name:
+    - PostgresSearchBackend: pg_trgm similarity and full text search (tsvector), served by GIN indexes
+    - SqliteSearchBackend: an FTS5 trigram table, for local and development databases
+    - BasicSearchBackend: substring matching, for other databases (and PostgreSQL without pg_trgm)
+All of them also match names starting with the query, so that they can be used by autocompletes, and rank
+results by prefix match and then by trigram similarity to the query. Queries looking like an ISSN are looked
+up in NodeIdentifier instead (see search_nodes).
+
+The backend can be overridden with the ORPHEUS_SEARCH_BACKEND setting (dotted path to a backend class).
+'''
+import re
+from collections import OrderedDict
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connection as default_connection, connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+from . import models
+
+ISSN_PATTERN = re.compile(r'^\s*[0-9]{4}-?[0-9]{3}[0-9Xx]\s*$')
+
+# Minimum trigram similarity of fuzzy matches (the default similarity threshold of pg_trgm)
+SIMILARITY_THRESHOLD = 0.3
+
+def trigrams(text):
+    '''
+    Trigrams of text, as extracted by pg_trgm: words are padded with two spaces before and one after
+    '''
+    grams = set()
+    for word in re.findall(r'\w+', (text or '').lower()):
+        word = '  {} '.format(word)
+        grams.update(word[i:i + 3] for i in range(len(word) - 2))
+    return grams
+
+def trigram_similarity(a, b):
+    '''
+    Similarity of two strings, as calculated by the similarity function of pg_trgm
+    '''
+    a, b = trigrams(a), trigrams(b)
+    if not (a and b):
+        return 0.0
+    return len(a & b) / float(len(a | b))
+
+def like_prefix(text):
+    '''
+    LIKE pattern matching strings starting with text (to be used with ESCAPE '\\')
+    '''
+    return re.sub(r'([\\%_])', r'\\\1', text) + '%'
+
+class BaseSearchBackend(object):
+    '''
+    Interface of search backends; also used as is for databases without search indexes
+    '''
+    def __init__(self, connection=None):
+        self.connection = connection or default_connection
+        self.table = self.connection.ops.quote_name(models.Node._meta.db_table)
+
+    def column(self, name):
+        return '{}.{}'.format(self.table, self.connection.ops.quote_name(name))
+
+    def install(self):
+        '''
+        Creates the search index and fills it with existing nodes
+        '''
+
+    def rebuild(self):
+        '''
+        Rebuilds the search index from scratch
+        '''
+
+    def update(self, nodes):
+        '''
+        Refreshes the index entries of the given nodes, after they were created or modified
+        '''
+
+    def remove(self, node_ids):
+        '''
+        Removes the index entries of deleted nodes
+        '''
+
+    def match(self, query):
+        '''
+        :param query: normalised query (see models.normalize_name)
+        :return: a tuple of SQL WHERE clause selecting matching nodes and its parameters
+        '''
+        raise NotImplementedError
+
+    def similarity(self, query):
+        '''
+        :return: a tuple of SQL expression ranking nodes by similarity to query and its parameters
+        '''
+        raise NotImplementedError
+
+    def search(self, queryset, text):
+        '''
+        :param queryset: queryset of nodes to search
+        :param text: query entered by the user
+        :return: queryset of matching nodes, best matches first
+        '''
+        query = models.normalize_name(text)
+        if not query:
+            return queryset.none()
+        where, params = self.match(query)
+        return self.rank(queryset.extra(where=[where], params=params), text)
+
+    def rank(self, queryset, text):
+        '''
+        Orders queryset by relevance to text, without filtering it
+        '''
+        query = models.normalize_name(text)
+        similarity, similarity_params = self.similarity(query)
+        return queryset.extra(
+            select=OrderedDict([
+                ('search_prefix_match', "CASE WHEN {} LIKE %s ESCAPE '\\' THEN 1 ELSE 0 END"
+                    .format(self.column('normalized_name'))),
+                ('search_rank', similarity),
+            ]),
+            select_params=[like_prefix(query)] + similarity_params,
+        ).order_by('-search_prefix_match', '-search_rank', 'name')
+
+class BasicSearchBackend(BaseSearchBackend):
+    '''
+    Nodes whose name starts with the query or contains all of its words. No index is used, and
+    typos are not tolerated
+    '''
+    def match(self, query):
+        words = query.split()
+        where = ' AND '.join(["{} LIKE %s ESCAPE '\\'".format(self.column('normalized_name'))] * len(words))
+        return ('({})'.format(where), ['%' + like_prefix(w) for w in words])
+
+    def rank(self, queryset, text):
+        query = models.normalize_name(text)
+        return queryset.extra(
+            select={'search_prefix_match': "CASE WHEN {} LIKE %s ESCAPE '\\' THEN 1 ELSE 0 END"
+                .format(self.column('normalized_name'))},
+            select_params=[like_prefix(query)],
+        ).order_by('-search_prefix_match', 'name')
+
+class PostgresSearchBackend(BaseSearchBackend):
+    '''
+    Nodes whose name starts with the query (served by the varchar_pattern_ops index on normalized_name), is
+    similar to it (pg_trgm % operator) or contains all of its words (full text search); the last two are
+    served by GIN indexes created by install (and by migration 0045, unless the pg_trgm extension could not be
+    installed: this may require a superuser).
+    '''
+    TRIGRAM_INDEX = 'policies_node_normalized_name_trgm'
+    FULL_TEXT_INDEX = 'policies_node_normalized_name_tsv'
+
+    def tsvector(self):
+        return "to_tsvector('simple', {})".format(self.column('normalized_name'))
+
+    def install(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+            cursor.execute('CREATE INDEX IF NOT EXISTS {} ON {} USING gin ({} gin_trgm_ops)'.format(
+                self.TRIGRAM_INDEX, self.table, self.column('normalized_name')))
+            cursor.execute('CREATE INDEX IF NOT EXISTS {} ON {} USING gin (({}))'.format(
+                self.FULL_TEXT_INDEX, self.table, self.tsvector()))
+
+    def rebuild(self):
+        # Both indexes are maintained by PostgreSQL; rebuilding only removes bloat
+        with self.connection.cursor() as cursor:
+            cursor.execute('REINDEX INDEX {}'.format(self.TRIGRAM_INDEX))
+            cursor.execute('REINDEX INDEX {}'.format(self.FULL_TEXT_INDEX))
+
+    def match(self, query):
+        name = self.column('normalized_name')
+        where = "({name} LIKE %s ESCAPE '\\' OR {name} %% %s OR {tsvector} @@ plainto_tsquery('simple', %s))"\
+            .format(name=name, tsvector=self.tsvector())
+        return where, [like_prefix(query), query, query]
+
+    def similarity(self, query):
+        return 'similarity({}, %s)'.format(self.column('normalized_name')), [query]
+
+class SqliteSearchBackend(BaseSearchBackend):
+    '''
+    Nodes whose name starts with the query, contains all of its words or is similar to it (same trigram
+    similarity as pg_trgm, calculated by a Python function). Candidates are selected using an FTS5 table
+    with the trigram tokenizer (SQLite >= 3.34), which is updated by signal handlers when nodes are saved.
+    '''
+    TABLE = 'policies_node_search'
+
+    def install(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute("CREATE VIRTUAL TABLE IF NOT EXISTS {} USING fts5(normalized_name, tokenize='trigram')"
+                           .format(self.TABLE))
+        self.rebuild()
+
+    def rebuild(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute('DELETE FROM {}'.format(self.TABLE))
+            cursor.execute('INSERT INTO {} (rowid, normalized_name) SELECT id, normalized_name FROM {}'
+                           .format(self.TABLE, self.table))
+
+    def update(self, nodes):
+        nodes = list(nodes)
+        self.remove([n.id for n in nodes])
+        with self.connection.cursor() as cursor:
+            cursor.executemany('INSERT INTO {} (rowid, normalized_name) VALUES (%s, %s)'.format(self.TABLE),
+                               [(n.id, n.normalized_name) for n in nodes])
+
+    def remove(self, node_ids):
+        with self.connection.cursor() as cursor:
+            cursor.executemany('DELETE FROM {} WHERE rowid = %s'.format(self.TABLE), [(i,) for i in node_ids])
+
+    def fts_query(self, terms, operator):
+        return ' {} '.format(operator).join('"{}"'.format(t.replace('"', '""')) for t in terms)
+
+    def match(self, query):
+        name = self.column('normalized_name')
+        clauses = ["{} LIKE %s ESCAPE '\\'".format(name)]
+        params = [like_prefix(query)]
+        subquery = '{} IN (SELECT rowid FROM {} WHERE {} MATCH %s)'.format(self.column('id'), self.TABLE, self.TABLE)
+        words = [w for w in query.split() if len(w) >= 3]  # shorter words are not indexed
+        if words:
+            clauses.append(subquery)
+            params.append(self.fts_query(words, 'AND'))
+        grams = sorted(g for g in trigrams(query) if ' ' not in g)
+        if grams:
+            clauses.append('({} AND orpheus_similarity({}, %s) >= %s)'.format(subquery, name))
+            params += [self.fts_query(grams, 'OR'), query, SIMILARITY_THRESHOLD]
+        return '({})'.format(' OR '.join(clauses)), params
+
+    def similarity(self, query):
+        return 'orpheus_similarity({}, %s)'.format(self.column('normalized_name')), [query]
+
+@receiver(connection_created, dispatch_uid='orpheus_sqlite_similarity')
+def register_sqlite_functions(sender, connection, **kwargs):
+    if connection.vendor == 'sqlite':
+        connection.connection.create_function('orpheus_similarity', 2, trigram_similarity)
+
+@lru_cache()
+def sqlite_has_fts5(alias):
+    '''
+    Whether the SQLite library of a database supports FTS5 with the trigram tokenizer; checked once per database,
+    since backends are looked up on every node save
+    '''
+    connection = connections[alias]
+    if connection.Database.sqlite_version_info < (3, 34, 0):
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA compile_options')
+        options = [row[0] for row in cursor.fetchall()]
+    return 'ENABLE_FTS5' in options
+
+@lru_cache()
+def postgres_has_trigrams(alias):
+    '''
+    Whether the pg_trgm extension is installed in a PostgreSQL database, which migration 0045 may have failed to
+    do; checked once per database (restart after installing it)
+    '''
+    with connections[alias].cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        return cursor.fetchone() is not None
+
+def get_search_backend(connection=None, install=False):
+    '''
+    :param install: whether the backend is wanted to install its index, in which case the PostgreSQL backend is
+        returned even if pg_trgm is missing (installing creates it)
+    :return: search backend suitable for connection (by default, the default database)
+    '''
+    connection = connection or default_connection
+    backend_path = getattr(settings, 'ORPHEUS_SEARCH_BACKEND', None)
+    if backend_path:
+        return import_string(backend_path)(connection)
+    if connection.vendor == 'postgresql' and (install or postgres_has_trigrams(connection.alias)):
+        return PostgresSearchBackend(connection)
+    if connection.vendor == 'sqlite' and sqlite_has_fts5(connection.alias):
+        return SqliteSearchBackend(connection)
+    return BasicSearchBackend(connection)
+
+def search_nodes(queryset, text):
+    '''
+    Nodes of queryset matching text (an ISSN or a name), best matches first
+    '''
+    if ISSN_PATTERN.match(text):
+        return queryset.filter(models.issn_lookup(text)).order_by('name')
+    return get_search_backend().search(queryset, text)
@@ -1,5 +1,8 @@
+from django.db.models import Manager
 from rest_framework import serializers
+from rest_framework.fields import SkipField
 from . import models
+from .resolvers import PolicyResolver
 
 # class OutletSerializer(serializers.ModelSerializer):
 #     class Meta:
@@ -92,7 +95,72 @@ class NodeSimpleSerializer(serializers.ModelSerializer):
         model = models.Node
         fields = '__all__'
 
-class NodeSummarySerializer(serializers.ModelSerializer):
+class SparseFieldsMixin(object):
+    '''
+    Restricts the fields of a serializer to those listed in the fields query parameter of the request, if any,
+    minus those listed in its omit parameter (both comma-separated), so that unrequested computed fields are
+    not evaluated
+    '''
+    def __init__(self, *args, **kwargs):
+        super(SparseFieldsMixin, self).__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is None:
+            return
+        wanted = request.query_params.get('fields')
+        omitted = request.query_params.get('omit')
+        if wanted:
+            wanted = set(f.strip() for f in wanted.split(','))
+            for f in set(self.fields) - wanted:
+                self.fields.pop(f)
+        if omitted:
+            for f in set(f.strip() for f in omitted.split(',')) & set(self.fields):
+                self.fields.pop(f)
+
+    def policy_dependencies(self):
+        '''
+        :return: the most reliable policies needed by the remaining fields (see Node.policy_dependencies)
+        '''
+        return models.Node.policy_dependencies(self.fields)
+
+class ResolvedNodeListSerializer(serializers.ListSerializer):
+    '''
+    List serializer resolving the most reliable policies of all nodes in a page at once,
+    instead of once per node and computed field. Only the policies needed by the fields of the child
+    serializer are resolved.
+    '''
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, Manager) else data
+        nodes = list(iterable)
+        PolicyResolver(self.nodes_to_resolve(nodes), self.child.policy_dependencies()).attach()
+        return super(ResolvedNodeListSerializer, self).to_representation(nodes)
+
+    def nodes_to_resolve(self, nodes):
+        return nodes
+
+class CambridgeListSerializer(ResolvedNodeListSerializer):
+    '''
+    Cambridge fields are read from ResolvedPolicy rows when available (see ResolvedPolicyField), so
+    only nodes without a row need resolving
+    '''
+    def nodes_to_resolve(self, nodes):
+        return [n for n in nodes if getattr(n, 'resolved_policy', None) is None]
+
+class ResolvedPolicyField(serializers.ReadOnlyField):
+    '''
+    Read-only field for computed fields of Node that are also stored in ResolvedPolicy. The stored
+    value is used when the node has a ResolvedPolicy row; otherwise the Node property is evaluated. Either way,
+    fields whose property raises AttributeError are skipped.
+    '''
+    def get_attribute(self, instance):
+        resolved = getattr(instance, 'resolved_policy', None)
+        if resolved is not None:
+            try:
+                return resolved.get_field_value(self.source)
+            except AttributeError:
+                raise SkipField()
+        return super(ResolvedPolicyField, self).get_attribute(instance)
+
+class NodeSummarySerializer(SparseFieldsMixin, serializers.ModelSerializer):
 
     most_reliable_oa_status = serializers.ReadOnlyField()
     most_reliable_green_policies_for_ir = serializers.ReadOnlyField()
@@ -103,27 +171,28 @@ class NodeSummarySerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'name_status', 'type', 'url', 'issn', 'eissn', 'synonym_of', 'parent', 'source',
                   'vetted', 'vetted_date', 'created', 'updated',
                   'most_reliable_oa_status', 'most_reliable_green_policies_for_ir', 'most_reliable_gold_policy']
+        list_serializer_class = ResolvedNodeListSerializer
 
-class CambridgeSerializer(serializers.ModelSerializer):
+class CambridgeSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     '''
     Personalised serializer for Apollo/ZD integration
     '''
 
-    apollo_am_embargo_months = serializers.ReadOnlyField()
-    apollo_vor_embargo_months = serializers.ReadOnlyField()
-    zd_publisher = serializers.ReadOnlyField()
-    zd_green_allowed_version = serializers.ReadOnlyField()
-    zd_embargo_duration = serializers.ReadOnlyField()
-    zd_green_licence = serializers.ReadOnlyField()
-    zd_journal_oa_status = serializers.ReadOnlyField()
-    zd_apc_range = serializers.ReadOnlyField()
-    zd_gold_licence_options = serializers.ReadOnlyField()
-    zd_commitment_guidance = serializers.ReadOnlyField()
-    zd_deal = serializers.ReadOnlyField()
-    zd_epmc_participation = serializers.ReadOnlyField()
-    zd_epmc_embargo_months = serializers.ReadOnlyField()
-    zd_epmc_open_licence = serializers.ReadOnlyField()
-    zd_epmc_deposit_status = serializers.ReadOnlyField()
+    apollo_am_embargo_months = ResolvedPolicyField()
+    apollo_vor_embargo_months = ResolvedPolicyField()
+    zd_publisher = ResolvedPolicyField()
+    zd_green_allowed_version = ResolvedPolicyField()
+    zd_embargo_duration = ResolvedPolicyField()
+    zd_green_licence = ResolvedPolicyField()
+    zd_journal_oa_status = ResolvedPolicyField()
+    zd_apc_range = ResolvedPolicyField()
+    zd_gold_licence_options = ResolvedPolicyField()
+    zd_commitment_guidance = ResolvedPolicyField()
+    zd_deal = ResolvedPolicyField()
+    zd_epmc_participation = ResolvedPolicyField()
+    zd_epmc_embargo_months = ResolvedPolicyField()
+    zd_epmc_open_licence = ResolvedPolicyField()
+    zd_epmc_deposit_status = ResolvedPolicyField()
     romeo_url = serializers.ReadOnlyField()
     preferred_name = serializers.ReadOnlyField()
 
@@ -134,6 +203,25 @@ class CambridgeSerializer(serializers.ModelSerializer):
                   'zd_journal_oa_status', 'zd_apc_range', 'zd_gold_licence_options', 'zd_commitment_guidance',
                   'zd_deal', 'zd_epmc_participation', 'zd_epmc_embargo_months', 'zd_epmc_open_licence',
                   'zd_epmc_deposit_status', 'romeo_url']
+        list_serializer_class = CambridgeListSerializer
+
+class CambridgeBulkQuerySerializer(serializers.Serializer):
+    '''
+    Body of POST requests to the bulk Cambridge API: lists of ISSNs and/or names to look up
+    '''
+    MAX_IDENTIFIERS = 5000
+
+    issn = serializers.ListField(child=serializers.CharField(max_length=10), required=False, default=list)
+    name = serializers.ListField(child=serializers.CharField(max_length=300), required=False, default=list)
+
+    def validate(self, data):
+        total = len(data['issn']) + len(data['name'])
+        if not total:
+            raise serializers.ValidationError('Please provide a list of ISSNs ("issn") and/or names ("name")')
+        if total > self.MAX_IDENTIFIERS:
+            raise serializers.ValidationError('At most {} identifiers may be looked up at once'
+                                              .format(self.MAX_IDENTIFIERS))
+        return data
 
 class BaseNodeSerializer(serializers.ModelSerializer):
     synonyms = NodeSimpleSerializer(many=True, read_only=True)
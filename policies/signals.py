@@ -0,0 +1,146 @@
+'''
+Signal handlers keeping denormalised data (ResolvedPolicy rows, the search index, the change counter,
+tombstones), memoized most reliable policies and cached API responses in sync with nodes and policies. Connected in PoliciesConfig.ready()
+'''
+from django.apps import apps
+from django.db.models.signals import post_delete, post_save, pre_save, m2m_changed
+from django.dispatch import receiver
+
+from .models import Node, OaStatus, GoldPolicy, GreenPolicy, Deal, Epmc, ChangeCounter, ResolvedPolicy, Tombstone, \
+    CuratorialReport, CuratorialReportEntry, NodeAncestor, ArchivedPolicy, Source, Licence, Outlet, Version
+from .changes import TRACKED_MODELS
+from . import cache
+from .resolvers import dependent_node_ids, refresh_resolved_policies
+from .search import get_search_backend
+
+POLICY_MODELS = [OaStatus, GoldPolicy, GreenPolicy, Deal, Epmc]
+
+# Fields of Node used by API views to select nodes; changing them may change the results of any query
+NODE_LOOKUP_FIELDS = [Node._meta.get_field(f).attname for f in
+                      ['name', 'name_status', 'type', 'issn', 'eissn', 'issnl', 'romeo_id', 'synonym_of', 'parent']]
+
+# Fields of Node the most reliable policies and computed API fields of other nodes depend on (parents and synonyms
+# are ranked by name, and zd_publisher is the name of the parent)
+NODE_RELATION_FIELDS = [Node._meta.get_field(f).attname for f in ['name', 'name_status', 'synonym_of', 'parent']]
+
+def refresh_dependents(*node_ids, resolve=True):
+    '''
+    :param resolve: whether to recompute the ResolvedPolicy rows of dependent nodes, or only discard their cached
+        API responses
+    '''
+    dependents = dependent_node_ids(node_ids)
+    if resolve:
+        refresh_resolved_policies(dependents)
+    cache.invalidate(*cache.node_tags(dependents))
+
+@receiver(pre_save, sender=Node)
+def remember_node_relations(sender, instance, raw=False, **kwargs):
+    '''
+    Keep track of the previous preferred name of a node, whose synonym group also needs refreshing, and of
+    its previous lookup fields
+    '''
+    instance._previous_values = None
+    if instance.pk and not raw:
+        instance._previous_values = Node.objects.filter(pk=instance.pk).values(*NODE_LOOKUP_FIELDS).first()
+    instance._previous_synonym_of_id = (instance._previous_values or {}).get('synonym_of_id')
+
+@receiver(post_save, sender=Node)
+def node_saved(sender, instance, raw=False, created=False, **kwargs):
+    if not raw:
+        previous = getattr(instance, '_previous_values', None)
+        # Other changes (e.g. of the URL or comments) only need cached API responses to be discarded
+        related = created or (previous is None) or \
+            any(previous[f] != getattr(instance, f) for f in NODE_RELATION_FIELDS)
+        refresh_dependents(instance.id, getattr(instance, '_previous_synonym_of_id', None), resolve=related)
+        if created or (previous is None) or any(previous[f] != getattr(instance, f) for f in NODE_LOOKUP_FIELDS):
+            cache.invalidate(cache.collection_tag(Node))
+
+@receiver(post_delete, sender=Node)
+def node_deleted(sender, instance, **kwargs):
+    refresh_dependents(instance.synonym_of_id)
+    cache.invalidate(cache.collection_tag(Node), *cache.node_tags([instance.id]))
+
+@receiver(post_save, sender=Node, dispatch_uid='search_index_node_saved')
+def update_search_index(sender, instance, raw=False, **kwargs):
+    if not raw:
+        get_search_backend().update([instance])
+
+@receiver(post_delete, sender=Node, dispatch_uid='search_index_node_deleted')
+def remove_from_search_index(sender, instance, **kwargs):
+    get_search_backend().remove([instance.id])
+
+def invalidate_node_cache(policy):
+    '''
+    Discard most reliable policies memoized by the node instance a policy was loaded with, if any
+    '''
+    if type(policy).node.is_cached(policy):
+        policy.node.invalidate_policy_cache()
+
+def remember_policy_node(sender, instance, raw=False, **kwargs):
+    '''
+    Keep track of the node a policy was linked to, which also needs refreshing if the policy is moved
+    '''
+    instance._previous_node_id = None
+    if instance.pk and not raw:
+        instance._previous_node_id = sender.objects.filter(pk=instance.pk).values_list('node_id', flat=True).first()
+
+def policy_changed(sender, instance, raw=False, created=True, **kwargs):
+    '''
+    Called after policies are saved or deleted (in which case created defaults to True)
+    '''
+    if not raw:
+        invalidate_node_cache(instance)
+        refresh_dependents(instance.node_id, getattr(instance, '_previous_node_id', None))
+        if created:
+            cache.invalidate(cache.collection_tag(sender))
+
+def policy_tags_changed(sender, instance, action, **kwargs):
+    if action in ['post_add', 'post_remove', 'post_clear'] and isinstance(instance, (GoldPolicy, GreenPolicy)):
+        invalidate_node_cache(instance)
+        refresh_dependents(instance.node_id)
+
+for model in POLICY_MODELS:
+    pre_save.connect(remember_policy_node, sender=model,
+                     dispatch_uid='resolved_policy_{}_moved'.format(model.__name__))
+    post_save.connect(policy_changed, sender=model, dispatch_uid='resolved_policy_{}_saved'.format(model.__name__))
+    post_delete.connect(policy_changed, sender=model, dispatch_uid='resolved_policy_{}_deleted'.format(model.__name__))
+
+for through in [GoldPolicy.licence_options.through, GreenPolicy.outlet.through, GreenPolicy.version.through]:
+    m2m_changed.connect(policy_tags_changed, sender=through,
+                        dispatch_uid='resolved_policy_{}_changed'.format(through.__name__))
+
+def count_change(sender, **kwargs):
+    if kwargs.get('action', 'post_')[:5] == 'post_':
+        ChangeCounter.increment()
+
+# ResolvedPolicy rows, curatorial reports, the node hierarchy and archived policies are derived from other objects,
+# whose changes are already counted
+DERIVED_MODELS = [ResolvedPolicy, CuratorialReport, CuratorialReportEntry, NodeAncestor, ArchivedPolicy]
+
+for model in apps.get_app_config('policies').get_models():
+    if model in [ChangeCounter] + DERIVED_MODELS:
+        continue
+    post_save.connect(count_change, sender=model, dispatch_uid='change_counter_{}_saved'.format(model.__name__))
+    post_delete.connect(count_change, sender=model, dispatch_uid='change_counter_{}_deleted'.format(model.__name__))
+    for field in model._meta.many_to_many:
+        through = field.remote_field.through
+        m2m_changed.connect(count_change, sender=through,
+                            dispatch_uid='change_counter_{}_changed'.format(through.__name__))
+
+def record_deletion(sender, instance, **kwargs):
+    Tombstone.objects.create(model=sender._meta.model_name, object_id=instance.pk)
+
+for model in TRACKED_MODELS:
+    post_delete.connect(record_deletion, sender=model, dispatch_uid='tombstone_{}_deleted'.format(model.__name__))
+
+def tag_changed(sender, **kwargs):
+    if kwargs.get('action', 'post_')[:5] == 'post_':
+        cache.invalidate('all')
+
+# Tags embedded in responses of any view (and in autocomplete results); other models, such as notes, contacts and
+# node identifiers, are not serialized by the API
+TAG_MODELS = [Source, Licence, Outlet, Version]
+
+for model in TAG_MODELS:
+    post_save.connect(tag_changed, sender=model, dispatch_uid='api_cache_{}_saved'.format(model.__name__))
+    post_delete.connect(tag_changed, sender=model, dispatch_uid='api_cache_{}_deleted'.format(model.__name__))
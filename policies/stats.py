@@ -0,0 +1,81 @@
+'''
+Counts of nodes and policies shown on the home page.
+
+All counts are computed by a single query, using conditional aggregation over the node table: one sum per
+count, each adding up the nodes matching a condition (node type, name status and, for policy counts, membership
+in the set of nodes having at least one related object). Results are cached by the value of the ChangeCounter,
+so that they are recomputed after any change to the data, and at most every ORPHEUS_STATS_TIMEOUT seconds
+otherwise (to bound the memory used by counts of old versions of the data).
+'''
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db.models import Case, IntegerField, Q, Sum, When
+
+from . import cache
+from . import models
+
+CACHE_KEY = 'orpheus:index_stats:{}'
+
+NODE_TYPES = OrderedDict([
+    ('journal', 'JOURNAL'),
+    ('publisher', 'PUBLISHER'),
+    ('conference', 'CONFERENCE'),
+])
+
+# Suffix of each policy count and the model counted
+POLICY_MODELS = OrderedDict([
+    ('oa_status', models.OaStatus),
+    ('green', models.GreenPolicy),
+    ('gold', models.GoldPolicy),
+    ('epmc', models.Epmc),
+    ('deals', models.Deal),
+    ('contacts', models.Contact),
+])
+
+def count_if(*args, **kwargs):
+    '''
+    :return: aggregate counting the rows matching the given lookups
+    Equivalent to Count('id', filter=Q(*args, **kwargs)), which compiles to the same CASE expression except on
+    PostgreSQL (FILTER clause). requirements.txt pins Django 2.2, which has filter=, but the project still imports
+    django.core.urlresolvers (removed in Django 2.0), so it only runs on Django 1.11, which has not. This can
+    become Count(filter=...) once the project is ported.
+    '''
+    return Sum(Case(When(Q(*args, **kwargs), then=1), default=0, output_field=IntegerField()))
+
+def has_related(model):
+    '''
+    :return: lookup matching nodes with at least one object of model
+    '''
+    return Q(id__in=model.objects.values('node_id'))
+
+def aggregates():
+    '''
+    :return: aggregates computing each count, by name of template variable
+    '''
+    counts = OrderedDict([
+        ('num_nodes', count_if(id__isnull=False)),
+        ('num_nodes_primary', count_if(name_status='PRIMARY')),
+        ('num_node_green', count_if(has_related(models.GreenPolicy))),
+    ])
+    for name, node_type in NODE_TYPES.items():
+        counts['num_{}s'.format(name)] = count_if(type=node_type)
+        counts['num_{}s_primary'.format(name)] = count_if(type=node_type, name_status='PRIMARY')
+        for suffix, model in POLICY_MODELS.items():
+            counts['num_{}_{}'.format(name, suffix)] = count_if(has_related(model), type=node_type)
+    return counts
+
+def compute_statistics():
+    counts = models.Node.objects.aggregate(**aggregates())
+    return dict((name, value or 0) for name, value in counts.items())  # sums are NULL without nodes
+
+def index_statistics():
+    '''
+    :return: counts shown on the home page, by name of template variable
+    '''
+    key = CACHE_KEY.format(models.ChangeCounter.current().value)
+    counts = cache.get_cache().get(key)
+    if counts is None:
+        counts = compute_statistics()
+        cache.get_cache().set(key, counts, getattr(settings, 'ORPHEUS_STATS_TIMEOUT', 5 * 60))
+    return counts
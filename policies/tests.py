@@ -1,8 +1,27 @@
+import json
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.models import ProtectedError
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework.test import APIRequestFactory
 
-from .models import Node
+from django.core.management import call_command
+
+from . import cache
+from .models import POLICY_CASCADES, issn_lookup, normalize_name, Node, Source, OaStatus, GoldPolicy, GreenPolicy, Deal, Epmc, Licence, Outlet, Version, \
+    Note, ResolvedPolicy, NodeAncestor, Tombstone
+from .pagination import KeysetPagination
+from .resolvers import PolicyResolver
+from .search import search_nodes
+from .serializers import CambridgeSerializer
+from .stats import index_statistics
 
 TEST_ISSN = '1111-1111'
 TEST_NAME = 'Test Journal'
@@ -52,4 +71,879 @@ class CambridgeListAPIViewTests(TestCase):
         response = self.client.get(reverse('policies:api_cambridge'), {'name': TEST_NAME})
         self.assertContains(response, test_name)
 
+    def test_name_search_ignores_case_spacing_and_diacritics(self):
+        test_name = 'Revue d\'Économie Appliquée (Paris)'
+        create_node(test_name)
+        response = self.client.get(reverse('policies:api_cambridge'), {'name': 'revue d\'economie  appliquee'})
+        self.assertContains(response, 'Appliqu')
+
+    def test_synonym_name_search_returns_preferred_name(self):
+        journal = create_node(TEST_NAME)
+        Node.objects.create(name='Test Jnl (Old title)', name_status='SYNONYM', synonym_of=journal, type='JOURNAL')
+        response = self.client.get(reverse('policies:api_cambridge'), {'name': 'Test Jnl'})
+        self.assertEqual([r['id'] for r in response.json()['results']], [journal.id])
+
+
+class NodeIdentifierTests(TestCase):
+
+    def test_issn_lookup_ignores_case_and_hyphens(self):
+        node = create_node(TEST_NAME, eissn='1234-567X')
+        for issn in ['1234-567X', '1234567x', ' 1234-567x']:
+            self.assertEqual(list(Node.objects.filter(issn_lookup(issn))), [node])
+
+    def test_identifiers_follow_node_changes(self):
+        node = create_node(TEST_NAME, issn=TEST_ISSN)
+        node.issn = None
+        node.issnl = '2222-2222'
+        node.save()
+        self.assertFalse(Node.objects.filter(issn_lookup(TEST_ISSN)).exists())
+        response = self.client.get(reverse('policies:api_cambridge'), {'issn': '9999-9999,2222-2222'})
+        self.assertContains(response, TEST_NAME)
+
+    def test_malformed_issns_are_not_indexed(self):
+        node = create_node(TEST_NAME, issn='1234-56789', eissn='2222-2222')
+        self.assertEqual(list(node.identifiers.values_list('value', flat=True)), ['22222222'])
+
+class NodeSearchTests(TestCase):
+
+    def setUp(self):
+        self.journal = create_node('Journal of Molecular Biology', issn=TEST_ISSN)
+        create_node('Molecular Ecology')
+        create_node('Biology Letters')
+
+    def search(self, text):
+        return [n.name for n in search_nodes(Node.objects.all(), text)]
+
+    def test_search_tolerates_typos_and_word_order(self):
+        for text in ['Journal of Molecular Biology', 'journal of molecular biolgy', 'Molecular Biology Journal']:
+            self.assertEqual(self.search(text)[0], 'Journal of Molecular Biology')
+
+    def test_search_by_issn(self):
+        self.assertEqual(self.search(TEST_ISSN.replace('-', '')), ['Journal of Molecular Biology'])
+
+    def test_index_follows_node_changes(self):
+        self.journal.name = 'Journal of Cell Science'
+        self.journal.save()
+        self.assertEqual(self.search('cell science'), ['Journal of Cell Science'])
+        self.assertNotIn('Journal of Cell Science', self.search('molecular biology'))
+        self.journal.delete()
+        self.assertEqual(self.search('cell science'), [])
+
+class AutocompleteTests(TestCase):
+
+    def setUp(self):
+        self.client.force_login(User.objects.create_user('curator', 'curator@example.com', 'password'))
+        self.publisher = Node.objects.create(name='Molecular Publishing', type='PUBLISHER')
+        self.journal = create_node('Journal of Molecular Biology', issn=TEST_ISSN)
+        create_node('Molecular Ecology')
+        self.source = Source.objects.create(description='Journal website', url='https://example.com/journal',
+                                            type='WEBSITE')
+
+    def complete(self, name, q, **forward):
+        response = self.client.get(reverse(name), {'q': q, 'forward': json.dumps(forward)})
+        return [r['text'] for r in response.json()['results']]
+
+    def test_node_prefixes(self):
+        self.assertEqual(self.complete('policies:node_autocomplete', 'molec'),
+                         ['Molecular Ecology', 'Molecular Publishing'])
+        self.assertEqual(self.complete('policies:node_autocomplete', 'molec', type='JOURNAL'), ['Molecular Ecology'])
+        self.assertEqual(self.complete('policies:publisher_autocomplete', 'molec'), ['Molecular Publishing'])
+        self.assertEqual(self.complete('policies:node_autocomplete', TEST_ISSN), ['Journal of Molecular Biology'])
+        self.assertEqual(self.complete('policies:node_autocomplete', 'jornal of molecular')[0],
+                         'Journal of Molecular Biology')
+
+    def test_results_are_cached_until_nodes_change(self):
+        self.complete('policies:node_autocomplete', 'molec')
+        with self.assertNumQueries(2):  # session and user
+            self.complete('policies:node_autocomplete', 'molec')
+        create_node('Molecular Cell')
+        self.assertIn('Molecular Cell', self.complete('policies:node_autocomplete', 'molec'))
+
+    def test_sources(self):
+        self.assertEqual(self.complete('policies:source_autocomplete', 'journal w'), ['Journal website'])
+        self.assertEqual(self.complete('policies:source_autocomplete', 'https://example.com/journal'),
+                         ['Journal website'])
+
+    def test_anonymous_users_get_no_results(self):
+        self.client.logout()
+        self.assertEqual(self.complete('policies:node_autocomplete', 'molec'), [])
+
+class ConditionalGetTests(TestCase):
+
+    def setUp(self):
+        self.source = Source.objects.create(description='Test source', type='WEBSITE')
+        self.node = create_node(TEST_NAME)
+
+    def test_unchanged_data_is_not_modified(self):
+        url = reverse('policies:api_cambridge')
+        response = self.client.get(url, {'name': TEST_NAME})
+        self.assertEqual(response.status_code, 200)
+        with self.assertNumQueries(1):
+            response = self.client.get(url, {'name': TEST_NAME}, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        response = self.client.get(url, {'name': TEST_NAME}, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_changes_invalidate_etag(self):
+        url = reverse('policies:api_gold')
+        etag = self.client.get(url)['ETag']
+        self.assertNotEqual(self.client.get(url, {'node': self.node.id})['ETag'], etag)
+        gold = GoldPolicy.objects.create(node=self.node, apc_value_min=1000, source=self.source)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        gold.licence_options.add(Licence.objects.get(short_name='CC BY'))
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+class KeysetPaginationTests(TestCase):
+
+    def setUp(self):
+        for i in range(7):
+            create_node('Journal {}'.format(i))
+
+    def walk(self, **params):
+        names = []
+        response = self.client.get(reverse('policies:api_nodes'), dict(params, cursor='', limit=3))
+        while True:
+            data = response.json()
+            self.assertNotIn('count', data)
+            names += [n['name'] for n in data['results']]
+            if not data['next']:
+                return names
+            response = self.client.get(data['next'])
+
+    def test_walk_by_name_and_updated(self):
+        self.assertEqual(self.walk(), ['Journal {}'.format(i) for i in range(7)])
+        Node.objects.get(name='Journal 3').save()
+        self.assertEqual(self.walk(ordering='updated')[-1], 'Journal 3')
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse('policies:api_nodes'), {'cursor': 'garbage'})
+        self.assertEqual(response.status_code, 404)
+
+class ResponseCacheTests(TestCase):
+
+    def setUp(self):
+        self.source = Source.objects.create(description='Test source', type='WEBSITE')
+        self.publisher = Node.objects.create(name='Test Publisher', type='PUBLISHER')
+        self.journal = Node.objects.create(name=TEST_NAME, type='JOURNAL', parent=self.publisher,
+                                           issn=TEST_ISSN)
+        self.other = create_node('Other Journal')
+
+    def get(self, node):
+        return self.client.get(reverse('policies:api_cambridge'), {'id': node.id})
+
+    def test_policy_changes_only_evict_dependent_nodes(self):
+        self.assertEqual(self.get(self.journal)['X-Cache'], 'MISS')
+        self.assertEqual(self.get(self.other)['X-Cache'], 'MISS')
+        with self.assertNumQueries(1):  # change counter, for conditional requests
+            response = self.get(self.journal)
+        self.assertEqual(response['X-Cache'], 'HIT')
+        OaStatus.objects.create(node=self.publisher, oa_status='HYBRID', source=self.source)
+        response = self.get(self.journal)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.json()['results'][0]['zd_journal_oa_status'], 'journal_oa_status_hybrid')
+        self.assertEqual(self.get(self.other)['X-Cache'], 'HIT')
+        stats = self.client.get(reverse('policies:api_cache_stats')).json()
+        self.assertTrue(stats['hits'] >= 2 and stats['misses'] >= 3)
+
+    def test_lookup_changes_evict_queries(self):
+        url = reverse('policies:api_cambridge')
+        self.assertEqual(self.client.get(url, {'issn': '2222-2222'}).json()['results'], [])
+        self.other.issn = '2222-2222'
+        self.other.save()
+        self.assertEqual(len(self.client.get(url, {'issn': '2222-2222'}).json()['results']), 1)
+
+    def test_unserialized_changes_do_not_evict_all_responses(self):
+        """
+        Identifiers (synced when an ISSN changes) and notes are not embedded in responses
+        """
+        version = cache.tag_versions(['all'])['all']
+        self.journal.issn = '2222-2222'
+        self.journal.save()
+        Note.objects.create(text='Checked', node=self.journal)
+        self.assertEqual(cache.tag_versions(['all'])['all'], version)
+        self.source.description = 'Renamed source'
+        self.source.save()
+        self.assertNotEqual(cache.tag_versions(['all'])['all'], version)
 
+    @mock.patch.object(KeysetPagination, 'keyset_max_limit', 1)
+    def test_authenticated_responses_are_not_served_to_anonymous_clients(self):
+        """
+        Anonymous clients should not get the larger pages cached for authenticated ones
+        """
+        url = reverse('policies:api_nodes')
+        self.client.force_login(User.objects.create_user('reader', 'reader@example.com', 'password'))
+        self.assertEqual(len(self.client.get(url, {'cursor': '', 'limit': 3}).json()['results']), 3)
+        self.client.logout()
+        response = self.client.get(url, {'cursor': '', 'limit': 3})
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(len(response.json()['results']), 1)
+
+class IndexStatisticsTests(TestCase):
+
+    def setUp(self):
+        self.source = Source.objects.create(description='Test source', type='WEBSITE')
+        self.publisher = Node.objects.create(name='Test Publisher', type='PUBLISHER', name_status='PRIMARY')
+        self.journal = create_node(TEST_NAME)
+        create_node('Other Journal')
+        Node.objects.create(name='Test J', type='JOURNAL', name_status='SYNONYM', synonym_of=self.journal)
+        GreenPolicy.objects.create(node=self.journal, source=self.source)
+        GreenPolicy.objects.create(node=self.journal, source=self.source)
+        GoldPolicy.objects.create(node=self.publisher, apc_value_min=1000, source=self.source)
+
+    def test_counts(self):
+        with self.assertNumQueries(2):  # change counter and counts
+            counts = index_statistics()
+        self.assertEqual(counts['num_nodes'], 4)
+        self.assertEqual(counts['num_journals'], 3)
+        self.assertEqual(counts['num_journals_primary'], 2)
+        self.assertEqual(counts['num_journal_green'], 1)
+        self.assertEqual(counts['num_journal_gold'], 0)
+        self.assertEqual(counts['num_publisher_gold'], 1)
+        self.assertEqual(counts['num_conferences'], 0)
+        with self.assertNumQueries(1):
+            self.assertEqual(index_statistics(), counts)
+        Epmc.objects.create(node=self.journal, source=self.source)
+        self.assertEqual(index_statistics()['num_journal_epmc'], 1)
+        response = self.client.get(reverse('policies:index'))
+        self.assertEqual(response.context['num_journal_epmc'], 1)
+
+class CambridgeBulkAPIViewTests(TestCase):
+
+    def post(self, data, query=''):
+        return self.client.post(reverse('policies:api_cambridge_bulk') + query, json.dumps(data),
+                                content_type='application/json')
+
+    def test_results_are_keyed_by_queried_identifier(self):
+        """
+        Each queried ISSN or name should map to its matches, with explicit entries for identifiers not found
+        """
+        journal = create_node(TEST_NAME, TEST_ISSN)
+        Node.objects.create(name='Test Jnl', name_status='SYNONYM', synonym_of=journal, type='JOURNAL',
+                            issn=TEST_ISSN)
+        response = self.post({'issn': [TEST_ISSN, '2222-2222'], 'name': ['test jnl', 'Unknown Journal']})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual([r['id'] for r in data['issn'][TEST_ISSN]['results']], [journal.id])
+        self.assertEqual(data['issn']['2222-2222'], {'found': False, 'results': []})
+        self.assertEqual([r['name'] for r in data['name']['test jnl']['results']], [TEST_NAME])
+        self.assertFalse(data['name']['Unknown Journal']['found'])
+
+    def test_sparse_fields_without_id(self):
+        create_node(TEST_NAME, TEST_ISSN)
+        response = self.post({'issn': [TEST_ISSN]}, '?fields=name')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['issn'][TEST_ISSN]['results'], [{'name': TEST_NAME}])
+
+    def test_query_count_does_not_depend_on_number_of_identifiers(self):
+        for i in range(20):
+            create_node('Test Journal {}'.format(i), '1111-{:04d}'.format(i))
+        ResolvedPolicy.objects.all().delete()
+        with CaptureQueriesContext(connection) as few:
+            self.post({'issn': ['1111-0000', '1111-0001']})
+        with self.assertNumQueries(len(few.captured_queries)):
+            self.post({'issn': ['1111-{:04d}'.format(i) for i in range(20)]})
+
+    def test_identifiers_are_required(self):
+        self.assertEqual(self.post({}).status_code, 400)
+
+class CambridgeExportTests(TestCase):
+
+    def setUp(self):
+        self.journal = create_node(TEST_NAME, issn=TEST_ISSN)
+        create_node('Other Journal')
+        Node.objects.create(name='Test Publisher', type='PUBLISHER')
+
+    def test_ndjson_export(self):
+        response = self.client.get(reverse('policies:api_cambridge_export', args=['ndjson']),
+                                   HTTP_ACCEPT='application/x-ndjson')
+        self.assertEqual(response.status_code, 200)
+        records = [json.loads(l) for l in b''.join(response.streaming_content).decode('utf-8').splitlines()]
+        self.assertEqual([r['name'] for r in records], [TEST_NAME, 'Other Journal'])
+        api_record = self.client.get(reverse('policies:api_cambridge'), {'id': self.journal.id}).json()
+        self.assertEqual(records[0], api_record['results'][0])
+
+    def test_csv_export_command(self):
+        out = StringIO()
+        call_command('export_cambridge', '--format=csv', '--batch-size=1', stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(lines[0].startswith('id,name,preferred_name,issn'))
+        self.assertIn(TEST_ISSN, lines[1])
+
+    def test_csv_export_of_skipped_fields(self):
+        """
+        Fields skipped by the serializer (zd_publisher of journals without publisher) should be left empty
+        """
+        ResolvedPolicy.objects.all().delete()
+        response = self.client.get(reverse('policies:api_cambridge_export', args=['csv']))
+        lines = b''.join(response.streaming_content).decode('utf-8').splitlines()
+        self.assertEqual(len(lines), 3)
+
+class ChangesAPIViewTests(TestCase):
+
+    def setUp(self):
+        self.source = Source.objects.create(description='Test source', type='WEBSITE')
+        self.publisher = Node.objects.create(name='Test Publisher', type='PUBLISHER')
+        self.journal = Node.objects.create(name=TEST_NAME, type='JOURNAL', parent=self.publisher)
+
+    def events(self, since, limit=2):
+        events = []
+        response = self.client.get(reverse('policies:api_changes'), {'since': since.isoformat(), 'limit': limit})
+        while True:
+            data = response.json()
+            events += [(e['model'], e['id'], e['op']) for e in data['results']]
+            if not data['next']:
+                return events
+            response = self.client.get(data['next'])
+
+    def test_changes_since(self):
+        events = self.events(self.source.created)
+        self.assertIn(('node', self.journal.id, 'create'), events)
+        self.assertIn(('source', self.source.id, 'create'), events)
+        since = timezone.now()
+        oa = OaStatus.objects.create(node=self.publisher, oa_status='HYBRID', source=self.source)
+        events = self.events(since)
+        self.assertIn(('oastatus', oa.id, 'create'), events)
+        self.assertIn(('node', self.journal.id, 'update'), events)  # resolved OA status of the journal changed
+        self.assertNotIn(('source', self.source.id, 'create'), events)
+        since = timezone.now()
+        oa_id = oa.id
+        oa.delete()
+        self.assertIn(('oastatus', oa_id, 'delete'), self.events(since))
+
+    def test_since_is_required(self):
+        self.assertEqual(self.client.get(reverse('policies:api_changes')).status_code, 400)
+
+class NodeDetailViewTests(TestCase):
+
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser('curator', 'curator@example.com', 'password'))
+        self.source = Source.objects.create(description='Test source', type='WEBSITE')
+        self.publisher = Node.objects.create(name='Test Publisher', type='PUBLISHER', name_status='PRIMARY')
+        self.journal = Node.objects.create(name=TEST_NAME, type='JOURNAL', name_status='PRIMARY',
+                                           parent=self.publisher)
+        self.gold = GoldPolicy.objects.create(node=self.publisher, apc_value_min=1000, source=self.source)
+        self.gold.licence_options.add(Licence.objects.get(short_name='CC BY'))
+        self.oa = OaStatus.objects.create(node=self.journal, oa_status='HYBRID', source=self.source)
+        OaStatus.objects.create(node=self.journal, oa_status='GREEN', source=self.source, superseded=True)
+
+    def get(self, name='policies:detail', **headers):
+        return self.client.get(reverse(name, args=[self.journal.id]), **headers)
+
+    def test_context(self):
+        context = self.get().context
+        self.assertEqual(context['oastatus_list'], [self.oa])
+        self.assertEqual(context['oastatus_prov'], '')
+        self.assertEqual(context['goldpolicy_list'], [self.gold])
+        self.assertIn('inherited from publisher', context['goldpolicy_prov'])
+        self.assertEqual(len(self.get('policies:node_all_detail').context['oastatus_list']), 2)
+
+    def test_queries_do_not_depend_on_policies(self):
+        GreenPolicy.objects.create(node=self.journal, source=self.source)
+        with CaptureQueriesContext(connection) as queries:
+            self.get()
+        for i in range(3):
+            policy = GreenPolicy.objects.create(node=self.journal, source=self.source)
+            policy.version.add(Version.objects.first())
+            Note.objects.create(text='Duplicate', deletion_request=True, goldpolicy=self.gold)
+        with self.assertNumQueries(len(queries)):
+            response = self.get()
+        self.assertEqual(len(response.context['greenpolicy_list']), 4)
+
+    def test_unchanged_page_is_not_modified(self):
+        etag = self.get()['ETag']
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.oa.delete()
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+class PolicyArchiveTests(TestCase):
+
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser('curator', 'curator@example.com', 'password'))
+        self.source = Source.objects.create(description='Test source', type='WEBSITE')
+        self.journal = Node.objects.create(name=TEST_NAME, type='JOURNAL', name_status='PRIMARY')
+        self.gold = GoldPolicy.objects.create(node=self.journal, apc_value_min=1000, source=self.source)
+        self.superseded = GoldPolicy.objects.create(node=self.journal, apc_value_min=500, source=self.source,
+                                                    superseded=True, superseded_date=timezone.now().date())
+        self.superseded.licence_options.add(Licence.objects.get(short_name='CC BY'))
+        Note.objects.create(text='Replaced by new price list', goldpolicy=self.superseded)
+
+    def test_superseded_policies_are_archived(self):
+        out = StringIO()
+        call_command('archive_superseded_policies', 'goldpolicy', '--dry-run', stdout=out)
+        self.assertIn('goldpolicy: 1 superseded policies', out.getvalue())
+        call_command('archive_superseded_policies', stdout=out)
+        self.assertIn('goldpolicy: archived 1 policies', out.getvalue())
+        self.assertEqual(list(GoldPolicy.objects.all()), [self.gold])
+        self.assertTrue(Tombstone.objects.filter(model='goldpolicy', object_id=self.superseded.id).exists())
+
+        response = self.client.get(reverse('policies:node_all_detail', args=[self.journal.id]))
+        current, archived = response.context['goldpolicy_list']
+        self.assertEqual(current, self.gold)
+        self.assertTrue(archived.archived)
+        self.assertEqual((archived.id, archived.apc_value_min, archived.source), (self.superseded.id, 500, self.source))
+        self.assertEqual([l.short_name for l in archived.licence_options.all()], ['CC BY'])
+        self.assertEqual([n.text for n in archived.gold_policy_notes.all()], ['Replaced by new price list'])
+        self.assertContains(response, 'Replaced by new price list')
+        detail = self.client.get(reverse('policies:detail', args=[self.journal.id]))
+        self.assertEqual(detail.context['goldpolicy_list'], [self.gold])
+        self.assertContains(detail, 'display superseded policies')
+
+    def test_nodes_with_archived_policies_are_protected(self):
+        """
+        Like nodes with live policies, nodes with archived policies should not be deleted
+        """
+        self.gold.delete()
+        call_command('archive_superseded_policies', stdout=StringIO())
+        with self.assertRaises(ProtectedError):
+            self.journal.delete()
+
+class PurgeTests(TestCase):
+
+    def setUp(self):
+        self.source = Source.objects.create(description='Test source', type='WEBSITE')
+        self.other_source = Source.objects.create(description='Other source', type='WEBSITE')
+        self.publisher = Node.objects.create(name='Test Publisher', type='PUBLISHER')
+        self.journal = Node.objects.create(name=TEST_NAME, type='JOURNAL', parent=self.publisher, source=self.source,
+                                           issn='1234-5678')
+        self.synonym = Node.objects.create(name='Test J', type='JOURNAL', name_status='SYNONYM',
+                                           synonym_of=self.journal)
+        self.green = GreenPolicy.objects.create(node=self.journal, source=self.other_source)
+        self.green.version.add(Version.objects.first())
+        Note.objects.create(text='Check embargo', greenpolicy=self.green)
+        self.gold = GoldPolicy.objects.create(node=self.publisher, source=self.source, apc_value_min=1000)
+
+    def test_dry_run_counts_rows(self):
+        out = StringIO()
+        call_command('purge_content', '--source', str(self.source.id), '--dry-run', stdout=out)
+        self.assertIn('policies_node: 2', out.getvalue())
+        self.assertIn('policies_greenpolicy_version: 1', out.getvalue())
+        self.assertEqual(Node.objects.count(), 3)
+
+    def test_purge_by_source(self):
+        call_command('purge_content', '--source', str(self.source.id), '--noinput', stdout=StringIO())
+        self.assertEqual(list(Node.objects.all()), [self.publisher])
+        self.assertFalse(GoldPolicy.objects.exists() or GreenPolicy.objects.exists() or Note.objects.exists())
+        self.assertFalse(NodeAncestor.objects.exists())
+        self.assertEqual(set(Tombstone.objects.values_list('model', 'object_id')),
+                         {('node', self.journal.id), ('node', self.synonym.id), ('goldpolicy', self.gold.id),
+                          ('greenpolicy', self.green.id)})
+        self.assertIsNone(ResolvedPolicy.objects.get(node=self.publisher).gold_policy_id)
+        self.assertFalse(self.journal.identifiers.exists())
+
+    def test_purge_policies_of_node_type(self):
+        call_command('purge_content', '--node-type', 'JOURNAL', '--policies-only', '--noinput', stdout=StringIO())
+        self.assertEqual(Node.objects.count(), 3)
+        self.assertEqual(list(GoldPolicy.objects.all()), [self.gold])
+        self.assertFalse(GreenPolicy.objects.exists())
+
+    def test_reset(self):
+        call_command('reset_content', '--noinput', stdout=StringIO())
+        self.assertFalse(Node.objects.exists() or GoldPolicy.objects.exists() or ResolvedPolicy.objects.exists())
+        self.assertEqual(Source.objects.count(), 2)
+
+class FastloadTests(TestCase):
+
+    def setUp(self):
+        self.source = Source.objects.create(description='Test Source', type='WEBSITE')
+        self.publisher = Node.objects.create(name='Test Publisher', type='PUBLISHER')
+        self.journal = Node.objects.create(name=TEST_NAME, type='JOURNAL', parent=self.publisher, issn='1234-5678')
+        Node.objects.create(name='Test J', type='JOURNAL', name_status='SYNONYM', synonym_of=self.journal)
+        gold = GoldPolicy.objects.create(node=self.journal, source=self.source, apc_value_min=1000)
+        gold.licence_options.add(Licence.objects.get(short_name='CC BY'))
+        out = StringIO()
+        call_command('dumpdata', 'policies.node', 'policies.source', 'policies.goldpolicy', 'policies.resolvedpolicy',
+                     stdout=out)
+        self.snapshot = json.loads(out.getvalue())
+        self.hierarchy = set(NodeAncestor.objects.values_list('descendant', 'ancestor', 'relation', 'depth'))
+        self.resolved = ResolvedPolicy.objects.get(node=self.journal).gold_policy_id
+        updated = Node.objects.get(id=self.journal.id).updated
+        self.updated = updated.replace(microsecond=updated.microsecond // 1000 * 1000)  # precision of dumpdata
+        call_command('reset_content', '--noinput', stdout=StringIO())
+        Source.objects.all().delete()
+
+    def load(self, suffix, content):
+        with tempfile.NamedTemporaryFile('w', suffix=suffix) as f:
+            f.write(content)
+            f.flush()
+            call_command('fastload', f.name, stdout=StringIO())
+
+    def assertLoaded(self):
+        self.assertEqual(Node.objects.count(), 3)
+        journal = Node.objects.get(id=self.journal.id)
+        self.assertEqual(journal.updated, self.updated)
+        self.assertEqual(journal.normalized_name, normalize_name(TEST_NAME))
+        self.assertEqual(Source.objects.get().normalized_description, 'test source')
+        self.assertEqual(list(GoldPolicy.objects.get().licence_options.values_list('short_name', flat=True)), ['CC BY'])
+        self.assertEqual(list(Node.objects.filter(issn_lookup('12345678'))), [journal])
+        self.assertEqual(set(NodeAncestor.objects.values_list('descendant', 'ancestor', 'relation', 'depth')),
+                         self.hierarchy)
+        self.assertEqual(ResolvedPolicy.objects.get(node=journal).gold_policy_id, self.resolved)
+        self.assertEqual([n.id for n in search_nodes(Node.objects.all(), 'test journal')][:1], [journal.id])
+
+    def test_json(self):
+        self.load('.json', json.dumps(self.snapshot, indent=2))
+        self.assertLoaded()
+
+    def test_ndjson(self):
+        self.load('.ndjson', ''.join(json.dumps(o) + '\n' for o in reversed(self.snapshot)))
+        self.assertLoaded()
+
+class CuratorialReportTests(TestCase):
+
+    def setUp(self):
+        self.client.force_login(User.objects.create_user('curator', 'curator@example.com', 'password'))
+        self.source = Source.objects.create(description='Test source', type='WEBSITE')
+        self.publisher = Node.objects.create(name='Test Publisher', type='PUBLISHER')
+        self.journal = Node.objects.create(name=TEST_NAME, type='JOURNAL', parent=self.publisher)
+        self.synonym = Node.objects.create(name='Test J', type='JOURNAL', name_status='SYNONYM',
+                                           synonym_of=self.journal)
+        for i in range(2):
+            GreenPolicy.objects.create(node=self.synonym, source=self.source, problematic=True)
+        Node.objects.create(name='Test Child', type='JOURNAL', parent=self.synonym)
+        GreenPolicy.objects.create(node=self.journal, source=self.source, problematic=True)
+
+    def names(self, url_name):
+        return [n.name for n in self.client.get(reverse(url_name)).context['node_list']]
+
+    def test_views_list_refreshed_reports(self):
+        self.assertEqual(self.names('policies:synonymswithpolicies'), [])
+        out = StringIO()
+        call_command('refresh_curatorial_reports', stdout=out)
+        self.assertIn('synonyms_with_policies: 1 nodes', out.getvalue())
+        self.assertEqual(self.names('policies:synonymswithpolicies'), ['Test J'])
+        self.assertEqual(self.names('policies:problematic_policies'), ['Test J', TEST_NAME])
+        self.assertEqual(self.names('policies:synonymchildren'), ['Test Child'])
+        self.assertEqual(self.names('policies:journalchildren'), ['Test Child'])
+        self.assertEqual(self.names('policies:grandchildren'), [])
+
+class NodeHierarchyTests(TestCase):
+
+    def setUp(self):
+        self.publisher = Node.objects.create(name='Test Publisher', type='PUBLISHER')
+        self.imprint = Node.objects.create(name='Test Imprint', type='PUBLISHER', parent=self.publisher)
+        self.journal = Node.objects.create(name=TEST_NAME, type='JOURNAL', parent=self.imprint)
+        self.synonym = Node.objects.create(name='Test J', type='JOURNAL', name_status='SYNONYM',
+                                           synonym_of=self.journal)
+        self.other = Node.objects.create(name='Other Publisher', type='PUBLISHER')
+
+    def assertHierarchyRebuilt(self):
+        rows = set(NodeAncestor.objects.values_list('descendant', 'ancestor', 'relation', 'depth'))
+        call_command('rebuild_node_hierarchy', stdout=StringIO())
+        self.assertEqual(rows, set(NodeAncestor.objects.values_list('descendant', 'ancestor', 'relation', 'depth')))
+
+    def test_descendants_and_preferred_ancestor_take_one_query(self):
+        with self.assertNumQueries(1):
+            journals = set(self.publisher.get_descendants().filter(type='JOURNAL'))
+        self.assertEqual(journals, {self.journal, self.synonym})
+        with self.assertNumQueries(1):
+            self.assertEqual(self.synonym.get_preferred_ancestor(), self.journal)
+        self.assertEqual(list(self.synonym.get_ancestors()), [self.journal, self.imprint, self.publisher])
+        self.assertEqual(list(self.synonym.get_ancestors(NodeAncestor.PARENT)), [])
+        self.assertHierarchyRebuilt()
+
+    def test_moving_a_node_updates_its_descendants(self):
+        self.imprint.parent = self.other
+        self.imprint.save()
+        self.assertEqual(set(self.publisher.get_descendants()), set())
+        self.assertEqual(set(self.other.get_descendants()), {self.imprint, self.journal, self.synonym})
+        self.assertEqual(list(self.journal.get_ancestors(NodeAncestor.PARENT)), [self.imprint, self.other])
+        self.assertHierarchyRebuilt()
+
+class NodeListAPIViewTests(TestCase):
+
+    def setUp(self):
+        self.source = Source.objects.create(description='Test source', type='WEBSITE')
+        self.publisher = Node.objects.create(name='Test Publisher', type='PUBLISHER', source=self.source)
+        self.journals = 0
+
+    def add_journal(self):
+        self.journals += 1
+        journal = Node.objects.create(name='Journal {}'.format(self.journals), type='JOURNAL',
+                                      parent=self.publisher, source=self.source)
+        synonym = Node.objects.create(name='Synonym {}'.format(self.journals), type='JOURNAL',
+                                      name_status='SYNONYM', synonym_of=journal, parent=self.publisher)
+        gold = GoldPolicy.objects.create(node=journal, source=self.source)
+        gold.licence_options.add(Licence.objects.get(short_name='CC BY'))
+        green = GreenPolicy.objects.create(node=journal, source=self.source,
+                                           version_green_licence=Licence.objects.get(short_name='CC BY'))
+        green.outlet.add(Outlet.objects.first())
+        green.version.add(Version.objects.first())
+        OaStatus.objects.create(node=synonym, oa_status='HYBRID', source=self.source)
+
+    def test_query_count_does_not_depend_on_page_size(self):
+        """
+        Nested parents, synonyms and policies of /api/nodes/attributes/ are fetched in bulk
+        """
+        url = reverse('policies:api_nodes_attributes')
+        for i in range(2):
+            self.add_journal()
+        with self.assertNumQueries(27):
+            response = self.client.get(url, {'limit': 100})
+        synonym = [n for n in response.json()['results'] if n['name'] == 'Synonym 1'][0]
+        self.assertEqual(synonym['synonym_of']['green_policies'][0]['outlet'], [str(Outlet.objects.first())])
+        for i in range(4):
+            self.add_journal()
+        with self.assertNumQueries(27):
+            self.client.get(url, {'limit': 100})
+
+class PolicyResolverTests(TestCase):
+
+    def setUp(self):
+        self.source = Source.objects.create(description='Test source', type='WEBSITE')
+        self.publisher = Node.objects.create(name='Test Publisher', type='PUBLISHER')
+        self.journal = Node.objects.create(name=TEST_NAME, type='JOURNAL', parent=self.publisher)
+        self.synonym = Node.objects.create(name='Test Jnl', type='JOURNAL', name_status='SYNONYM',
+                                           synonym_of=self.journal, parent=self.publisher)
+        self.orphan = create_node('Orphan Journal')
+        OaStatus.objects.create(node=self.publisher, oa_status='HYBRID', source=self.source)
+        OaStatus.objects.create(node=self.journal, oa_status='FULLY_OA', source=self.source, vetted=False)
+        gold = GoldPolicy.objects.create(node=self.synonym, apc_currency='GBP', apc_value_min=1000,
+                                         source=self.source)
+        gold.licence_options.add(Licence.objects.get(short_name='CC BY'))
+        green = GreenPolicy.objects.create(node=self.publisher, version_embargo_months=6, source=self.source)
+        green.outlet.add(Outlet.objects.get(name='Non-commercial institutional repository'))
+        green.version.add(Version.objects.create(short_name='AM'))
+        Deal.objects.create(node=self.publisher, applies_to='AUTHORS', type='SPRINGER COMPACT', source=self.source)
+
+    def test_resolver_matches_node_properties(self):
+        """
+        The batch resolver should return the same dictionaries as the most_reliable_* properties
+        """
+        nodes = Node.objects.all()
+        resolved = PolicyResolver(nodes).resolve()
+        for n in Node.objects.all():
+            for field, policy in resolved[n.id].items():
+                self.assertEqual(policy, getattr(n, field), '{} of {}'.format(field, n))
+        self.assertEqual(resolved[self.synonym.id]['most_reliable_gold_policy']['provenance'], 'synonym')
+        self.assertEqual(resolved[self.journal.id]['most_reliable_green_policies_for_ir']['AM']['provenance'],
+                         'parent (publisher)')
+
+    def test_resolver_query_count_does_not_depend_on_batch_size(self):
+        """
+        Resolving policies for many nodes should run a constant number of queries
+        """
+        nodes = list(Node.objects.all())
+        with self.assertNumQueries(10):
+            PolicyResolver(nodes[:2]).resolve()
+        for i in range(5):
+            Node.objects.create(name='Another Journal {}'.format(i), type='JOURNAL', parent=self.publisher)
+        nodes = list(Node.objects.all())
+        with self.assertNumQueries(10):
+            PolicyResolver(nodes).resolve()
+
+    def test_sparse_fields_only_resolve_needed_policies(self):
+        """
+        Computed fields left out by the fields/omit parameters should not be resolved
+        """
+        url = reverse('policies:api_nodes_preferred_name')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'id': self.journal.id, 'fields': 'id,most_reliable_oa_status'})
+        self.assertEqual(list(response.json()['results'][0]), ['id', 'most_reliable_oa_status'])
+        tables = ' '.join(q['sql'] for q in queries.captured_queries)
+        self.assertIn('policies_oastatus', tables)
+        self.assertNotIn('policies_goldpolicy', tables)
+        response = self.client.get(url, {'id': self.journal.id, 'omit': 'most_reliable_green_policies_for_ir'})
+        self.assertNotIn('most_reliable_green_policies_for_ir', response.json()['results'][0])
+        self.assertIn('most_reliable_gold_policy', response.json()['results'][0])
+        self.assertEqual(Node.policy_dependencies(['zd_apc_range', 'apollo_am_embargo_months', 'name']),
+                         ['most_reliable_oa_status', 'most_reliable_gold_policy', 'most_reliable_green_policies_for_ir'])
+
+class ResolvedPolicyTests(TestCase):
+
+    def setUp(self):
+        self.source = Source.objects.create(description='Test source', type='WEBSITE')
+        self.publisher = Node.objects.create(name='Test Publisher', type='PUBLISHER')
+        self.journal = Node.objects.create(name=TEST_NAME, type='JOURNAL', parent=self.publisher)
+
+    def test_policy_changes_refresh_dependent_nodes(self):
+        """
+        Saving or deleting a policy of a publisher should refresh the resolved policies of its journals
+        """
+        self.assertIsNone(ResolvedPolicy.objects.get(node=self.journal).zd_journal_oa_status)
+        oa = OaStatus.objects.create(node=self.publisher, oa_status='HYBRID', source=self.source)
+        resolved = ResolvedPolicy.objects.get(node=self.journal)
+        self.assertEqual(resolved.zd_journal_oa_status, 'journal_oa_status_hybrid')
+        self.assertEqual(resolved.oa_status_id, oa.id)
+        self.assertEqual(resolved.oa_status_provenance, 'parent (publisher)')
+        oa.delete()
+        self.assertIsNone(ResolvedPolicy.objects.get(node=self.journal).zd_journal_oa_status)
+
+    def test_moving_a_policy_refreshes_both_nodes(self):
+        other = Node.objects.create(name='Other Journal', type='JOURNAL')
+        oa = OaStatus.objects.create(node=self.journal, oa_status='HYBRID', source=self.source)
+        oa.node = other
+        oa.save()
+        self.assertIsNone(ResolvedPolicy.objects.get(node=self.journal).oa_status_id)
+        self.assertEqual(ResolvedPolicy.objects.get(node=other).oa_status_id, oa.id)
+
+    def test_only_relevant_node_changes_refresh_dependent_nodes(self):
+        """
+        Renaming a publisher should refresh its journals, but changing its URL should not
+        """
+        self.publisher.url = 'http://example.com'
+        with CaptureQueriesContext(connection) as queries:
+            self.publisher.save()
+        self.assertFalse([q for q in queries.captured_queries if 'policies_resolvedpolicy' in q['sql']])
+        self.publisher.name = 'Renamed Publisher'
+        self.publisher.save()
+        self.assertEqual(ResolvedPolicy.objects.get(node=self.journal).zd_publisher, 'Renamed Publisher')
+
+    def test_synonym_changes_refresh_preferred_name(self):
+        """
+        Policies attached to a new synonym should be picked up by its preferred name
+        """
+        synonym = Node.objects.create(name='Test Jnl', type='JOURNAL', name_status='SYNONYM',
+                                      synonym_of=self.journal)
+        OaStatus.objects.create(node=synonym, oa_status='FULLY_OA', source=self.source)
+        self.assertEqual(ResolvedPolicy.objects.get(node=self.journal).zd_journal_oa_status,
+                         'journal_oa_status_open_access')
+        synonym.name_status = 'PRIMARY'
+        synonym.synonym_of = None
+        synonym.save()
+        self.assertIsNone(ResolvedPolicy.objects.get(node=self.journal).zd_journal_oa_status)
+
+    def test_cambridge_api_uses_resolved_policies(self):
+        """
+        The Cambridge API should return the same values whether or not they are read from ResolvedPolicy
+        """
+        OaStatus.objects.create(node=self.publisher, oa_status='FULLY_OA', source=self.source)
+        stored = self.client.get(reverse('policies:api_cambridge'), {'name': TEST_NAME}).json()
+        ResolvedPolicy.objects.all().delete()
+        cache.invalidate('all')  # rows are derived data, whose deletion does not evict responses
+        computed = self.client.get(reverse('policies:api_cambridge'), {'name': TEST_NAME}).json()
+        self.assertEqual(stored, computed)
+        self.assertEqual(stored['results'][0]['apollo_am_embargo_months'], 'indefinite')
+
+    def test_cambridge_api_skips_unavailable_fields(self):
+        """
+        zd_publisher of a journal without parent should be left out, whether or not it has a ResolvedPolicy row
+        """
+        create_node('Orphan Journal')
+        stored = self.client.get(reverse('policies:api_cambridge'), {'name': 'Orphan Journal'}).json()
+        ResolvedPolicy.objects.all().delete()
+        cache.invalidate('all')  # rows are derived data, whose deletion does not evict responses
+        computed = self.client.get(reverse('policies:api_cambridge'), {'name': 'Orphan Journal'}).json()
+        self.assertEqual(stored, computed)
+        self.assertNotIn('zd_publisher', stored['results'][0])
+
+    def test_rebuild_command(self):
+        ResolvedPolicy.objects.all().delete()
+        call_command('rebuild_resolved_policies', stdout=StringIO())
+        self.assertEqual(ResolvedPolicy.objects.count(), Node.objects.count())
+
+class PolicyMemoizationTests(TestCase):
+
+    def setUp(self):
+        source = Source.objects.create(description='Test source', type='WEBSITE')
+        publisher = Node.objects.create(name='Test Publisher', type='PUBLISHER')
+        self.journal = Node.objects.create(name=TEST_NAME, type='JOURNAL', parent=publisher)
+        Node.objects.create(name='Test Jnl', type='JOURNAL', name_status='SYNONYM', synonym_of=self.journal)
+        OaStatus.objects.create(node=publisher, oa_status='HYBRID', source=source)
+        Epmc.objects.create(node=self.journal, participation_level='FULL', open_licence='ALL', source=source)
+        ResolvedPolicy.objects.all().delete()
+
+    def get_journal(self):
+        return Node.objects.select_related('parent', 'resolved_policy').get(id=self.journal.id)
+
+    def test_serialized_record_resolves_each_policy_once(self):
+        """
+        Serializing a Cambridge record should resolve each policy type only once
+        """
+        node = self.get_journal()
+        with CaptureQueriesContext(connection) as resolution:
+            for f in Node.RESOLVED_POLICY_FIELDS:
+                getattr(node, f)
+        node = self.get_journal()
+        with self.assertNumQueries(len(resolution.captured_queries)):
+            CambridgeSerializer(node).data
+        with self.assertNumQueries(0):
+            CambridgeSerializer(node).data
+
+    def test_saving_a_policy_invalidates_memoized_values(self):
+        node = self.get_journal()
+        self.assertEqual(node.zd_epmc_participation, 'Full')
+        epmc = node.epmc_policies.get()
+        epmc.participation_level = 'NIH'
+        epmc.node = node
+        epmc.save()
+        self.assertEqual(node.zd_epmc_participation, 'Nih')
+
+class PolicyCascadeTests(TestCase):
+
+    def setUp(self):
+        self.source = Source.objects.create(description='Test source', type='WEBSITE')
+        publisher = Node.objects.create(name='Test Publisher', type='PUBLISHER')
+        self.journal = Node.objects.create(name=TEST_NAME, type='JOURNAL', parent=publisher)
+        OaStatus.objects.create(node=publisher, oa_status='FULLY_OA', source=self.source)
+        for name, status in [('Test Jnl C', 'HYBRID'), ('Test Jnl A', 'SUBSCRIPTION'), ('Test Jnl B', 'HYBRID')]:
+            synonym = Node.objects.create(name=name, type='JOURNAL', name_status='SYNONYM', synonym_of=self.journal)
+            OaStatus.objects.create(node=synonym, oa_status=status, source=self.source, vetted=False)
+
+    def test_cascade_resolves_all_stages_with_one_query(self):
+        cascade = POLICY_CASCADES['most_reliable_oa_status']
+        with self.assertNumQueries(1):
+            oa_status = cascade.resolve(self.journal)
+        self.assertEqual(oa_status['oa_status'], 'SUBSCRIPTION')
+        self.assertEqual(oa_status['provenance'], 'synonym')
+
+    def test_vetted_policy_of_later_stage_is_not_preferred(self):
+        OaStatus.objects.create(node=self.journal, oa_status='HYBRID', source=self.source, vetted=False)
+        OaStatus.objects.create(node=self.journal, oa_status='FULLY_OA', source=self.source, problematic=True)
+        oa_status = POLICY_CASCADES['most_reliable_oa_status'].resolve(self.journal)
+        self.assertEqual(oa_status['oa_status'], 'HYBRID')
+        self.assertEqual(oa_status['provenance'], 'preferred name')
+
+    def test_policies_of_synonym_parents_are_used_last(self):
+        """
+        Policies of the publisher of a synonym should be used when no other policy is available
+        """
+        orphan = Node.objects.create(name='Orphan Journal', type='JOURNAL')
+        publisher = Node.objects.create(name='Another Publisher', type='PUBLISHER')
+        Node.objects.create(name='Orphan Jnl', type='JOURNAL', name_status='SYNONYM', synonym_of=orphan)
+        Node.objects.create(name='Orphan J', type='JOURNAL', name_status='SYNONYM', synonym_of=orphan,
+                            parent=publisher)
+        Deal.objects.create(node=publisher, applies_to='AUTHORS', type='SPRINGER COMPACT', source=self.source)
+        with self.assertNumQueries(1):
+            deal = POLICY_CASCADES['most_reliable_deal'].resolve(orphan)
+        self.assertEqual(deal['provenance'], 'synonym parent (publisher)')
+        self.assertEqual(PolicyResolver([orphan]).resolve()[orphan.id]['most_reliable_deal'], deal)
+        self.assertEqual(list(orphan.get_synonyms_parents_oa_stata()), [])
+
+    def create_green_policy(self, node, versions, vetted=True):
+        green = GreenPolicy.objects.create(node=node, source=self.source, vetted=vetted)
+        green.outlet.add(Outlet.objects.get(name='Non-commercial institutional repository'))
+        for v in versions:
+            green.version.add(Version.objects.get_or_create(short_name=v)[0])
+        return green
+
+    def test_green_policies_of_synonym_parents_are_used_last(self):
+        """
+        Green policies of the publisher of a synonym should fill the versions left empty by other stages
+        """
+        publisher = Node.objects.create(name='Another Publisher', type='PUBLISHER')
+        Node.objects.filter(name='Test Jnl A').update(parent=publisher)
+        am = self.create_green_policy(Node.objects.get(name='Test Jnl B'), ['AM'])
+        vor = self.create_green_policy(publisher, ['AM', 'VoR'])
+        embargos = POLICY_CASCADES['most_reliable_green_policies_for_ir'].resolve(self.journal)
+        self.assertEqual((embargos['AM']['id'], embargos['AM']['provenance']), (am.id, 'synonym'))
+        self.assertEqual((embargos['VoR']['id'], embargos['VoR']['provenance']),
+                         (vor.id, 'synonym parent (publisher)'))
+        resolved = PolicyResolver([self.journal]).resolve()[self.journal.id]
+        self.assertEqual(resolved['most_reliable_green_policies_for_ir'], embargos)
+
+    def test_green_policies_of_vetted_synonyms_fill_remaining_versions(self):
+        """
+        Once synonyms are tried, vetted green policies of every synonym should fill the versions left empty
+        """
+        self.create_green_policy(Node.objects.get(name='Test Jnl A'), ['AM', 'VoR'], vetted=False)
+        preprint = self.create_green_policy(Node.objects.get(name='Test Jnl B'), ['Preprint', 'AM'])
+        self.create_green_policy(Node.objects.get(name='Test Jnl C'), ['Preprint', 'AM'], vetted=False)
+        embargos = POLICY_CASCADES['most_reliable_green_policies_for_ir'].resolve(self.journal)
+        self.assertEqual(embargos['Preprint']['id'], preprint.id)
+        self.assertEqual(embargos['Preprint']['provenance'], 'synonym')
+        self.assertNotEqual(embargos['AM']['id'], preprint.id)
+        resolved = PolicyResolver([self.journal]).resolve()[self.journal.id]
+        self.assertEqual(resolved['most_reliable_green_policies_for_ir'], embargos)
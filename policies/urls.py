@@ -16,6 +16,8 @@ urlpatterns += [
     url(r'^api/nodes/attributes/$', views.NodeListAPIView.as_view(), name='api_nodes_attributes'),
     url(r'^api/nodes/summary/$', views.NodePreferredNameListAPIView.as_view(), name='api_nodes_preferred_name'),
     url(r'^api/nodes/(?P<pk>[0-9]+)/$', views.NodeDetailAPIView.as_view(), name='api_node_detail'),
+    url(r'^api/changes/$', views.ChangesAPIView.as_view(), name='api_changes'),
+    url(r'^api/cache/stats/$', views.CacheStatsAPIView.as_view(), name='api_cache_stats'),
     url(r'^api/goldpolicies/$', views.GoldPolicyListAPIView.as_view(), name='api_gold'),
     url(r'^api/goldpolicies/(?P<pk>[0-9]+)/$', views.GoldPolicyDetailAPIView.as_view(), name='api_gold_detail'),
     url(r'^api/greenpolicies/$', views.GreenPolicyListAPIView.as_view(), name='api_green'),
@@ -36,6 +38,9 @@ urlpatterns += [
 # Personalized API views
 urlpatterns += [
     url(r'^api/cambridge/$', views.CambridgeListAPIView.as_view(), name='api_cambridge'),
+    url(r'^api/cambridge/bulk/$', views.CambridgeBulkAPIView.as_view(), name='api_cambridge_bulk'),
+    url(r'^api/cambridge/export\.(?P<export_format>ndjson|csv)$', views.CambridgeExportView.as_view(),
+        name='api_cambridge_export'),
 ]
 
 # Autocomplete views
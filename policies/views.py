@@ -7,35 +7,55 @@ from django.views.generic import DetailView, ListView, TemplateView
 from django.views.generic.edit import UpdateView, CreateView, DeleteView
 from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
 from django.forms.models import model_to_dict
-from django.db.models import Q, Avg, Count, F
+from django.db.models import Q, Avg
+from django.db.models.functions import Lower
 
-from django.http import HttpResponse, HttpResponseRedirect
+from django.http import HttpResponse, HttpResponseRedirect, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 # from django.template import loader
 
 from django_addanother.views import CreatePopupMixin, UpdatePopupMixin
-from dal import autocomplete
 
+from collections import OrderedDict, defaultdict
 from datetime import datetime, date
 
 from . import models
 from . import forms
+from . import search
+from . import export
+from . import changes
+from . import curation
+from . import detail as node_detail
+from . import stats
+from .cascades import preferred_name_id
+from .conditional import ConditionalGetMixin
+from .autocomplete import NodeAutocompleteView, SourceAutocompleteView
+from .cache import CachedResponseMixin
+from . import cache
+from .pagination import KeysetPagination, decode_cursor, encode_cursor
+from .prefetch import apply_plan
 from search_views.search import SearchListView
 from search_views.filters import BaseFilter
 
-from rest_framework import generics
+from rest_framework import exceptions, generics, permissions
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 from policies import serializers
 
 # region API views
-class NodeListAPIView(generics.ListCreateAPIView):
+class NodeListAPIView(ConditionalGetMixin, CachedResponseMixin, generics.ListCreateAPIView):
     serializer_class = serializers.NodeSerializer
+    pagination_class = KeysetPagination
+    keyset_orderings = ['name', 'updated']
 
     def get_queryset(self):
         """
         Optionally restricts the returned nodes by filtering
         against `id`, `name`, or `issn` query parameter in the URL.
 
-        The `issn` query parameter will match either the issn or eissn
-        fields of nodes.
+        The `issn` query parameter will match the issn, eissn or issnl
+        fields of nodes, regardless of case and hyphenation.
         """
         queryset = models.Node.objects.all()
         nodeid = self.request.query_params.get('id', None)
@@ -45,28 +65,30 @@ class NodeListAPIView(generics.ListCreateAPIView):
         if nodeid is not None:
             queryset = queryset.filter(id__exact=nodeid)
         if nodeissn is not None:
-            queryset = queryset.filter(Q(issn__exact=nodeissn) | Q(eissn__exact=nodeissn))
+            queryset = queryset.filter(models.issn_lookup(nodeissn))
         if nodename is not None:
             queryset = queryset.filter(name__iexact=nodename)
         if node_romeo is not None:
             queryset = queryset.filter(romeo_id__exact=node_romeo)
-        return queryset
+        return apply_plan(queryset, self.get_serializer())
 
-class NodePreferredNameListAPIView(generics.ListCreateAPIView):
+class NodePreferredNameListAPIView(ConditionalGetMixin, CachedResponseMixin, generics.ListCreateAPIView):
     '''
     This API view returns only nodes with name_status == 'PRIMARY' for searches
     matching both synonyms and preferred names (e.g. searches by ISSN).
     '''
 
     serializer_class = serializers.NodeSummarySerializer
+    pagination_class = KeysetPagination
+    keyset_orderings = ['name', 'updated']
 
     def get_queryset(self):
         """
         Optionally restricts the returned nodes by filtering
         against `id`, `name`, or `issn` query parameter in the URL.
 
-        The `issn` query parameter will match either the issn or eissn
-        fields of nodes.
+        The `issn` query parameter will match the issn, eissn or issnl
+        fields of nodes, regardless of case and hyphenation.
         """
         queryset = models.Node.objects.all()
         nodeid = self.request.query_params.get('id', None)
@@ -77,19 +99,14 @@ class NodePreferredNameListAPIView(generics.ListCreateAPIView):
         elif nodename is not None:
             queryset = queryset.filter(name__iexact=nodename)
         elif nodeissn is not None:
-            queryset = queryset.filter(Q(issn__exact=nodeissn) | Q(eissn__exact=nodeissn))
+            queryset = queryset.filter(models.issn_lookup(nodeissn))
 
-        if queryset:
-            preferred_name_available = False
-            for n in queryset:
-                if n.name_status == 'PRIMARY':
-                    preferred_name_available = True
-            if preferred_name_available:
-                queryset = queryset.filter(name_status='PRIMARY')
+        if queryset.filter(name_status='PRIMARY').exists():
+            queryset = queryset.filter(name_status='PRIMARY')
 
         return queryset
 
-class CambridgeListAPIView(generics.ListAPIView):
+class CambridgeListAPIView(ConditionalGetMixin, CachedResponseMixin, generics.ListAPIView):
     '''
     This API view returns only nodes with name_status == 'PRIMARY' for searches by ISSN
     matching both synonyms and preferred names. Only JOURNAL and
@@ -103,39 +120,27 @@ class CambridgeListAPIView(generics.ListAPIView):
         Optionally restricts the returned nodes by filtering
         against `id`, `name`, or `issn` query parameter in the URL.
 
-        The `issn` query parameter will match either the issn or eissn
-        fields of nodes.
+        The `issn` query parameter will match the issn, eissn or issnl
+        fields of nodes, regardless of case and hyphenation.
         """
-        def get_preferred_name_id(node):
-            if node.name_status == 'PRIMARY':
-                return node.id
-            else:
-                return node.synonym_of.id
-
         def name_search(raw_queryset, nodename):
             """
             Customised name search retaining homonyms. If queried name contains brackets [e.g.,
             'Astronomy & Astrophysics (Hans Publishers)'], an exact match is attempted. Otherwise,
-            a match for journal names starting with the queried string is carried out and results
-            differing from the queried string only by the contents of trailing brackets are considered
-            as matches and returned.
+            journal names differing from the queried string only by case, diacritics, spacing or the
+            contents of trailing brackets are considered as matches, and their preferred names returned.
+            Both searches use indexes: the unique index on lower(name) and the normalized_name index.
             :param raw_queryset: a queryset containing all journals and conferences in the database
             :param nodename: name queried by client
             """
             if '(' in nodename:
-                return raw_queryset.filter(name__iexact=nodename)
+                return raw_queryset.annotate(lower_name=Lower('name')).filter(lower_name=nodename.lower())
             else:
-                temp_queryset = raw_queryset.filter(name__istartswith=nodename)
-                wanted_ids = []
-                for n in temp_queryset:
-                    if '(' in n.name:
-                        # publisher_names = list(models.Node.objects.filter(type__in=['PUBLISHER'])
-                        #                        .values_list('name', flat=True))
-                        if nodename == n.name.split('(')[0].strip():
-                            wanted_ids.append(get_preferred_name_id(n))
-                    elif nodename.lower() == n.name.lower():
-                        wanted_ids.append(get_preferred_name_id(n))
-                return raw_queryset.filter(id__in=wanted_ids)
+                matches = raw_queryset.filter(normalized_name=models.normalize_name(nodename))
+                preferred_names = matches.filter(Q(name_status='PRIMARY') | Q(synonym_of__isnull=True))
+                synonyms = matches.exclude(name_status='PRIMARY').filter(synonym_of__isnull=False)
+                return raw_queryset.filter(Q(id__in=preferred_names.values('id')) |
+                                           Q(id__in=synonyms.values('synonym_of')))
 
         raw_queryset = models.Node.objects.filter(type__in=['JOURNAL', 'CONFERENCE'])
         nodeid = self.request.query_params.get('id', None)
@@ -145,41 +150,219 @@ class CambridgeListAPIView(generics.ListAPIView):
         if nodeid is not None:
             queryset = raw_queryset.filter(id__exact=nodeid)
         elif nodeissn is not None:
-            for i in nodeissn.split(','): #support for comma-separated list of issns (e.g. ?issn=1111-1111,2222-2222)
-                queryset = raw_queryset.filter(Q(issn__exact=i) | Q(eissn__exact=i))
-                if queryset:
-                    issn_search = True
+            issns = nodeissn.split(',') #support for comma-separated list of issns (e.g. ?issn=1111-1111,2222-2222)
+            # Look up all issns at once, then use the first one matching any node
+            matches = defaultdict(dict)
+            for value, node_id, name_status in models.NodeIdentifier.objects.filter(node__in=raw_queryset)\
+                    .filter(value__in=[models.normalize_issn(i) for i in issns])\
+                    .values_list('value', 'node', 'node__name_status'):
+                matches[value][node_id] = name_status
+            queryset = raw_queryset.none()
+            for i in issns:
+                if matches[models.normalize_issn(i)]:
+                    issn_search = matches[models.normalize_issn(i)]
+                    queryset = raw_queryset.filter(id__in=issn_search.keys())
                     break
-            if not queryset and nodename is not None:
+            if not issn_search and nodename is not None:
                 queryset = name_search(raw_queryset, nodename)
         elif nodename is not None:
             queryset = name_search(raw_queryset, nodename)
         else:
             queryset = raw_queryset
 
-        if queryset and issn_search:
-            preferred_name_available = False
-            for n in queryset:
-                if n.name_status == 'PRIMARY':
-                    preferred_name_available = True
-            if preferred_name_available:
-                queryset = queryset.filter(name_status='PRIMARY')
+        # Only return preferred names matching an ISSN, if any
+        if issn_search and ('PRIMARY' in issn_search.values()):
+            queryset = queryset.filter(name_status='PRIMARY')
 
-        return queryset
+        return queryset.select_related('parent', 'synonym_of__parent', 'resolved_policy')
+
+class CambridgeBulkAPIView(generics.GenericAPIView):
+    '''
+    Bulk version of CambridgeListAPIView, for clients reconciling many journals at once. Accepts a POST
+    request whose body contains lists of ISSNs and/or journal names, e.g.
+        {"issn": ["1111-1111", "2222-2222"], "name": ["Journal of Things"]}
+    and returns Cambridge records of matching JOURNAL and CONFERENCE nodes, keyed by queried identifier:
+        {"issn": {"1111-1111": {"found": true, "results": [...]}, "2222-2222": {"found": false, "results": []}},
+         "name": {...}}
+
+    Identifiers are matched as in CambridgeListAPIView: ISSNs match issn, eissn and issnl and only
+    preferred names are returned when available; names are matched as by its name search, homonyms included.
+    '''
+    serializer_class = serializers.CambridgeSerializer
+    permission_classes = [permissions.AllowAny]  # read-only, despite using POST
+    lookup_batch_size = 500  # identifiers per query, keeping below database limits on query parameters
+
+    def get_queryset(self):
+        return models.Node.objects.filter(type__in=['JOURNAL', 'CONFERENCE'])
+
+    def batches(self, items):
+        items = list(items)
+        for i in range(0, len(items), self.lookup_batch_size):
+            yield items[i:i + self.lookup_batch_size]
+
+    def match_issns(self, issns):
+        '''
+        :return: dictionary mapping each matched ISSN to a list of node ids
+        '''
+        found = defaultdict(list)
+        for batch in self.batches(set(models.normalize_issn(i) for i in issns) - set([None])):
+            identifiers = models.NodeIdentifier.objects.filter(value__in=batch, node__in=self.get_queryset())\
+                .values_list('value', 'node', 'node__name_status').distinct()
+            for value, node_id, name_status in identifiers:
+                found[value].append((node_id, name_status))
+        matches = {}
+        for i in issns:
+            nodes = found.get(models.normalize_issn(i))
+            if nodes:
+                # Only return preferred names when available
+                preferred_names = [n for n in nodes if n[1] == 'PRIMARY']
+                matches[i] = [node_id for node_id, name_status in (preferred_names or nodes)]
+        return matches
+
+    def match_names(self, names):
+        '''
+        :return: dictionary mapping each matched name to a list of node ids
+        '''
+        def key(name):
+            if '(' in name:
+                return 'exact', name.lower()
+            return 'normalized', models.normalize_name(name)
+
+        found = defaultdict(list)
+        queryset = self.get_queryset().annotate(lower_name=Lower('name'))\
+            .only('id', 'name_status', 'synonym_of', 'normalized_name')
+        for batch in self.batches(set(k for t, k in map(key, names) if t == 'exact')):
+            for n in queryset.filter(lower_name__in=batch):
+                found['exact', n.lower_name].append(n.id)
+        for batch in self.batches(set(k for t, k in map(key, names) if t == 'normalized')):
+            for n in queryset.filter(normalized_name__in=batch):
+                found['normalized', n.normalized_name].append(preferred_name_id(n))
+        return dict((n, found[key(n)]) for n in names if found.get(key(n)))
+
+    def post(self, request, *args, **kwargs):
+        query = serializers.CambridgeBulkQuerySerializer(data=request.data)
+        query.is_valid(raise_exception=True)
+        issns = query.validated_data['issn']
+        names = query.validated_data['name']
+        issn_matches = self.match_issns(issns)
+        name_matches = self.match_names(names)
+
+        node_ids = set()
+        for ids in list(issn_matches.values()) + list(name_matches.values()):
+            node_ids.update(ids)
+        nodes = []
+        for batch in self.batches(node_ids):
+            nodes += self.get_queryset().filter(id__in=batch)\
+                .select_related('parent', 'synonym_of__parent', 'resolved_policy')
+        # Keyed by node rather than by record, which lacks the id if excluded by ?fields= or ?omit=
+        records = dict((n.id, r) for n, r in zip(nodes, self.get_serializer(nodes, many=True).data))
+
+        def entry(ids):
+            results = [records[i] for i in sorted(set(ids)) if i in records]
+            return OrderedDict([('found', bool(results)), ('results', results)])
+
+        return Response(OrderedDict([
+            ('issn', OrderedDict((i, entry(issn_matches.get(i, []))) for i in issns)),
+            ('name', OrderedDict((n, entry(name_matches.get(n, []))) for n in names)),
+        ]))
+
+class CambridgeExportView(ConditionalGetMixin, generics.GenericAPIView):
+    '''
+    Streams all JOURNAL and CONFERENCE nodes with the fields of CambridgeListAPIView, as NDJSON
+    (one record per line) or CSV, depending on the URL. Use instead of paging through the Cambridge API.
+    '''
+    content_negotiation_class = export.ExportContentNegotiation
+    batch_size = 500
+
+    def get_queryset(self):
+        return export.export_queryset()
+
+    def get(self, request, export_format):
+        lines = export.export_lines(export_format, self.get_queryset(), self.batch_size, self.get_serializer_context())
+        response = StreamingHttpResponse(lines, content_type=export.EXPORT_FORMATS[export_format])
+        response['Content-Disposition'] = 'attachment; filename="orpheus-cambridge.{}"'.format(export_format)
+        return response
+
+class ChangesAPIView(ConditionalGetMixin, generics.GenericAPIView):
+    '''
+    Changes to nodes, policies and sources at or after the time given by the since parameter (ISO 8601),
+    as compact events (see policies.changes), oldest first, e.g.
+        {"next": "...?since=...&cursor=...", "results": [{"model": "node", "id": 1, "op": "update",
+                                                          "updated": "2019-01-01T12:00:00Z"}, ...]}
+    Pages are followed through next links; when next is null, the last updated value can be used as
+    since for the following sync.
+    '''
+    permission_classes = [permissions.AllowAny]
+    default_limit = 100
+    max_limit = 1000
+
+    def get_since(self, request):
+        try:
+            since = parse_datetime(request.query_params.get('since', ''))
+        except ValueError:
+            since = None
+        if since is None:
+            raise exceptions.ValidationError({'since': 'An ISO 8601 date and time is required'})
+        if timezone.is_naive(since):
+            since = timezone.make_aware(since)
+        return since
+
+    def get_position(self, request):
+        cursor = request.query_params.get('cursor')
+        if not cursor:
+            return None
+        try:
+            updated, source, key = decode_cursor(cursor)
+            updated = parse_datetime(updated)
+            if updated is None:
+                raise ValueError(cursor)
+            return updated, source, int(key)
+        except (TypeError, ValueError):
+            raise exceptions.NotFound('Invalid cursor')
+
+    def get_limit(self, request):
+        try:
+            return max(1, min(int(request.query_params['limit']), self.max_limit))
+        except (KeyError, ValueError):
+            return self.default_limit
+
+    def get(self, request):
+        limit = self.get_limit(request)
+        events, more = changes.changes(self.get_since(request), self.get_position(request), limit)
+        next_link = None
+        if more:
+            last = events[-1]
+            next_link = replace_query_param(request.build_absolute_uri(), 'cursor',
+                                            encode_cursor([last.updated.isoformat(), last.source, last.key]))
+        return Response(OrderedDict([
+            ('next', next_link),
+            ('results', [OrderedDict([('model', e.model), ('id', e.id), ('op', e.op), ('updated', e.updated)])
+                         for e in events]),
+        ]))
+
+class CacheStatsAPIView(generics.GenericAPIView):
+    '''
+    Hit and miss counts of the API response cache (see policies.cache)
+    '''
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        return Response(cache.stats())
 
 class NodeSimpleListAPIView(NodeListAPIView):
     serializer_class = serializers.NodeSimpleSerializer
 
-class NodeDetailAPIView(generics.RetrieveUpdateDestroyAPIView):
+class NodeDetailAPIView(ConditionalGetMixin, CachedResponseMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = models.Node.objects.all()
     serializer_class = serializers.NodeSimpleSerializer
     # serializer_class = serializers.NodeSerializer
 
-class PolicyListAPIView(generics.ListCreateAPIView):
+class PolicyListAPIView(ConditionalGetMixin, CachedResponseMixin, generics.ListCreateAPIView):
     '''
     Generic Policy API list view. Each of the actual policy API list views subclasses this view
     '''
     model = None
+    cache_node_attribute = 'node_id'
 
     def get_queryset(self):
         """
@@ -304,7 +487,8 @@ class VersionListAPIView(generics.ListCreateAPIView):
 
 class NodeFilter(BaseFilter):
     search_fields = {
-        'search_text': ['name', 'issn', 'eissn'],
+        # Matched and ranked by the search backend (see NodeSearchMixin)
+        'search_text': {'fields': ['name', 'issn', 'eissn'], 'ignore': True},
         'search_name_exact': {'operator': '__exact', 'fields': ['name', 'issn', 'eissn']},
     }
 
@@ -319,90 +503,7 @@ def index(request):
     '''
     View function for homepage
     '''
-    # Generate counts of some of the main objects
-    num_nodes = models.Node.objects.all().count()
-    num_nodes_primary = models.Node.objects.filter(name_status='PRIMARY').count()
-    num_publishers = models.Node.objects.filter(type='PUBLISHER').count()
-    num_publishers_primary = models.Node.objects.filter(type='PUBLISHER', name_status='PRIMARY').count()
-    num_journals = models.Node.objects.filter(type='JOURNAL').count()
-    num_journals_primary = models.Node.objects.filter(type='JOURNAL', name_status='PRIMARY').count()
-    num_conferences = models.Node.objects.filter(type='CONFERENCE').count()
-    num_conferences_primary = models.Node.objects.filter(type='CONFERENCE', name_status='PRIMARY').count()
-
-    # Generate counts of policies
-    num_node_green = models.Node.objects.annotate(green_count=Count(
-        'green_policies')).filter(green_count__gte=1).count()
-    num_journal_oa_status = models.Node.objects.filter(type='JOURNAL').annotate(oa_count=Count(
-        'oa_stata')).filter(oa_count__gte=1).count()
-    num_journal_green = models.Node.objects.filter(type='JOURNAL').annotate(green_count=Count(
-        'green_policies')).filter(green_count__gte=1).count()
-    num_journal_gold = models.Node.objects.filter(type='JOURNAL').annotate(gold_count=Count(
-        'gold_policies')).filter(gold_count__gte=1).count()
-    num_journal_epmc = models.Node.objects.filter(type='JOURNAL').annotate(epmc_count=Count(
-        'epmc_policies')).filter(epmc_count__gte=1).count()
-    num_journal_deals = models.Node.objects.filter(type='JOURNAL').annotate(deal_count=Count(
-        'deals')).filter(deal_count__gte=1).count()
-    num_journal_contacts = models.Node.objects.filter(type='JOURNAL').annotate(contact_count=Count(
-        'contacts')).filter(contact_count__gte=1).count()
-    num_publisher_oa_status = models.Node.objects.filter(type='PUBLISHER').annotate(oa_count=Count(
-        'oa_stata')).filter(oa_count__gte=1).count()
-    num_publisher_green = models.Node.objects.filter(type='PUBLISHER').annotate(green_count=Count(
-        'green_policies')).filter(green_count__gte=1).count()
-    num_publisher_gold = models.Node.objects.filter(type='PUBLISHER').annotate(gold_count=Count(
-        'gold_policies')).filter(gold_count__gte=1).count()
-    num_publisher_epmc = models.Node.objects.filter(type='PUBLISHER').annotate(epmc_count=Count(
-        'epmc_policies')).filter(epmc_count__gte=1).count()
-    num_publisher_deals = models.Node.objects.filter(type='PUBLISHER').annotate(deal_count=Count(
-        'deals')).filter(deal_count__gte=1).count()
-    num_publisher_contacts = models.Node.objects.filter(type='PUBLISHER').annotate(contact_count=Count(
-        'contacts')).filter(contact_count__gte=1).count()
-    num_conference_oa_status = models.Node.objects.filter(type='CONFERENCE').annotate(oa_count=Count(
-        'oa_stata')).filter(oa_count__gte=1).count()
-    num_conference_green = models.Node.objects.filter(type='CONFERENCE').annotate(green_count=Count(
-        'green_policies')).filter(green_count__gte=1).count()
-    num_conference_gold = models.Node.objects.filter(type='CONFERENCE').annotate(gold_count=Count(
-        'gold_policies')).filter(gold_count__gte=1).count()
-    num_conference_epmc = models.Node.objects.filter(type='CONFERENCE').annotate(epmc_count=Count(
-        'epmc_policies')).filter(epmc_count__gte=1).count()
-    num_conference_deals = models.Node.objects.filter(type='CONFERENCE').annotate(deal_count=Count(
-        'deals')).filter(deal_count__gte=1).count()
-    num_conference_contacts = models.Node.objects.filter(type='CONFERENCE').annotate(contact_count=Count(
-        'contacts')).filter(contact_count__gte=1).count()
-
-    publisher_list = models.Node.objects.filter(type='PUBLISHER', name_status='PRIMARY').order_by('name')
-    journal_list = models.Node.objects.filter(type='JOURNAL', name_status='PRIMARY').order_by('name')
-    conference_list = models.Node.objects.filter(type='CONFERENCE', name_status='PRIMARY').order_by('name')
-    context = {'publisher_list': publisher_list,
-               'journal_list': journal_list,
-               'conference_list': conference_list,
-               'num_nodes': num_nodes,
-                'num_nodes_primary': num_nodes_primary,
-                'num_publishers': num_publishers,
-                'num_publishers_primary': num_publishers_primary,
-                'num_journals': num_journals,
-                'num_journals_primary': num_journals_primary,
-                'num_conferences': num_conferences,
-                'num_conferences_primary': num_conferences_primary,
-                'num_node_green': num_node_green,
-                'num_journal_oa_status': num_journal_oa_status,
-                'num_journal_green': num_journal_green,
-                'num_journal_gold': num_journal_gold,
-                'num_journal_epmc': num_journal_epmc,
-                'num_journal_deals': num_journal_deals,
-                'num_journal_contacts': num_journal_contacts,
-                'num_publisher_oa_status': num_publisher_oa_status,
-                'num_publisher_green': num_publisher_green,
-                'num_publisher_gold': num_publisher_gold,
-                'num_publisher_epmc': num_publisher_epmc,
-                'num_publisher_deals': num_publisher_deals,
-                'num_publisher_contacts': num_publisher_contacts,
-                'num_conference_oa_status': num_conference_oa_status,
-                'num_conference_green': num_conference_green,
-                'num_conference_gold': num_conference_gold,
-                'num_conference_epmc': num_conference_epmc,
-                'num_conference_deals': num_conference_deals,
-                'num_conference_contacts': num_conference_contacts,
-               }
+    context = stats.index_statistics()
     return render(request, 'policies/index.html', context)
 
 class AboutView(TemplateView):
@@ -411,7 +512,19 @@ class AboutView(TemplateView):
 
 
 # region Node list views
-class NodeListView(LoginRequiredMixin, SearchListView):
+class NodeSearchMixin(object):
+    '''
+    Filters node list views by the search_text field of NodeFilter using the search backend, most
+    relevant nodes first
+    '''
+    def get_object_list(self, request, search_errors=None):
+        object_list = super(NodeSearchMixin, self).get_object_list(request, search_errors)
+        text = request.GET.get('search_text', '').strip()
+        if text:
+            object_list = search.search_nodes(object_list, text)
+        return object_list
+
+class NodeListView(LoginRequiredMixin, NodeSearchMixin, SearchListView):
     '''
     Generic class-based view listing all nodes in the database;
     with a search bar
@@ -443,240 +556,92 @@ class ConferenceListView(NodeListView):
         return models.Node.objects.filter(type='CONFERENCE').order_by('name')
 
 # region curatorial Node list views
-class GrandchildrenListView(NodeListView):
+class CuratorialReportListView(NodeListView):
     '''
-    Curatorial view displaying nodes whose parent has a parent
+    Base of curatorial views, listing the nodes of a precomputed report (see policies.curation)
     '''
-    template_name = "policies/curatorial/grandchildren_list_view.html"
+    report_name = None
 
     def get_queryset(self):
-        return models.Node.objects.filter(parent__isnull=False).exclude(parent__parent__isnull=True).order_by('name')
+        return curation.report_nodes(self.report_name).select_related('synonym_of').prefetch_related('children')
 
-class JournalchildrenListView(NodeListView):
+    def get_context_data(self, **kwargs):
+        context = super(CuratorialReportListView, self).get_context_data(**kwargs)
+        context['report'] = models.CuratorialReport.objects.filter(name=self.report_name).first()
+        return context
+
+class GrandchildrenListView(CuratorialReportListView):
+    '''
+    Curatorial view displaying nodes whose parent has a parent
+    '''
+    template_name = "policies/curatorial/grandchildren_list_view.html"
+    report_name = 'grandchildren'
+
+class JournalchildrenListView(CuratorialReportListView):
     '''
     Curatorial view displaying nodes whose parent is not a publisher
     '''
     template_name = "policies/curatorial/journalchildren_list_view.html"
+    report_name = 'journal_children'
 
-    def get_queryset(self):
-        return models.Node.objects.filter(parent__isnull=False).exclude(parent__type='PUBLISHER').order_by('name')
-
-class ProblematicPolicies(NodeListView):
+class ProblematicPolicies(CuratorialReportListView):
     '''
     Curatorial view displaying nodes with one or more attached policies marked as problematic
     '''
     template_name = "policies/curatorial/problematic_policies_list_view.html"
+    report_name = 'problematic_policies'
 
-    def get_queryset(self):
-        return models.Node.objects.filter(green_policies__problematic=True)\
-            .annotate(children_n=Count('children')).order_by('-children_n')
-
-class SynonymchildrenListView(NodeListView):
+class SynonymchildrenListView(CuratorialReportListView):
     '''
     Curatorial view displaying nodes whose parent is not a preferred name
     '''
     template_name = "policies/curatorial/synonymchildren_list_view.html"
+    report_name = 'synonym_children'
 
-    def get_queryset(self):
-        return models.Node.objects.filter(parent__isnull=False).exclude(parent__name_status='PRIMARY').order_by('name')
-
-class SynonymofsynonymListView(NodeListView):
+class SynonymofsynonymListView(CuratorialReportListView):
     '''
     Curatorial view displaying nodes that are synonyms of other synonyms
     '''
     template_name = "policies/curatorial/synonymofsynonym_list_view.html"
+    report_name = 'synonyms_of_synonyms'
 
-    def get_queryset(self):
-        return models.Node.objects.filter(synonym_of__isnull=False).exclude(synonym_of__name_status='PRIMARY').order_by('name')
-
-class SynonymswithpoliciesListView(NodeListView):
+class SynonymswithpoliciesListView(CuratorialReportListView):
     '''
     Curatorial view displaying synonym nodes with attached policies
     '''
     template_name = "policies/curatorial/synonymswithpolicies_list_view.html"
-
-    def get_queryset(self):
-        return models.Node.objects.filter(synonym_of__isnull=False)\
-            .annotate(green_n=Count('green_policies'), gold_n=Count('gold_policies'), oa_n=Count('oa_stata'))\
-            .annotate(total_count=F('green_n') + F('gold_n') + F('oa_n')).filter(total_count__gte=1)
+    report_name = 'synonyms_with_policies'
 # endregion
 # endregion
 
 # region Node detail views
-class detail(LoginRequiredMixin, DetailView):
+class detail(LoginRequiredMixin, ConditionalGetMixin, DetailView):
     model = models.Node
     template_name = 'policies/node_detail.html'
+    include_superseded = False
+
+    def get_queryset(self):
+        return node_detail.detail_queryset()
+
+    def get_etag_variant(self, request):
+        # Pages differ by user (permissions) and session (CSRF token)
+        return request.session.session_key
+
     def get_context_data(self, **kwargs):
         context = super(detail, self).get_context_data(**kwargs)
-
-        oastata = models.OaStatus.objects.filter(node=self.object.id)
-        oastatus_prov = ''
-        if not oastata:
-            oastata = self.object.get_parent_oa_stata()
-            try:
-                oastatus_prov = '[inherited from %s: %s]' % (self.object.parent.get_type_display().lower(), self.object.parent)
-            except AttributeError: # Node does not have a parent
-                pass
-        context['oastatus_list'] = oastata.filter(superseded=False)
-        context['oastatus_prov'] = oastatus_prov
-
-        gold = models.GoldPolicy.objects.filter(node=self.object.id)
-        gold_prov = ''
-        if not gold:
-            gold = self.object.get_parent_gold_policies()
-            try:
-                gold_prov = '[inherited from %s: %s]' % (self.object.parent.get_type_display().lower(), self.object.parent)
-            except AttributeError:  # Node does not have a parent
-                pass
-        context['goldpolicy_list'] = gold.filter(superseded=False)
-        context['goldpolicy_prov'] = gold_prov
-
-        green = models.GreenPolicy.objects.filter(node=self.object.id)
-        green_prov = ''
-        if not green:
-            green = self.object.get_parent_green_policies()
-            try:
-                green_prov = '[inherited from %s: %s]' % (self.object.parent.get_type_display().lower(), self.object.parent)
-            except AttributeError:  # Node does not have a parent
-                pass
-        context['greenpolicy_list'] = green.filter(superseded=False)
-        context['greenpolicy_prov'] = green_prov
-
-        epmc = models.Epmc.objects.filter(node=self.object.id)
-        epmc_prov = ''
-        if not epmc:
-            epmc = self.object.get_parent_epmc_policies()
-            try:
-                epmc_prov = '[inherited from %s: %s]' % (self.object.parent.get_type_display().lower(), self.object.parent)
-            except AttributeError:  # Node does not have a parent
-                pass
-        context['epmc_list'] = epmc.filter(superseded=False)
-        context['epmc_prov'] = epmc_prov
-
-        deal = models.Deal.objects.filter(node=self.object.id)
-        deal_prov = ''
-        if not deal:
-            deal = self.object.get_parent_deal_policies()
-            try:
-                deal_prov = '[inherited from %s: %s]' % (self.object.parent.get_type_display().lower(), self.object.parent)
-            except AttributeError:  # Node does not have a parent
-                pass
-        context['deal_list'] = deal.filter(superseded=False)
-        context['deal_prov'] = deal_prov
-
-        contact = models.Contact.objects.filter(node=self.object.id)
-        contact_prov = ''
-        if not contact:
-            contact = self.object.get_parent_contacts()
-            try:
-                contact_prov = '[inherited from %s: %s]' % (self.object.parent.get_type_display().lower(), self.object.parent)
-            except AttributeError:  # Node does not have a parent
-                pass
-        context['contact_list'] = contact.filter(active=True)
-        context['contact_prov'] = contact_prov
-
-        context['retro_list'] = models.RetrospectiveOaPolicy.objects.filter(superseded=False)
+        context.update(node_detail.policy_context(self.object, self.include_superseded))
         return context
 
 class NodeAllDetail(detail):
-    def get_context_data(self, **kwargs):
-        context = super(NodeAllDetail, self).get_context_data(**kwargs)
-
-        oastata = models.OaStatus.objects.filter(node=self.object.id)
-        oastatus_prov = ''
-        if not oastata:
-            oastata = self.object.get_parent_oa_stata()
-            try:
-                oastatus_prov = '[inherited from %s: %s]' % (
-                self.object.parent.get_type_display().lower(), self.object.parent)
-            except AttributeError:  # Node does not have a parent
-                pass
-        context['oastatus_list'] = oastata
-        context['oastatus_prov'] = oastatus_prov
-
-        gold = models.GoldPolicy.objects.filter(node=self.object.id)
-        gold_prov = ''
-        if not gold:
-            gold = self.object.get_parent_gold_policies()
-            try:
-                gold_prov = '[inherited from %s: %s]' % (
-                self.object.parent.get_type_display().lower(), self.object.parent)
-            except AttributeError:  # Node does not have a parent
-                pass
-        context['goldpolicy_list'] = gold
-        context['goldpolicy_prov'] = gold_prov
-
-        green = models.GreenPolicy.objects.filter(node=self.object.id)
-        green_prov = ''
-        if not green:
-            green = self.object.get_parent_green_policies()
-            try:
-                green_prov = '[inherited from %s: %s]' % (
-                self.object.parent.get_type_display().lower(), self.object.parent)
-            except AttributeError:  # Node does not have a parent
-                pass
-        context['greenpolicy_list'] = green
-        context['greenpolicy_prov'] = green_prov
-
-        epmc = models.Epmc.objects.filter(node=self.object.id)
-        epmc_prov = ''
-        if not epmc:
-            epmc = self.object.get_parent_epmc_policies()
-            try:
-                epmc_prov = '[inherited from %s: %s]' % (
-                    self.object.parent.get_type_display().lower(), self.object.parent)
-            except AttributeError:  # Node does not have a parent
-                pass
-        context['epmc_list'] = epmc
-        context['epmc_prov'] = epmc_prov
-
-        deal = models.Deal.objects.filter(node=self.object.id)
-        deal_prov = ''
-        if not deal:
-            deal = self.object.get_parent_deal_policies()
-            try:
-                deal_prov = '[inherited from %s: %s]' % (self.object.parent.get_type_display().lower(), self.object.parent)
-            except AttributeError:  # Node does not have a parent
-                pass
-        context['deal_list'] = deal
-        context['deal_prov'] = deal_prov
-
-        contact = models.Contact.objects.filter(node=self.object.id)
-        contact_prov = ''
-        if not contact:
-            contact = self.object.get_parent_contacts()
-            try:
-                contact_prov = '[inherited from %s: %s]' % (self.object.parent.get_type_display().lower(), self.object.parent)
-            except AttributeError:  # Node does not have a parent
-                pass
-        context['contact_list'] = contact
-        context['contact_prov'] = contact_prov
-
-        context['retro_list'] = models.RetrospectiveOaPolicy.objects.filter(superseded=False)
-        return context
+    include_superseded = True
 # endregion
 
 # region Node create forms
-class NodeAutocomplete(autocomplete.Select2QuerySetView):
-    def get_queryset(self):
-        if not self.request.user.is_authenticated():
-            return models.Node.objects.none()
-        qs = models.Node.objects.all()
-        type = self.forwarded.get('type', None)
-        if type:
-            qs = qs.filter(type__exact=type)
-        if self.q:
-            qs = qs.filter(name__istartswith=self.q)
-        return qs
-
-class PublisherAutocomplete(autocomplete.Select2QuerySetView):
-    def get_queryset(self):
-        if not self.request.user.is_authenticated():
-            return models.Node.objects.none()
-        qs = models.Node.objects.filter(type__exact='PUBLISHER')
-        if self.q:
-            qs = qs.filter(name__istartswith=self.q)
-        return qs
+class NodeAutocomplete(NodeAutocompleteView):
+    pass
+
+class PublisherAutocomplete(NodeAutocompleteView):
+    node_type = 'PUBLISHER'
 
 class NodeCreate(CreatePopupMixin, LoginRequiredMixin, CreateView):
     model = models.Node
@@ -796,16 +761,8 @@ class NodeConfirmDelete(PermissionRequiredMixin, DeleteView):
         return reverse_lazy('policies:index')
 
 # region Source views
-class SourceAutocomplete(autocomplete.Select2QuerySetView):
-    def get_queryset(self):
-        if not self.request.user.is_authenticated():
-            return models.Source.objects.none()
-        qs = models.Source.objects.all()
-        if self.q:
-            qsr = qs.filter(description__istartswith=self.q)
-            if not qsr:
-                qsr = qs.filter(url__iexact=self.q)
-        return qsr
+class SourceAutocomplete(SourceAutocompleteView):
+    pass
 
 class SourceListView(LoginRequiredMixin, SearchListView):
     '''
@@ -1275,7 +1232,7 @@ class SourceAddNote(CreateNote):
         return reverse_lazy('policies:source_detail', kwargs={'pk': self.policy.id})
 # endregion
 
-class JournalbyPublisherListView(LoginRequiredMixin, SearchListView):
+class JournalbyPublisherListView(LoginRequiredMixin, NodeSearchMixin, SearchListView):
     '''
     Generic class-based view listing all journals by a publisher in the database;
     with a search bar